@@ -0,0 +1,298 @@
+import numpy as np
+import pandas as pd
+
+CELL_KEYS = ['gender', 'content_source']
+ENGAGEMENT_LEVELS = ['Dislike', 'Neutral', 'Like']
+ENGAGEMENT_MAP = {'Dislike': 1, 'Neutral': 2, 'Like': 3}
+PERSUASIVENESS_ITEMS = ['persuasiveness_1', 'persuasiveness_2', 'persuasiveness_3']
+
+# Variables whose non-missing counts, sums and pairwise cross-products are accumulated per cell.
+# Every mean, std, covariance and correlation in the report is derived from these. Missing values
+# are left out as pandas does: per variable for means and stds, per pair for covariances and
+# correlations. persuasiveness is the row mean of the items present, as in load_and_preprocess.
+MOMENT_VARS = ['engagement_numeric'] + PERSUASIVENESS_ITEMS + ['persuasiveness', 'donation_amount']
+PAIRS = [(a, b) for i, a in enumerate(MOMENT_VARS) for b in MOMENT_VARS[i + 1:]]
+
+# Variables whose value counts are kept for medians, quantiles, min and max.
+# Both are discrete in this design (Likert means and whole-cent amounts).
+TALLY_VARS = ['persuasiveness', 'donation_amount']
+
+CORRELATION_VARS = ['engagement_numeric', 'persuasiveness', 'donation_amount']
+
+
+def _cross_product_column(a, b):
+    return f"{a}*{b}"
+
+
+def _count_column(a, b=None):
+    # Rows where a (and b) are present
+    return f"n:{a}" if b is None else f"n:{a}*{b}"
+
+
+def _given_column(a, b, square=False):
+    # Sum of a (or a squared) over the rows where b is present as well
+    return f"{_cross_product_column(a, a) if square else a}|{b}"
+
+
+def _quantile_from_tally(values, counts, q):
+    # Linear interpolation between order statistics, matching pandas' default
+    n = counts.sum()
+    cum = np.cumsum(counts)
+    h = (n - 1) * q
+    lo = values[np.searchsorted(cum, np.floor(h), side='right')]
+    hi = values[np.searchsorted(cum, np.ceil(h), side='right')]
+    return lo + (h - np.floor(h)) * (hi - lo)
+
+
+def _group_sum(work, keys):
+    if keys:
+        return work.groupby(keys, observed=True, sort=True).sum()
+    return work.sum().to_frame('All').T.astype(work.dtypes)
+
+
+class CellStats:
+    """Mergeable per-cell sufficient statistics behind the descriptive report"""
+
+    def __init__(self, keys, moments, tallies):
+        self.keys = list(keys)
+        self.moments = moments
+        self.tallies = tallies
+        # Derived tables asked for more than once per run (collapsed cells, reliability)
+        self._derived = {}
+
+    @classmethod
+    def from_frame(cls, df, keys=CELL_KEYS):
+        """Accumulate every per-cell statistic of df in one grouped pass"""
+        keys = list(keys)
+        rating = df['rating']
+        donation = df['donation_amount'].to_numpy(dtype=float)
+        if 'persuasiveness' in df.columns:
+            values = {'persuasiveness': df['persuasiveness']}
+        else:
+            values = {'persuasiveness': df[PERSUASIVENESS_ITEMS].mean(axis=1)}
+        values['donation_amount'] = df['donation_amount']
+        x = {'engagement_numeric': rating.map(ENGAGEMENT_MAP).to_numpy(dtype=float),
+             'persuasiveness': values['persuasiveness'].to_numpy(dtype=float),
+             'donation_amount': donation}
+        for item in PERSUASIVENESS_ITEMS:
+            x[item] = df[item].to_numpy(dtype=float)
+        # Missing values add nothing to the sums; the counts say how many rows each sum covers
+        present = {var: ~np.isnan(x[var]) for var in MOMENT_VARS}
+        x = {var: np.where(present[var], x[var], 0.0) for var in MOMENT_VARS}
+
+        columns = {key: df[key].to_numpy() for key in keys}
+        columns['n'] = np.ones(len(df), dtype=np.int64)
+        for level in ENGAGEMENT_LEVELS:
+            columns[f"rating_{level}"] = (rating == level).to_numpy(dtype=np.int64)
+        columns['zero_donation'] = (donation == 0).astype(np.int64)
+        for var in MOMENT_VARS:
+            columns[_count_column(var)] = present[var].astype(np.int64)
+            columns[var] = x[var]
+            columns[_cross_product_column(var, var)] = x[var] * x[var]
+        for a, b in PAIRS:
+            # Zero wherever a or b is missing, so already a sum over the rows where both are present
+            columns[_cross_product_column(a, b)] = x[a] * x[b]
+        moments = _group_sum(pd.DataFrame(columns, index=df.index), keys)
+
+        # Pair counts and conditional sums are those of the whole cell less the rows where the other
+        # variable is missing; only rows with a missing value are grouped a second time
+        incomplete = ~np.logical_and.reduce([present[var] for var in MOMENT_VARS])
+        pair_columns = {}
+        for a, b in PAIRS:
+            pair_columns[_count_column(a, b)] = moments['n']
+            for u, v in ((a, b), (b, a)):
+                pair_columns[_given_column(u, v)] = moments[u]
+                pair_columns[_given_column(u, v, square=True)] = moments[_cross_product_column(u, u)]
+        pair_columns = pd.DataFrame(pair_columns)
+        if incomplete.any():
+            lost = {key: columns[key][incomplete] for key in keys}
+            for a, b in PAIRS:
+                lost[_count_column(a, b)] = (~(present[a] & present[b]))[incomplete].astype(np.int64)
+                for u, v in ((a, b), (b, a)):
+                    missing = ~present[v][incomplete]
+                    lost[_given_column(u, v)] = x[u][incomplete] * missing
+                    lost[_given_column(u, v, square=True)] = x[u][incomplete] ** 2 * missing
+            lost = _group_sum(pd.DataFrame(lost), keys).reindex(moments.index, fill_value=0)
+            pair_columns = pair_columns - lost[pair_columns.columns]
+        moments = pd.concat([moments, pair_columns], axis=1)
+
+        tallies = {}
+        for var in TALLY_VARS:
+            by = [df[key] for key in keys] + [values[var]]
+            tallies[var] = values[var].groupby(by, observed=True, sort=True).size()
+        return cls(keys, moments, tallies)
+
+    def merge(self, other):
+        """Return the statistics of the union of the rows behind self and other"""
+        moments = pd.concat([self.moments, other.moments])
+        moments = moments.groupby(level=list(range(moments.index.nlevels)), sort=True).sum()
+        tallies = {}
+        for var in TALLY_VARS:
+            tally = pd.concat([self.tallies[var], other.tallies[var]])
+            tallies[var] = tally.groupby(level=list(range(tally.index.nlevels)), sort=True).sum()
+        return CellStats(self.keys, moments, tallies)
+
+    def collapse(self, keys=()):
+        """Regroup the cells to a coarser subset of keys; no keys pools everything"""
+        keys = list(keys)
+        if ('collapse', tuple(keys)) in self._derived:
+            return self._derived[('collapse', tuple(keys))]
+        if keys:
+            moments = self.moments.groupby(level=keys, sort=True).sum()
+        else:
+            moments = self.moments.sum().to_frame('All').T.astype(self.moments.dtypes)
+        tallies = {}
+        for var in TALLY_VARS:
+            tally = self.tallies[var]
+            tallies[var] = tally.groupby(level=keys + [tally.index.nlevels - 1], sort=True).sum()
+        self._derived[('collapse', tuple(keys))] = CellStats(keys, moments, tallies)
+        return self._derived[('collapse', tuple(keys))]
+
+    def select(self, **filters):
+        """The cells whose keys match filters, each a value or a list of values"""
+        def mask(index):
+            keep = np.ones(len(index), dtype=bool)
+            for key, value in filters.items():
+                values = value if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)) else [value]
+                keep &= index.get_level_values(key).isin(list(values))
+            return keep
+        tallies = {var: tally[mask(tally.index)] for var, tally in self.tallies.items()}
+        return CellStats(self.keys, self.moments[mask(self.moments.index)], tallies)
+
+    # --- Derived statistics ---
+
+    def _column(self, name):
+        return self.moments[name].to_numpy(dtype=float)
+
+    def _pairwise(self, variables):
+        # Per-cell pair counts n[c, i, j], sums s[c, i, j] of variable i and sums of squares q[c, i, j]
+        # over the rows where i and j are both present, and cross-products cp[c, i, j] over those rows
+        k = len(variables)
+        n, s, q, cp = (np.empty((len(self.moments), k, k)) for _ in range(4))
+        for i, a in enumerate(variables):
+            for j, b in enumerate(variables):
+                if a == b:
+                    n[:, i, j] = self._column(_count_column(a))
+                    s[:, i, j] = self._column(a)
+                    q[:, i, j] = cp[:, i, j] = self._column(_cross_product_column(a, a))
+                else:
+                    pair = (a, b) if (a, b) in PAIRS else (b, a)
+                    n[:, i, j] = self._column(_count_column(*pair))
+                    cp[:, i, j] = self._column(_cross_product_column(*pair))
+                    s[:, i, j] = self._column(_given_column(a, b))
+                    q[:, i, j] = self._column(_given_column(a, b, square=True))
+        return n, s, q, cp
+
+    @staticmethod
+    def _centered(n, sums, squares):
+        # Sample (co)variance from pair counts, sums and cross-products; NaN below two rows, as in pandas
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (squares - sums * np.swapaxes(sums, -1, -2) / n) / np.where(n > 1, n - 1, np.nan)
+
+    def covariance(self, variables):
+        """Per-cell sample covariance matrices, shape (cells, len(variables), len(variables));
+        each entry uses the rows where both variables are present, as DataFrame.cov"""
+        n, s, _, cp = self._pairwise(list(variables))
+        return self._centered(n, s, cp)
+
+    def pair_counts(self, variables):
+        """Per-cell counts of the rows where both variables of each pair are present"""
+        return self._pairwise(list(variables))[0]
+
+    def count(self, var=None):
+        """Rows per cell, or the rows where var is present"""
+        return self.moments['n'] if var is None else self.moments[_count_column(var)].rename(var)
+
+    def mean(self, var):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.Series(self._column(var) / self._column(_count_column(var)), index=self.moments.index,
+                             name=var)
+
+    def std(self, var):
+        cov = self.covariance([var])
+        # Rounding can leave a constant cell slightly below zero
+        return pd.Series(np.sqrt(np.maximum(cov[:, 0, 0], 0)), index=self.moments.index, name=var)
+
+    def quantile(self, var, q):
+        tally = self.tallies[var]
+        result = []
+        for cell in self.moments.index:
+            counts = tally.loc[cell] if self.keys else tally
+            result.append(_quantile_from_tally(counts.index.to_numpy(dtype=float), counts.to_numpy(), q))
+        return pd.Series(result, index=self.moments.index, name=var)
+
+    def minimum(self, var):
+        return self.quantile(var, 0.0)
+
+    def maximum(self, var):
+        return self.quantile(var, 1.0)
+
+    def describe(self, var, stats=('mean', 'std', 'median', 'min', 'max')):
+        """Per-cell summary table with the same columns as DataFrame.agg"""
+        funcs = {'count': lambda: self.count(var), 'mean': lambda: self.mean(var), 'std': lambda: self.std(var),
+                 'median': lambda: self.quantile(var, 0.5),
+                 'min': lambda: self.minimum(var), 'max': lambda: self.maximum(var)}
+        return pd.DataFrame({stat: funcs[stat]() for stat in stats})
+
+    def overall_describe(self, var):
+        """Pooled summary with the same layout as Series.describe"""
+        pooled = self.collapse()
+        values = {'count': float(pooled.count(var).iloc[0]),
+                  'mean': pooled.mean(var).iloc[0],
+                  'std': pooled.std(var).iloc[0],
+                  'min': pooled.minimum(var).iloc[0]}
+        for q in (0.25, 0.5, 0.75):
+            values[f"{q:.0%}"] = pooled.quantile(var, q).iloc[0]
+        values['max'] = pooled.maximum(var).iloc[0]
+        return pd.Series(values, name=var)
+
+    def engagement_counts(self):
+        counts = self.moments[[f"rating_{level}" for level in ENGAGEMENT_LEVELS]].copy()
+        counts.columns = pd.Index(ENGAGEMENT_LEVELS, name='rating')
+        return counts
+
+    def rating_counts(self):
+        """Pooled engagement counts, ordered like Series.value_counts"""
+        counts = self.collapse().engagement_counts().iloc[0]
+        return counts.sort_values(ascending=False, kind='stable').rename('count')
+
+    def zero_share(self):
+        share = self.moments['zero_donation'] / self.moments['n']
+        return share.rename('donation_amount')
+
+    def cronbach_alpha(self, items=PERSUASIVENESS_ITEMS):
+        """Per-cell Cronbach's alpha from the item covariance matrices"""
+        return self.reliability(items)['cronbach_alpha']
+
+    def item_covariance(self, items=PERSUASIVENESS_ITEMS):
+        """Per-cell item covariances; NaN for cells with too few rows (n < items + 1) to estimate reliability"""
+        items = list(items)
+        cov = self.covariance(items)
+        cov[self.pair_counts(items).min(axis=(1, 2)) < len(items) + 1] = np.nan
+        return cov
+
+    def reliability(self, items=PERSUASIVENESS_ITEMS):
+        """Per-cell alpha and omega from the item covariance matrices, computed once per item set"""
+        import reliability
+        key = ('reliability', tuple(items))
+        if key not in self._derived:
+            self._derived[key] = reliability.reliability_table(self.item_covariance(items), self.moments.index)
+        return self._derived[key]
+
+    def item_reliability(self, items=PERSUASIVENESS_ITEMS):
+        """Pooled item-total correlations, alpha-if-deleted and loadings"""
+        import reliability
+        key = ('items', tuple(items))
+        if key not in self._derived:
+            self._derived[key] = reliability.item_table(self.collapse().item_covariance(items)[0], items)
+        return self._derived[key]
+
+    def correlations(self, variables=CORRELATION_VARS):
+        """Pooled Pearson correlation matrix over pairwise complete rows, as DataFrame.corr"""
+        n, s, q, cp = self.collapse()._pairwise(list(variables))
+        cov = self._centered(n, s, cp)[0]
+        # A constant variable (common in small segments) has no correlation: NaN, without a warning
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # var[i, j]: variance of variable i over the rows where j is present as well
+            var = ((q - s ** 2 / n) / np.where(n > 1, n - 1, np.nan))[0]
+            return pd.DataFrame(cov / np.sqrt(var * var.T), index=variables, columns=variables)
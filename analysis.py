@@ -1,17 +1,46 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import scipy.stats as stats
-import pingouin as pg
 import os
+import argparse
+import subprocess
+import sys
 
-# Set style
-sns.set_theme(style="whitegrid")
+# Each subcommand imports only what it needs, so starting the CLI costs no pandas/matplotlib.
+# Modules behind every subcommand, and their import-time budgets in seconds (`analysis.py imports`)
+COMMAND_MODULES = {
+    'describe': ['aggregate', 'data_cache', 'compact', 'streaming', 'incremental'],
+    'plot': ['aggregate', 'data_cache', 'compact', 'streaming', 'incremental', 'plotting'],
+    'reliability': ['aggregate', 'data_cache', 'compact', 'streaming', 'incremental', 'reliability'],
+    'summary': ['aggregate', 'data_cache', 'compact', 'streaming', 'incremental', 'reliability'],
+    'slice': ['aggregate', 'data_cache', 'indexed'],
+    'segments': ['aggregate', 'data_cache', 'indexed', 'segments'],
+    'all': ['aggregate', 'data_cache', 'compact', 'streaming', 'incremental', 'reliability', 'plotting',
+            'instrumentation'],
+}
+IMPORT_BUDGETS = {'cli': 0.1, 'describe': 1.0, 'plot': 1.0, 'reliability': 1.0, 'summary': 1.0, 'slice': 1.0,
+                  'segments': 1.0, 'all': 1.2}
+# Never imported in this process; the figures import them in the plotting workers
+DEFERRED_MODULES = ['matplotlib', 'seaborn', 'scipy', 'pingouin']
+# Subcommands `analysis.py imports` runs for real, checking sys.modules afterwards; {tmp} is a scratch directory
+CHECKED_RUNS = {
+    'describe': ['describe'],
+    'plot': ['plot', '--out-dir', '{tmp}'],
+    'reliability': ['reliability'],
+    'summary': ['summary', '--output', os.path.join('{tmp}', 'analysis_summary.md')],
+    'slice': ['slice'],
+}
 
-def load_and_preprocess(filepath):
+def load_and_preprocess(filepath, use_cache=True, compact=True):
+    import data_cache
     print(f"Loading data from {filepath}...")
-    df = pd.read_csv(filepath)
+    if use_cache:
+        # Typed columnar cache keyed on the file hash; post_text is kept in data_cache.load_posts
+        df = data_cache.load_cached(filepath)
+    else:
+        df = data_cache.read_source(filepath)
+    if compact:
+        # Categorical labels, downcast integers (int8 Likert items) and float32 only for floats that survive it
+        # exactly, so donation_amount stays float64 (python compact.py prints the savings)
+        import compact as compact_table
+        df = compact_table.compact_frame(df)
     
     # Check for duplicates
     duplicates = df.duplicated(subset=['participant_id', 'post_id'])
@@ -24,151 +53,306 @@ def load_and_preprocess(filepath):
     # Compute persuasiveness composite score
     persuasiveness_cols = ['persuasiveness_1', 'persuasiveness_2', 'persuasiveness_3']
     df['persuasiveness'] = df[persuasiveness_cols].mean(axis=1)
-    
-    # Calculate Cronbach's alpha
-    alpha = pg.cronbach_alpha(data=df[persuasiveness_cols])
-    print(f"Cronbach's alpha for persuasiveness: {alpha[0]:.3f}")
+    # Reliability is derived from the per-cell item covariances in analyze_descriptive
     
     return df
 
-def analyze_descriptive(df):
+def analyze_descriptive(df, cell_stats=None):
+    import aggregate
     print("\n--- Descriptive Statistics ---")
     
+    # All per-cell statistics come from one grouped pass; the markdown writer reuses the result
+    if cell_stats is None:
+        cell_stats = aggregate.CellStats.from_frame(df)
+
+    # Reliability from the cached item covariances; write_summary reuses the tables
+    pooled = cell_stats.collapse()
+    print(f"Cronbach's alpha for persuasiveness: {pooled.cronbach_alpha().iloc[0]:.3f}")
+    print("\nPersuasiveness Reliability by Gender and Content Source:")
+    print(cell_stats.reliability())
+    
     # Engagement
     print("\nEngagement Distribution by Gender and Content Source:")
-    engagement_counts = df.groupby(['gender', 'content_source', 'rating']).size().unstack(fill_value=0)
-    print(engagement_counts)
+    print(cell_stats.engagement_counts())
     
     # Persuasiveness
     print("\nPersuasiveness Stats by Gender and Content Source:")
-    pers_stats = df.groupby(['gender', 'content_source'])['persuasiveness'].agg(['mean', 'std', 'median', 'min', 'max'])
-    print(pers_stats)
+    print(cell_stats.describe('persuasiveness'))
     
     # Donation Amount
     print("\nDonation Amount Stats by Gender and Content Source:")
-    don_stats = df.groupby(['gender', 'content_source'])['donation_amount'].agg(['mean', 'std', 'median', 'min', 'max'])
-    print(don_stats)
+    print(cell_stats.describe('donation_amount'))
     
     # Zero Donations
     print("\nProportion of Zero Donations:")
-    zero_donations = df.groupby(['gender', 'content_source'])['donation_amount'].apply(lambda x: (x == 0).mean())
-    print(zero_donations)
+    print(cell_stats.zero_share())
 
     # Overall Stats
     print("\n--- Overall Statistics ---")
     print("Engagement Overall:")
-    print(df['rating'].value_counts())
+    print(cell_stats.rating_counts())
     print("\nPersuasiveness Overall:")
-    print(df['persuasiveness'].describe())
+    print(cell_stats.overall_describe('persuasiveness'))
     print("\nDonation Amount Overall:")
-    print(df['donation_amount'].describe())
+    print(cell_stats.overall_describe('donation_amount'))
     print("\nZero Donations Overall:")
-    print((df['donation_amount'] == 0).mean())
+    print(pooled.zero_share().iloc[0])
     
-    # Correlations
+    # Correlations (engagement coded Dislike=1, Neutral=2, Like=3)
     print("\nCorrelations:")
-    # Map engagement to numeric for correlation check (Dislike=1, Neutral=2, Like=3)
-    engagement_map = {'Dislike': 1, 'Neutral': 2, 'Like': 3}
-    df['engagement_numeric'] = df['rating'].map(engagement_map)
-    
-    corrs = df[['engagement_numeric', 'persuasiveness', 'donation_amount']].corr()
-    print(corrs)
+    print(cell_stats.correlations())
     
-    return pers_stats, don_stats
+    return cell_stats
 
-def generate_visualizations(df):
+def generate_visualizations(cell_stats, workers=None, out_dir='.'):
+    import plotting
     print("\nGenerating visualizations...")
-    
-    # 1. Engagement Bar Chart (Gender x Content Source)
-    plt.figure(figsize=(10, 6))
-    g = sns.catplot(
-        data=df, kind="count",
-        x="rating", hue="content_source", col="gender",
-        palette="viridis", height=5, aspect=1
-    )
-    g.set_axis_labels("Engagement Rating", "Count")
-    g.set_titles("{col_name}")
-    plt.savefig('engagement_distribution.png')
-    plt.close()
-    
-    # 2. Persuasiveness Box Plot (4 conditions)
-    plt.figure(figsize=(10, 6))
-    sns.boxplot(data=df, x='gender', y='persuasiveness', hue='content_source', palette='Set2')
-    plt.title('Persuasiveness Scores by Gender and Content Source')
-    plt.savefig('persuasiveness_boxplot.png')
-    plt.close()
-
-    # 3. Donation Means Bar Chart (Gender x Content Source)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(data=df, x='gender', y='donation_amount', hue='content_source', palette='Set2', errorbar='ci')
-    plt.title('Mean Donation Amount by Gender and Content Source')
-    plt.ylabel('Mean Donation Amount ($)')
-    plt.savefig('donation_means.png')
-    plt.close()
-
-    # 3b. Donation Histogram (for Zero-Inflation check)
-    g = sns.FacetGrid(df, col="gender", row="content_source", margin_titles=True, height=4, aspect=1.5)
-    g.map(sns.histplot, "donation_amount", bins=20)
-    plt.savefig('donation_histogram.png')
-    plt.close()
-    
-    # 4. Normality Checks for Persuasiveness
-    # Histogram
-    plt.figure(figsize=(8, 6))
-    sns.histplot(df['persuasiveness'], kde=True)
-    plt.title('Distribution of Persuasiveness Scores')
-    plt.savefig('persuasiveness_histogram.png')
-    plt.close()
-    
-    # Q-Q Plot
-    plt.figure(figsize=(8, 6))
-    stats.probplot(df['persuasiveness'], dist="norm", plot=plt)
-    plt.title('Q-Q Plot of Persuasiveness Scores')
-    plt.savefig('persuasiveness_qqplot.png')
-    plt.close()
-    
+    # Figures are drawn from per-cell summaries, so they need no raw rows
+    plotting.render_figures(cell_stats, out_dir=out_dir, workers=workers)
     print("Visualizations saved.")
 
-def main():
-    filepath = 'Data_LongFormat.csv'
-    if not os.path.exists(filepath):
-        print(f"Error: {filepath} not found.")
-        return
-
-    df = load_and_preprocess(filepath)
-    analyze_descriptive(df)
-    generate_visualizations(df)
-    
+def write_summary(cell_stats, path='analysis_summary.md'):
     # Save summary to markdown
-    with open('analysis_summary.md', 'w') as f:
+    with open(path, 'w') as f:
         f.write("# Analysis Summary\n\n")
         f.write("## Reliability\n")
-        alpha = pg.cronbach_alpha(data=df[['persuasiveness_1', 'persuasiveness_2', 'persuasiveness_3']])
-        f.write(f"Cronbach's alpha for persuasiveness: {alpha[0]:.3f}\n\n")
+        pooled = cell_stats.collapse()
+        alpha = pooled.cronbach_alpha().iloc[0]
+        f.write(f"Cronbach's alpha for persuasiveness: {alpha:.3f}\n")
+        f.write(f"McDonald's omega for persuasiveness: {pooled.reliability()['mcdonald_omega'].iloc[0]:.3f}\n\n")
+        f.write(cell_stats.reliability().to_markdown() + "\n\n")
+        f.write(cell_stats.item_reliability().to_markdown() + "\n\n")
         
         f.write("## Descriptive Statistics\n\n")
         
         f.write("### Engagement (Counts)\n")
-        engagement_counts = df.groupby(['gender', 'content_source', 'rating']).size().unstack(fill_value=0).to_markdown()
-        f.write(engagement_counts + "\n\n")
+        f.write(cell_stats.engagement_counts().to_markdown() + "\n\n")
 
         f.write("### Persuasiveness\n")
-        pers_stats = df.groupby(['gender', 'content_source'])['persuasiveness'].agg(['mean', 'std']).to_markdown()
-        f.write(pers_stats + "\n\n")
+        f.write(cell_stats.describe('persuasiveness', ['mean', 'std']).to_markdown() + "\n\n")
         
         f.write("### Donation Amount\n")
-        don_stats = df.groupby(['gender', 'content_source'])['donation_amount'].agg(['mean', 'std']).to_markdown()
-        f.write(don_stats + "\n\n")
+        f.write(cell_stats.describe('donation_amount', ['mean', 'std']).to_markdown() + "\n\n")
         
         f.write("### Zero Donations\n")
-        zero_don = df.groupby(['gender', 'content_source'])['donation_amount'].apply(lambda x: (x == 0).mean()).to_markdown()
-        f.write(zero_don + "\n\n")
+        f.write(cell_stats.zero_share().to_markdown() + "\n\n")
         
         f.write("## Correlations\n")
-        engagement_map = {'Dislike': 1, 'Neutral': 2, 'Like': 3}
-        df['engagement_numeric'] = df['rating'].map(engagement_map)
-        corrs = df[['engagement_numeric', 'persuasiveness', 'donation_amount']].corr().to_markdown()
-        f.write(corrs + "\n\n")
+        f.write(cell_stats.correlations().to_markdown() + "\n\n")
+
+def load_cell_stats(filepath, chunksize=None, incremental=False):
+    """Per-cell statistics of filepath: persisted and refreshed, streamed, or from the cached table"""
+    if incremental:
+        # Fold only rows appended since the last run into the persisted statistics
+        import incremental as incremental_stats
+        import streaming
+        return incremental_stats.refresh(filepath, chunksize=chunksize or streaming.DEFAULT_CHUNKSIZE).cell_stats
+    if chunksize:
+        # Bounded-memory mode: only the mergeable accumulators are kept
+        import streaming
+        return streaming.scan_csv(filepath, chunksize=chunksize).cell_stats
+    import aggregate
+    return aggregate.CellStats.from_frame(load_and_preprocess(filepath))
+
+def print_reliability(cell_stats, filepath=None, n_boot=0):
+    print("\n--- Reliability (persuasiveness) ---")
+    print(cell_stats.collapse().reliability())
+    print(cell_stats.reliability())
+    print(cell_stats.item_reliability())
+    if n_boot:
+        # Intervals need participant-level moments, so they read the cached rows once
+        import aggregate
+        import data_cache
+        import reliability
+        df = data_cache.load_cached(filepath)
+        print(f"\nParticipant cluster bootstrap ({n_boot} replicates, 95% CI):")
+        print(reliability.bootstrap_ci(df, n_boot=n_boot))
+        print(reliability.bootstrap_ci(df, aggregate.CELL_KEYS, n_boot=n_boot))
+
+def print_slice(filepath, where=(), by=None):
+    """Descriptives of the rows matching where (KEY=VALUE[,VALUE...]), grouped by the keys in by"""
+    import aggregate
+    import indexed
+    import pandas as pd
+    # Group row lists and per-cell aggregates are built once; slices and regroupings reuse them
+    data = indexed.load_indexed(filepath)
+    filters = {}
+    for item in where:
+        key, _, values = item.partition('=')
+        if key not in data.index:
+            raise SystemExit(f"Unknown key {key!r}; indexed keys: {', '.join(data.keys)}")
+        filters[key] = list(pd.Index(values.split(',')).astype(data.index[key].labels.dtype))
+    cell_stats = data.stats(by or aggregate.CELL_KEYS, **filters)
+    print(f"\n--- {len(data.rows(**filters))} rows" + (f" where {' and '.join(where)}" if where else '') + " ---")
+    print(pd.DataFrame({'n': cell_stats.count(),
+                        'persuasiveness_mean': cell_stats.mean('persuasiveness'),
+                        'persuasiveness_std': cell_stats.std('persuasiveness'),
+                        'donation_mean': cell_stats.mean('donation_amount'),
+                        'donation_std': cell_stats.std('donation_amount'),
+                        'zero_donation_share': cell_stats.zero_share()}).to_string(float_format='{:.3f}'.format))
+
+def write_segments(filepath, keys=None, out_dir=os.path.join('reports', 'segments'), figures=True, workers=None):
+    """One report per segment value and an index, all from one indexed load of filepath"""
+    import aggregate
+    import indexed
+    import segments
+    keys = keys or segments.SEGMENT_KEYS
+    # The cells of every segment key are computed in one grouped pass and split per value
+    data = indexed.load_indexed(filepath, list(dict.fromkeys(list(keys) + aggregate.CELL_KEYS)))
+    path = segments.write_segment_reports(data.cells, keys, out_dir, figures, workers)
+    print(f"Segment index saved to {path}.")
+
+def main(chunksize=None, incremental=False, trace_memory=False, cprofile=False, report_path='analysis_run.json'):
+    import data_cache
+    import instrumentation
+    filepath = 'Data_LongFormat.csv'
+    if not os.path.exists(filepath):
+        print(f"Error: {filepath} not found.")
+        return
+
+    # Per-stage timings and memory go to a JSON run report next to analysis_summary.md
+    run = instrumentation.Instrumentation(trace_memory=trace_memory, cprofile=cprofile,
+                                          profile_dir=os.path.join(data_cache.CACHE_DIR, 'profiles'))
+    if incremental:
+        with run.stage('incremental_refresh'):
+            cell_stats = load_cell_stats(filepath, chunksize, incremental=True)
+        if cell_stats is None:
+            print("No complete rows to summarize yet.")
+            return
+    elif chunksize:
+        with run.stage('scan_csv'):
+            cell_stats = load_cell_stats(filepath, chunksize)
+        with run.stage('analyze_descriptive'):
+            cell_stats = analyze_descriptive(None, cell_stats)
+    else:
+        with run.stage('load_and_preprocess'):
+            df = load_and_preprocess(filepath)
+        with run.stage('analyze_descriptive'):
+            cell_stats = analyze_descriptive(df)
+    with run.stage('generate_visualizations'):
+        generate_visualizations(cell_stats)
+    with run.stage('write_summary'):
+        write_summary(cell_stats)
+    mode = 'incremental' if incremental else 'streaming' if chunksize else 'in-memory'
+    run.write(report_path, source=filepath, mode=mode, chunksize=chunksize)
+    print(f"Run report saved to {report_path}.")
+
+def import_times(commands=None):
+    """{'cli' or subcommand: (seconds, deferred modules loaded)}, each timed in a fresh interpreter"""
+    probe = ("import sys, time; start = time.perf_counter(); import analysis, importlib; "
+             "[importlib.import_module(m) for m in sys.argv[1:]]; elapsed = time.perf_counter() - start; "
+             f"print(elapsed, *[m for m in {DEFERRED_MODULES!r} if m in sys.modules])")
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = {}
+    for command in ['cli'] + list(commands or COMMAND_MODULES):
+        modules = [] if command == 'cli' else COMMAND_MODULES[command]
+        output = subprocess.run([sys.executable, '-c', probe] + modules, cwd=here, capture_output=True,
+                                text=True, check=True).stdout.split()
+        times[command] = (float(output[0]), output[1:])
+    return times
+
+def deferred_after_run(commands=None):
+    """{subcommand: deferred modules in sys.modules after running it}, each run in a fresh interpreter"""
+    import tempfile
+    probe = ("import contextlib, io, runpy, sys\n"
+             "sys.argv = ['analysis.py'] + sys.argv[1:]\n"
+             "with contextlib.redirect_stdout(io.StringIO()):\n"
+             "    runpy.run_path('analysis.py', run_name='__main__')\n"
+             f"print(*[m for m in {DEFERRED_MODULES!r} if m in sys.modules])")
+    here = os.path.dirname(os.path.abspath(__file__))
+    loaded = {}
+    for command in commands or CHECKED_RUNS:
+        with tempfile.TemporaryDirectory() as tmp:
+            argv = [arg.format(tmp=tmp) for arg in CHECKED_RUNS[command]]
+            loaded[command] = subprocess.run([sys.executable, '-c', probe] + argv, cwd=here, capture_output=True,
+                                             text=True, check=True).stdout.split()
+    return loaded
+
+def check_import_budgets(budgets=IMPORT_BUDGETS, scale=1.0):
+    """Print import time per subcommand; returns False if one is over budget or loads a deferred module,
+    on import or while running"""
+    ok = True
+    after_run = deferred_after_run()
+    for command, (seconds, deferred) in import_times().items():
+        over = seconds > budgets[command] * scale
+        ran = after_run.get(command, [])
+        ok = ok and not over and not deferred and not ran
+        flags = ((' OVER BUDGET' if over else '') + (f" imports {', '.join(deferred)}" if deferred else '') +
+                 (f" loads {', '.join(ran)} when run" if ran else ''))
+        print(f"{command:<12}{seconds:>7.3f} s  (budget {budgets[command] * scale:.2f} s){flags}")
+    return ok
+
+COMMANDS = ['all', 'describe', 'plot', 'reliability', 'summary', 'slice', 'segments', 'imports']
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Descriptive analysis of Data_LongFormat.csv")
+    subparsers = parser.add_subparsers(dest='command')
+    # Options shared by every subcommand that reads the data
+    data = argparse.ArgumentParser(add_help=False)
+    data.add_argument('--chunksize', type=int, default=None,
+                      help="stream the CSV in blocks of this many rows instead of loading it whole")
+    data.add_argument('--incremental', action='store_true',
+                      help="only fold in rows appended since the last run")
+    run_all = subparsers.add_parser('all', parents=[data],
+                                    help="descriptives, figures, analysis_summary.md and the run report (default)")
+    run_all.add_argument('--trace-memory', action='store_true',
+                         help="add per-stage tracemalloc snapshots (several times slower)")
+    run_all.add_argument('--cprofile', action='store_true',
+                         help="profile each stage with cProfile; dumps go to .cache/profiles/")
+    run_all.add_argument('--report', default='analysis_run.json', help="path of the JSON run report")
+    subparsers.add_parser('describe', parents=[data], help="print the descriptive statistics")
+    plot = subparsers.add_parser('plot', parents=[data], help="render the descriptive figures")
+    plot.add_argument('--out-dir', default='.')
+    plot.add_argument('--workers', type=int, default=None)
+    reliability_parser = subparsers.add_parser('reliability', parents=[data],
+                                               help="alpha, omega and item statistics of persuasiveness")
+    reliability_parser.add_argument('--bootstrap', type=int, default=0, metavar='N',
+                                    help="add participant cluster bootstrap intervals with N replicates")
+    summary_parser = subparsers.add_parser('summary', parents=[data], help="write analysis_summary.md")
+    summary_parser.add_argument('--output', default='analysis_summary.md')
+    slice_parser = subparsers.add_parser('slice', help="descriptives of a slice of the rows by any indexed keys")
+    slice_parser.add_argument('--where', nargs='*', default=[], metavar='KEY=VALUE[,VALUE]',
+                              help="keep rows with one of the values of each key, e.g. charity_id=... gender=Male")
+    slice_parser.add_argument('--by', nargs='*', default=None, metavar='KEY',
+                              help="group the slice by these keys (default: gender content_source)")
+    segments_parser = subparsers.add_parser('segments',
+                                            help="analysis_summary.md and figures for every charity, cluster and "
+                                                 "personalization type, plus an index")
+    segments_parser.add_argument('--keys', nargs='*', default=None, metavar='KEY',
+                                 help="segment keys (default: charity_id cluster_id personalization_type)")
+    segments_parser.add_argument('--out-dir', default=os.path.join('reports', 'segments'))
+    segments_parser.add_argument('--no-figures', action='store_true', help="only write the markdown reports")
+    segments_parser.add_argument('--workers', type=int, default=None)
+    imports = subparsers.add_parser('imports', help="check the import time of every subcommand against its budget")
+    imports.add_argument('--scale', type=float, default=1.0, help="multiply the budgets (slow machines)")
+
+    # Without a subcommand the full run is the default, as before the subcommands existed
+    argv = sys.argv[1:]
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['all'] + argv
+    args = parser.parse_args(argv)
+    filepath = 'Data_LongFormat.csv'
+    if args.command == 'imports':
+        sys.exit(0 if check_import_budgets(scale=args.scale) else 1)
+    elif args.command == 'all':
+        main(chunksize=args.chunksize, incremental=args.incremental, trace_memory=args.trace_memory,
+             cprofile=args.cprofile, report_path=args.report)
+    elif not os.path.exists(filepath):
+        print(f"Error: {filepath} not found.")
+    elif args.command == 'slice':
+        print_slice(filepath, args.where, args.by)
+    elif args.command == 'segments':
+        write_segments(filepath, args.keys, args.out_dir, not args.no_figures, args.workers)
+    else:
+        cell_stats = load_cell_stats(filepath, args.chunksize, args.incremental)
+        if cell_stats is None:
+            print("No complete rows to summarize yet.")
+        elif args.command == 'describe':
+            analyze_descriptive(None, cell_stats)
+        elif args.command == 'plot':
+            generate_visualizations(cell_stats, workers=args.workers, out_dir=args.out_dir)
+        elif args.command == 'reliability':
+            print_reliability(cell_stats, filepath, args.bootstrap)
+        elif args.command == 'summary':
+            write_summary(cell_stats, args.output)
+            print(f"Summary saved to {args.output}.")
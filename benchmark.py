@@ -0,0 +1,165 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import analysis
+import data_cache
+import instrumentation
+import models
+import synthetic
+
+BENCH_DIR = os.path.join(data_cache.CACHE_DIR, 'bench')
+DEFAULT_SCALES = synthetic.SCALES[:3]
+# A stage is flagged when it is this much slower than in the baseline
+DEFAULT_TOLERANCE = 1.25
+# Differences below this many seconds are timer noise
+MIN_SECONDS = 0.05
+
+# Model fits timed at each scale: name -> (fit, largest scale it runs at)
+MODELS = {
+    'fit_lmm': (lambda df: models.fit_lmm(df, 'persuasiveness', models.INTERACTION), None),
+    # The Laplace GLMMs (the hurdle zero part and the clmm) refit row-level weights every evaluation;
+    # at 100k rows each takes about half a minute
+    'fit_hurdle': (lambda df: models.fit_hurdle(df, models.INTERACTION), 100_000),
+    'fit_clmm': (lambda df: models.fit_clmm(df, 'rating', models.INTERACTION), 100_000),
+}
+
+
+@contextlib.contextmanager
+def _stage(run, name):
+    # The analysis functions report on stdout; keep the benchmark output to the table
+    with run.stage(name), contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def run_scale(n_rows, workdir=BENCH_DIR, seed=0, model_names=None, keep=False):
+    """Time every pipeline stage on n_rows synthetic rows; returns the stage records"""
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, f"synthetic_{n_rows}.csv")
+    run = instrumentation.Instrumentation(trace_memory=False)
+    with _stage(run, 'generate'):
+        df = synthetic.generate(n_rows, seed=seed)
+    with _stage(run, 'write_csv'):
+        synthetic.write_csv(df, path)
+    del df
+
+    # The first load converts the CSV to the columnar cache, the second reads the cache
+    with _stage(run, 'load_and_preprocess (cold)'):
+        analysis.load_and_preprocess(path)
+    with _stage(run, 'load_and_preprocess'):
+        df = analysis.load_and_preprocess(path)
+    with _stage(run, 'analyze_descriptive'):
+        cell_stats = analysis.analyze_descriptive(df)
+    with _stage(run, 'generate_visualizations'):
+        analysis.generate_visualizations(cell_stats, out_dir=workdir)
+    with _stage(run, 'write_summary'):
+        analysis.write_summary(cell_stats, os.path.join(workdir, 'analysis_summary.md'))
+    for name in MODELS if model_names is None else model_names:
+        fit, max_rows = MODELS[name]
+        if max_rows is None or n_rows <= max_rows:
+            with _stage(run, name):
+                fit(df)
+        else:
+            print(f"  {name} not timed: above its {max_rows:,}-row cap")
+
+    if not keep:
+        for file in (path,) + data_cache.cache_paths(path):
+            if os.path.exists(file):
+                os.remove(file)
+    for record in run.stages:
+        record['rows_per_second'] = n_rows / record['seconds'] if record['seconds'] > 0 else None
+    return run.stages
+
+
+def scaling_exponents(results):
+    """Slope of log(seconds) on log(rows) per stage; about 1 is linear scaling"""
+    points = {}
+    for n_rows, stages in results.items():
+        for record in stages:
+            points.setdefault(record['name'], []).append((int(n_rows), record['seconds']))
+    return {name: float(np.polyfit(np.log([n for n, _ in pts]), np.log([s for _, s in pts]), 1)[0])
+            for name, pts in points.items() if len(pts) > 1 and min(s for _, s in pts) > 0}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """(scale, stage, baseline seconds, seconds) for stages slower than tolerance x the baseline"""
+    regressions = []
+    for n_rows, stages in results.items():
+        before = {record['name']: record for record in baseline.get('scales', {}).get(str(n_rows), [])}
+        for record in stages:
+            old = before.get(record['name'])
+            if old and record['seconds'] > tolerance * old['seconds'] and \
+                    record['seconds'] - old['seconds'] > MIN_SECONDS:
+                regressions.append((n_rows, record['name'], old['seconds'], record['seconds']))
+    return regressions
+
+
+def print_table(results, exponents):
+    print(f"\n{'stage':<28}{'rows':>11}{'seconds':>10}{'rows/s':>12}{'peak MB':>10}")
+    for n_rows, stages in results.items():
+        for record in stages:
+            print(f"{record['name']:<28}{int(n_rows):>11,}{record['seconds']:>10.2f}"
+                  f"{record['rows_per_second'] or 0:>12,.0f}{record['peak_rss_mb']:>10.0f}")
+    if exponents:
+        print("\nScaling exponents (seconds ~ rows^k):")
+        for name, k in exponents.items():
+            print(f"  {name:<28}{k:.2f}")
+
+
+def main(scales=DEFAULT_SCALES, output='benchmark_results.json', baseline=None, tolerance=DEFAULT_TOLERANCE,
+         seed=0, model_names=None, keep=False):
+    """Run the benchmark at every scale and write the results; returns the regressions against baseline"""
+    started, start = datetime.now(timezone.utc), time.perf_counter()
+    results = {}
+    for n_rows in scales:
+        print(f"Benchmarking {n_rows:,} rows...")
+        results[str(n_rows)] = run_scale(n_rows, seed=seed, model_names=model_names, keep=keep)
+    if not keep:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)
+    exponents = scaling_exponents(results)
+    print_table(results, exponents)
+
+    report = {'version': instrumentation.REPORT_VERSION, 'started': started.isoformat(),
+              'seconds': time.perf_counter() - start, **instrumentation.run_metadata(), 'seed': seed,
+              'scales': results, 'scaling_exponents': exponents,
+              'model_row_caps': {name: max_rows for name, (_, max_rows) in MODELS.items()}}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\nBenchmark results saved to {output}.")
+
+    regressions = []
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        for n_rows, name, before, now in regressions:
+            print(f"REGRESSION {name} at {int(n_rows):,} rows: {before:.2f} s -> {now:.2f} s")
+        if not regressions:
+            print(f"No stage slower than {tolerance:.2f}x {baseline}.")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Time the analysis pipeline on synthetic data at several scales")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help=f"row counts (default: {' '.join(map(str, DEFAULT_SCALES))}; "
+                             f"{synthetic.SCALES[-1]} is supported but slow)")
+    parser.add_argument('--models', nargs='*', choices=list(MODELS), default=None,
+                        help="model fits to time (default: all; pass no names to skip)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help="earlier results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true',
+                        help="keep the synthetic CSVs (.cache/bench/) and their columnar caches")
+    args = parser.parse_args()
+    found = main(scales=args.scales, output=args.output, baseline=args.baseline, tolerance=args.tolerance,
+                 seed=args.seed, model_names=args.models, keep=args.keep)
+    sys.exit(1 if found else 0)
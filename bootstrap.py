@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import aggregate
+
+DEFAULT_N_BOOT = 2000
+# Upper bound on the dense replicate buffers of one chunk
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+# Cell statistics: name -> per-row value whose cell mean is bootstrapped
+OUTCOMES = ['persuasiveness', 'donation_amount', 'zero_donation']
+
+# Reference levels as in the R models
+GENDER_LEVELS = ['Male', 'Female']
+SOURCE_LEVELS = ['Human', 'LLM']
+
+
+class ClusterDesign:
+    """Per-cell outcome sums arranged as sparse participant x post matrices.
+
+    With participant weights u and post weights v, every weighted cell sum is the
+    bilinear form u' M v, so a replicate never needs a per-row weight vector.
+    """
+
+    def __init__(self, df, keys=aggregate.CELL_KEYS):
+        cell_codes, self.cells = _factorize_cells(df, keys)
+        p_codes, self.participants = pd.factorize(df['participant_id'])
+        q_codes, self.posts = pd.factorize(df['post_id'])
+        n_p, n_q = len(self.participants), len(self.posts)
+
+        if 'persuasiveness' in df.columns:
+            persuasiveness = df['persuasiveness'].to_numpy(dtype=float)
+        else:
+            persuasiveness = df[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1).to_numpy()
+        donation = df['donation_amount'].to_numpy(dtype=float)
+        columns = [np.ones(len(df)), persuasiveness, donation, (donation == 0).astype(float)]
+        self.columns = ['n'] + OUTCOMES
+
+        # Block k = (cell, column) lives in columns [k * n_q, (k + 1) * n_q)
+        blocks = []
+        n_cols = len(self.columns)
+        for j, values in enumerate(columns):
+            block = cell_codes * n_cols + j
+            blocks.append(sp.csr_matrix((values, (p_codes, block * n_q + q_codes)),
+                                        shape=(n_p, len(self.cells) * n_cols * n_q)))
+        self.matrix = sum(blocks[1:], blocks[0]).tocsc()
+        self.n_participants, self.n_posts = n_p, n_q
+
+    @property
+    def n_blocks(self):
+        return len(self.cells) * len(self.columns)
+
+    def weighted_sums(self, u, v):
+        """Cell sums for participant weights u (B x P) and post weights v (B x Q); shape (B, cells, columns)"""
+        projected = (self.matrix.T @ u.T).reshape(self.n_blocks, self.n_posts, len(u))
+        sums = np.einsum('kqb,bq->bk', projected, v)
+        return sums.reshape(len(u), len(self.cells), len(self.columns))
+
+
+def _factorize_cells(df, keys):
+    grouped = df.groupby(list(keys), observed=True, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    cells = pd.MultiIndex.from_tuples(list(grouped.groups), names=list(keys)) if len(keys) > 1 \
+        else pd.Index(list(grouped.groups), name=keys[0])
+    return codes, cells
+
+
+def _cluster_weights(rng, n_clusters, size):
+    # Resampling clusters with replacement = multinomial counts per cluster
+    return rng.multinomial(n_clusters, np.full(n_clusters, 1.0 / n_clusters), size=size).astype(float)
+
+
+def _statistics(design, sums):
+    # sums: (B, cells, columns) -> (B, statistics) of cell means and contrasts
+    n = sums[:, :, 0]
+    means = sums[:, :, 1:] / n[:, :, None]
+    stats = {}
+    for c, cell in enumerate(design.cells):
+        label = ':'.join(map(str, cell)) if isinstance(cell, tuple) else str(cell)
+        for j, outcome in enumerate(OUTCOMES):
+            stats[f"{outcome}[{label}]"] = means[:, c, j]
+    if list(design.cells.names) == ['gender', 'content_source']:
+        lookup = {cell: c for c, cell in enumerate(design.cells)}
+        for j, outcome in enumerate(OUTCOMES):
+            effect = {}
+            for gender in GENDER_LEVELS:
+                if (gender, 'LLM') in lookup and (gender, 'Human') in lookup:
+                    effect[gender] = means[:, lookup[(gender, 'LLM')], j] - means[:, lookup[(gender, 'Human')], j]
+                    stats[f"{outcome}[LLM-Human|{gender}]"] = effect[gender]
+            if len(effect) == 2:
+                stats[f"{outcome}[gender x source]"] = effect['Female'] - effect['Male']
+    return stats
+
+
+def _replicate_chunk(design, seed, size, cluster):
+    rng = np.random.default_rng(seed)
+    u = _cluster_weights(rng, design.n_participants, size) if cluster in ('participant', 'both') \
+        else np.ones((size, design.n_participants))
+    v = _cluster_weights(rng, design.n_posts, size) if cluster in ('post', 'both') \
+        else np.ones((size, design.n_posts))
+    return pd.DataFrame(_statistics(design, design.weighted_sums(u, v)))
+
+
+class BootstrapResult:
+    """Point estimates and bootstrap replicates of the cell statistics"""
+
+    def __init__(self, estimates, replicates):
+        self.estimates = estimates
+        self.replicates = replicates
+
+    def summary(self, level=95):
+        tail = (100 - level) / 2
+        return pd.DataFrame({
+            'estimate': self.estimates,
+            'se': self.replicates.std(ddof=1),
+            'ci_low': self.replicates.quantile(tail / 100),
+            'ci_high': self.replicates.quantile(1 - tail / 100),
+        })
+
+
+def cluster_bootstrap(df, n_boot=DEFAULT_N_BOOT, seed=0, cluster='both', keys=aggregate.CELL_KEYS,
+                      max_bytes=DEFAULT_MAX_BYTES, workers=1):
+    """Two-way (participant x post) cluster bootstrap of cell means, zero shares and contrasts.
+
+    cluster is 'both', 'participant' or 'post'. Replicates are drawn in chunks
+    that keep the dense buffers under max_bytes; each chunk has its own seed
+    from a SeedSequence, so results do not depend on the number of workers.
+    """
+    design = ClusterDesign(df, keys)
+    ones = np.ones((1, design.n_participants)), np.ones((1, design.n_posts))
+    estimates = pd.DataFrame(_statistics(design, design.weighted_sums(*ones))).iloc[0]
+
+    per_replicate = 8 * (design.n_blocks * design.n_posts + design.n_participants + design.n_posts)
+    chunk = max(1, min(n_boot, max_bytes // per_replicate))
+    sizes = [min(chunk, n_boot - start) for start in range(0, n_boot, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers == 1 or len(sizes) == 1:
+        parts = [_replicate_chunk(design, s, size, cluster) for s, size in zip(seeds, sizes)]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_replicate_chunk, design, s, size, cluster) for s, size in zip(seeds, sizes)]
+            parts = [future.result() for future in futures]
+    replicates = pd.concat(parts, ignore_index=True)
+    return BootstrapResult(estimates, replicates)
+
+
+if __name__ == "__main__":
+    import data_cache
+    df = data_cache.load_cached('Data_LongFormat.csv')
+    df['persuasiveness'] = df[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1)
+    result = cluster_bootstrap(df, workers=None)
+    print(result.summary().to_string(float_format='{:.4f}'.format))
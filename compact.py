@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+
+def fits_float32(values):
+    """True if every value survives a round trip through float32 exactly.
+
+    Decimal amounts such as whole cents do not: 0.01 comes back as
+    0.0099999998, which moves values across histogram bin edges.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return np.array_equal(values.astype(np.float32).astype(np.float64), values, equal_nan=True)
+
+
+def compact_column(series, float32=True):
+    """series in its smallest lossless dtype: labels and text as categoricals, integers downcast"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        # Smallest type that holds the observed range: int8 for the Likert items, wider for an out-of-range code
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series):
+        return series.astype(np.float32) if float32 and fits_float32(series) else series
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    # Labels and free text (post_text): integer codes into one copy of each distinct value, held out of the rows
+    return series.astype('category')
+
+
+def compact_frame(df, float32=True):
+    """Copy of df with every column in its compact dtype; every value is unchanged"""
+    return pd.DataFrame({col: compact_column(df[col], float32) for col in df.columns}, index=df.index)
+
+
+def memory_report(before, after):
+    """Bytes per column before and after compaction, with a total row"""
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(deep=True, index=False),
+        'dtype_after': after.dtypes.astype(str).reindex(before.columns),
+        'bytes_after': after.memory_usage(deep=True, index=False).reindex(before.columns),
+    })
+    report.loc['total'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    report['ratio'] = report['bytes_after'] / report['bytes_before']
+    return report
+
+
+def load_compact(filepath='Data_LongFormat.csv', columns=None, float32=True):
+    """Cached row table of filepath in its compact representation"""
+    import data_cache
+    return compact_frame(data_cache.load_cached(filepath, columns=columns), float32)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Bytes per column of the long-format table before and after compaction")
+    parser.add_argument('filepath', nargs='?', default='Data_LongFormat.csv')
+    parser.add_argument('--no-float32', action='store_true', help="keep float64 columns as they are")
+    args = parser.parse_args()
+    # The baseline is the table as pandas reads it: object strings, int64 and float64
+    raw = pd.read_csv(args.filepath)
+    compact = compact_frame(raw, not args.no_float32)
+    report = memory_report(raw, compact)
+    print(report.to_string(formatters={'ratio': '{:.2f}'.format}))
+    print(f"\n{len(raw)} rows: {report.loc['total', 'bytes_before'] / len(raw):.0f} -> "
+          f"{report.loc['total', 'bytes_after'] / len(raw):.0f} bytes per row")
@@ -3,12 +3,22 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import math
 import os
-
-# Create presentation with widescreen dimensions
-prs = Presentation()
-prs.slide_width = Inches(13.333)
-prs.slide_height = Inches(7.5)
+import shutil
+
+DECK_PATH = 'thesis_presentation_v2.pptx'
+SLIDE_WIDTH = 13.333
+SLIDE_HEIGHT = 7.5
+# Images are downscaled to this many pixels per inch of their placement, once, and cached
+IMAGE_DPI = 150
+IMAGE_CACHE_DIR = os.path.join('.cache', 'deck_images')
+IMAGE_CACHE_VERSION = 1
+# Digest of the slide definitions, images and rendering code each deck was last built from
+DECK_RECORD_DIR = os.path.join('.cache', 'decks')
 
 # Color scheme
 DARK_BG = RGBColor(15, 23, 42)       # #0f172a
@@ -19,12 +29,28 @@ LIGHT = RGBColor(248, 250, 252)       # #f8fafc
 GRAY = RGBColor(100, 116, 139)        # #64748b
 GREEN = RGBColor(34, 197, 94)         # #22c55e
 RED = RGBColor(239, 68, 68)           # #ef4444
+PANEL = RGBColor(30, 41, 59)
+PANEL_BLUE = RGBColor(30, 50, 70)
+PANEL_RED = RGBColor(60, 30, 30)
+PANEL_GREEN = RGBColor(20, 60, 40)
+GRID = RGBColor(50, 60, 80)
+
+SHAPES = {'rectangle': MSO_SHAPE.RECTANGLE, 'rounded': MSO_SHAPE.ROUNDED_RECTANGLE, 'oval': MSO_SHAPE.OVAL}
+ALIGN = {'center': PP_ALIGN.CENTER, 'left': PP_ALIGN.LEFT, 'right': PP_ALIGN.RIGHT}
+
+
+def new_presentation():
+    """Empty widescreen presentation"""
+    prs = Presentation()
+    prs.slide_width = Inches(SLIDE_WIDTH)
+    prs.slide_height = Inches(SLIDE_HEIGHT)
+    return prs
 
 def add_dark_slide(prs):
     """Add a blank slide with dark background"""
     blank_layout = prs.slide_layouts[6]  # Blank layout
     slide = prs.slides.add_slide(blank_layout)
-    
+
     # Add dark background shape
     bg = slide.shapes.add_shape(
         MSO_SHAPE.RECTANGLE, 0, 0, prs.slide_width, prs.slide_height
@@ -32,16 +58,17 @@ def add_dark_slide(prs):
     bg.fill.solid()
     bg.fill.fore_color.rgb = DARK_BG
     bg.line.fill.background()
-    
+
     return slide
 
-def add_title_text(slide, text, top, font_size=44, color=LIGHT, bold=True, width=None):
+def add_title_text(slide, text, top, font_size=44, color=LIGHT, bold=True, width=None, left=None):
     """Add a title text box"""
-    left = Inches(0.8)
+    if left is None:
+        left = Inches(0.8)
     if width is None:
         width = Inches(11.7)
     height = Inches(1)
-    
+
     txBox = slide.shapes.add_textbox(left, top, width, height)
     tf = txBox.text_frame
     tf.word_wrap = True
@@ -73,7 +100,7 @@ def add_bullet_point(slide, left, top, number, text, width=Inches(5.5)):
     circle.fill.solid()
     circle.fill.fore_color.rgb = PRIMARY
     circle.line.fill.background()
-    
+
     # Number text
     tf = circle.text_frame
     tf.paragraphs[0].text = str(number)
@@ -81,7 +108,7 @@ def add_bullet_point(slide, left, top, number, text, width=Inches(5.5)):
     tf.paragraphs[0].font.bold = True
     tf.paragraphs[0].font.color.rgb = LIGHT
     tf.paragraphs[0].alignment = PP_ALIGN.CENTER
-    
+
     # Bullet text
     add_body_text(slide, text, left + Inches(0.55), top, width, Inches(0.8), font_size=18)
 
@@ -92,7 +119,7 @@ def add_stat_box(slide, left, top, number, label, width=Inches(3)):
     box.fill.fore_color.rgb = RGBColor(37, 99, 235)
     box.fill.fore_color.brightness = 0.8
     box.line.color.rgb = PRIMARY
-    
+
     # Number
     num_box = slide.shapes.add_textbox(left, top + Inches(0.2), width, Inches(0.7))
     tf = num_box.text_frame
@@ -102,7 +129,7 @@ def add_stat_box(slide, left, top, number, label, width=Inches(3)):
     p.font.bold = True
     p.font.color.rgb = ACCENT
     p.alignment = PP_ALIGN.CENTER
-    
+
     # Label
     label_box = slide.shapes.add_textbox(left, top + Inches(0.9), width, Inches(0.5))
     tf = label_box.text_frame
@@ -112,9 +139,20 @@ def add_stat_box(slide, left, top, number, label, width=Inches(3)):
     p.font.color.rgb = GRAY
     p.alignment = PP_ALIGN.CENTER
 
+def add_box(slide, left, top, width, height, fill, line=None, shape='rectangle'):
+    """Add a filled shape; no line color means no outline"""
+    box = slide.shapes.add_shape(SHAPES[shape], left, top, width, height)
+    box.fill.solid()
+    box.fill.fore_color.rgb = fill
+    if line is None:
+        box.line.fill.background()
+    else:
+        box.line.color.rgb = line
+    return box
+
 def add_image_placeholder(slide, left, top, width, height, image_path):
     """Add an image if it exists, otherwise add a placeholder"""
-    if os.path.exists(image_path):
+    if image_path and os.path.exists(image_path):
         slide.shapes.add_picture(image_path, left, top, width, height)
     else:
         box = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
@@ -122,438 +160,559 @@ def add_image_placeholder(slide, left, top, width, height, image_path):
         box.fill.fore_color.rgb = RGBColor(30, 41, 59)
         box.line.color.rgb = PRIMARY
 
-# ============== SLIDE 1: Title ==============
-slide = add_dark_slide(prs)
-
-# Main title
-title = add_title_text(slide, 
-    "Gender Differences in Responses to\nLLM-Generated vs Human-Written\nDonation Appeals",
-    Inches(1.5), font_size=44)
-title.text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-
-# Subtitle
-sub = add_body_text(slide, "A Multi-factorial Analysis of Digital Charitable Giving",
-    Inches(0.8), Inches(3.3), Inches(11.7), Inches(0.5), font_size=24, color=ACCENT)
-sub.text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-
-# Author info
-info = add_body_text(slide, 
-    "Salah-din Mrait\nBachelor End Project • Data Science Joint Degree\nTilburg University — Eindhoven University of Technology\n\nSupervisor: John Caffier\nJanuary 2026",
-    Inches(0.8), Inches(4.3), Inches(11.7), Inches(2), font_size=18, color=GRAY)
-info.text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-
-# ============== SLIDE 2: Research Problem ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "The Research Problem", Inches(0.5), font_size=40, color=ACCENT)
-
-add_bullet_point(slide, Inches(0.8), Inches(1.5), "1", 
-    "Charitable organizations increasingly use Large Language Models (LLMs) to create donation appeals")
-add_bullet_point(slide, Inches(0.8), Inches(2.3), "2", 
-    "Women donate more frequently and give higher amounts than men across cultures")
-add_bullet_point(slide, Inches(0.8), Inches(3.1), "3", 
-    "LLMs produce emotionally polished language but lack genuine emotional experience")
-add_bullet_point(slide, Inches(0.8), Inches(3.9), "4", 
-    "Will women — who value emotional authenticity — respond differently to LLM content?")
-
-# Research question box
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(7), Inches(1.8), Inches(5.5), Inches(3))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-box.line.color.rgb = PRIMARY
-
-add_body_text(slide, "Main Research Question", Inches(7.3), Inches(2), Inches(5), Inches(0.5), font_size=18, color=ACCENT, bold=True)
-add_body_text(slide, '"Do women and men respond differently to LLM-generated versus human-written emotional donation appeals for cancer charities?"',
-    Inches(7.3), Inches(2.5), Inches(5), Inches(2), font_size=16, color=LIGHT)
-
-# ============== SLIDE 3: Theoretical Background ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Theoretical Background", Inches(0.5), font_size=40, color=ACCENT)
-
-# Theory boxes
-y_pos = Inches(1.5)
-for emoji, title, desc in [
-    ("🧠", "Empathic Concern", "Women report higher empathy. Perceived sincerity matters when emotional engagement drives persuasion."),
-    ("⚠️", "Algorithm Aversion", "People trust algorithms less in emotional domains. Women may react more negatively to disclosed LLM content."),
-    ("❤️", "Care vs. Justice", "Women adopt care-focused moral reasoning; LLM appeals may fail if caring relationship perception weakens.")
-]:
-    box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(0.8), y_pos, Inches(11.7), Inches(1.3))
-    box.fill.solid()
-    box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-    box.line.fill.background()
-    
-    add_body_text(slide, emoji, Inches(1), y_pos + Inches(0.4), Inches(0.5), Inches(0.5), font_size=28)
-    add_body_text(slide, title, Inches(1.6), y_pos + Inches(0.2), Inches(3), Inches(0.4), font_size=20, color=ACCENT, bold=True)
-    add_body_text(slide, desc, Inches(1.6), y_pos + Inches(0.6), Inches(10), Inches(0.6), font_size=16, color=LIGHT)
-    
-    y_pos += Inches(1.5)
-
-# ============== SLIDE 4: Hypotheses ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Research Hypotheses", Inches(0.5), font_size=40, color=ACCENT)
-
-hypotheses = [
-    ("H1", "Women will report significantly lower persuasiveness scores (1-7 Likert) for LLM appeals, while men show no difference."),
-    ("H2a", "Women will allocate higher monetary amounts (USD 0.00-0.10) regardless of appeal source."),
-    ("H2b", "The donation gap between genders will be larger for human-written appeals."),
-    ("H3", "Women's likelihood of selecting 'Like' will be higher for human-written appeals.")
-]
-
-y_pos = Inches(1.3)
-for label, text in hypotheses:
-    # Left border accent
-    border = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(0.8), y_pos, Inches(0.1), Inches(1.1))
-    border.fill.solid()
-    border.fill.fore_color.rgb = SECONDARY
-    border.line.fill.background()
-    
-    # Box
-    box = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, Inches(0.9), y_pos, Inches(11.6), Inches(1.1))
-    box.fill.solid()
-    box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-    box.line.fill.background()
-    
-    add_body_text(slide, label, Inches(1.1), y_pos + Inches(0.15), Inches(1), Inches(0.3), font_size=16, color=SECONDARY, bold=True)
-    add_body_text(slide, text, Inches(1.1), y_pos + Inches(0.45), Inches(11), Inches(0.6), font_size=16, color=LIGHT)
-    
-    y_pos += Inches(1.3)
-
-# ============== SLIDE 5: Methods ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Research Methods", Inches(0.5), font_size=40, color=ACCENT)
-
-# Stats boxes
-add_stat_box(slide, Inches(1.5), Inches(1.5), "725", "U.S. Participants")
-add_stat_box(slide, Inches(5.2), Inches(1.5), "4,350", "Total Observations")
-add_stat_box(slide, Inches(8.9), Inches(1.5), "6", "Appeals per Participant")
-
-# Method details
-add_body_text(slide, "📊 Design: Within-subjects experiment • Human vs LLM-generated appeals • Cancer charities",
-    Inches(0.8), Inches(3.8), Inches(12), Inches(0.5), font_size=20, color=LIGHT)
-add_body_text(slide, "📏 Outcomes: Engagement (Dislike/Neutral/Like) • Persuasiveness (1-7 scale) • Donation ($0.00-$0.10)",
-    Inches(0.8), Inches(4.4), Inches(12), Inches(0.5), font_size=20, color=LIGHT)
-
-# ============== SLIDE 6: Analytical Approach ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Analytical Approach", Inches(0.5), font_size=40, color=ACCENT)
-
-add_bullet_point(slide, Inches(0.8), Inches(1.5), "1", 
-    "Engagement: Ordinal logistic mixed-effects regression (cumulative link model)")
-add_bullet_point(slide, Inches(0.8), Inches(2.3), "2", 
-    "Persuasiveness: Linear mixed-effects model (continuous outcome)")
-add_bullet_point(slide, Inches(0.8), Inches(3.1), "3", 
-    "Donation: Hurdle model (35.3% zero-inflation required two-part approach)")
-
-# Model features box
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(7.5), Inches(1.5), Inches(5), Inches(2.5))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-box.line.color.rgb = PRIMARY
-
-add_body_text(slide, "All models include:", Inches(7.8), Inches(1.7), Inches(4.5), Inches(0.4), font_size=18, color=ACCENT)
-add_body_text(slide, "✓ Random intercepts for participants\n✓ Random intercepts for posts\n✓ Gender × Content Source interaction",
-    Inches(7.8), Inches(2.2), Inches(4.5), Inches(1.5), font_size=16, color=LIGHT)
-# ============== SLIDE 7: Model Justification ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Model Selection Justification", Inches(0.5), font_size=40, color=ACCENT)
-
-# Q-Q Plot for Persuasiveness
-base_path = "thesis_source/thesis_latex/phase1_plots/"
-add_image_placeholder(slide, Inches(0.8), Inches(1.5), Inches(5.5), Inches(3.8),
-    base_path + "persuasiveness_qqplot.png")
-add_body_text(slide, "Persuasiveness: Q-Q plot confirms normality → Linear mixed-effects model",
-    Inches(0.8), Inches(5.5), Inches(5.5), Inches(0.5), font_size=14, color=GRAY)
-
-# Donation Histogram
-add_image_placeholder(slide, Inches(6.8), Inches(1.5), Inches(5.5), Inches(3.8),
-    base_path + "donation_histogram.png")
-add_body_text(slide, "Donation: 35.3% zeros → Hurdle model required",
-    Inches(6.8), Inches(5.5), Inches(5.5), Inches(0.5), font_size=14, color=GRAY)
-
-# ============== SLIDE 8: Descriptive Results ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Descriptive Statistics", Inches(0.5), font_size=40, color=ACCENT)
-
-# Image placeholders
-base_path = "thesis_source/thesis_latex/phase1_plots/"
-add_image_placeholder(slide, Inches(0.8), Inches(1.5), Inches(5.8), Inches(4.5), 
-    base_path + "engagement_distribution.png")
-add_image_placeholder(slide, Inches(6.8), Inches(1.5), Inches(5.8), Inches(4.5), 
-    base_path + "persuasiveness_boxplot.png")
-
-# ============== SLIDE 9: Main Effects ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Main Effects: The LLM Advantage", Inches(0.5), font_size=40, color=ACCENT)
-
-# Table header
-headers = ["Outcome", "LLM Effect", "p-value", "Interpretation"]
-x_positions = [Inches(0.8), Inches(3.5), Inches(5.5), Inches(7.5)]
-widths = [Inches(2.5), Inches(2), Inches(2), Inches(5)]
-
-y = Inches(1.5)
-for i, header in enumerate(headers):
-    box = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, x_positions[i], y, widths[i], Inches(0.5))
-    box.fill.solid()
-    box.fill.fore_color.rgb = RGBColor(37, 99, 235)
-    box.line.fill.background()
-    add_body_text(slide, header, x_positions[i] + Inches(0.1), y + Inches(0.1), widths[i], Inches(0.4), font_size=16, color=LIGHT, bold=True)
-
-# Table rows
-rows = [
-    ("Engagement", "OR = 1.58", "< .001", "58% higher odds of favorable rating"),
-    ("Persuasiveness", "b = 0.20", "< .001", "+0.20 points on 7-point scale"),
-    ("Donation Amount", "b = 0.0018", ".011", "Higher amounts for LLM appeals")
-]
-
-y = Inches(2.0)
-for row in rows:
-    for i, cell in enumerate(row):
-        box = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, x_positions[i], y, widths[i], Inches(0.6))
-        box.fill.solid()
-        box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-        box.line.color.rgb = RGBColor(50, 60, 80)
-        color = GREEN if i == 2 else LIGHT
-        add_body_text(slide, cell, x_positions[i] + Inches(0.1), y + Inches(0.15), widths[i], Inches(0.4), font_size=14, color=color)
-    y += Inches(0.6)
-
-# Key finding
-add_body_text(slide, "LLM-generated appeals outperformed human-written appeals on ALL outcomes",
-    Inches(0.8), Inches(4.5), Inches(12), Inches(0.5), font_size=24, color=ACCENT, bold=True)
-
-# ============== SLIDE 10: Gender Effects on Donation ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Gender Effects on Donation", Inches(0.5), font_size=40, color=ACCENT)
-
-# Donation means graph
-add_image_placeholder(slide, Inches(0.8), Inches(1.5), Inches(5.5), Inches(4.2),
-    base_path + "donation_means.png")
-
-# Stat box
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(7), Inches(1.5), Inches(5.3), Inches(1.3))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-box.line.color.rgb = PRIMARY
-
-# Number
-num_box = slide.shapes.add_textbox(Inches(7), Inches(1.6), Inches(5.3), Inches(0.7))
-tf = num_box.text_frame
-p = tf.paragraphs[0]
-p.text = "$0.0013"
-p.font.size = Pt(36)
-p.font.bold = True
-p.font.color.rgb = ACCENT
-p.alignment = PP_ALIGN.CENTER
-
-# Label
-label_box = slide.shapes.add_textbox(Inches(7), Inches(2.3), Inches(5.3), Inches(0.4))
-tf = label_box.text_frame
-p = tf.paragraphs[0]
-p.text = "Women donate more (p = .026)"
-p.font.size = Pt(14)
-p.font.color.rgb = GRAY
-p.alignment = PP_ALIGN.CENTER
-
-# Points
-add_body_text(slide, "✓ H2a Supported: Women allocate higher amounts than men",
-    Inches(7), Inches(3.2), Inches(5.5), Inches(0.5), font_size=16, color=ACCENT)
-add_body_text(slide, "✗ Gender did NOT predict whether someone donated at all (p = .412)",
-    Inches(7), Inches(3.8), Inches(5.5), Inches(0.5), font_size=16, color=LIGHT)
-
-# ============== SLIDE 11: Engagement Interaction ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Interaction: Engagement", Inches(0.5), font_size=40, color=ACCENT)
-add_body_text(slide, "Gender × Content Source (OR = 1.53, p = .011) — SIGNIFICANT",
-    Inches(0.8), Inches(1.0), Inches(8), Inches(0.4), font_size=18, color=GREEN)
-
-# Graph
-add_image_placeholder(slide, Inches(0.8), Inches(1.6), Inches(5.5), Inches(4.2),
-    "thesis_source/thesis_latex/phase3_plots/interaction_engagement_like.png")
-
-# Interpretation
-add_body_text(slide, "→ Both genders prefer LLM content",
-    Inches(6.8), Inches(2), Inches(5.5), Inches(0.4), font_size=18, color=LIGHT)
-add_body_text(slide, "→ Women show stronger preference for LLM appeals",
-    Inches(6.8), Inches(2.6), Inches(5.5), Inches(0.4), font_size=18, color=ACCENT)
-add_body_text(slide, "→ Steeper slope for women = significant interaction",
-    Inches(6.8), Inches(3.2), Inches(5.5), Inches(0.4), font_size=18, color=LIGHT)
-
-# Result box
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(6.8), Inches(4), Inches(5.5), Inches(1))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(60, 30, 30)
-box.line.fill.background()
-add_body_text(slide, "H3 NOT Supported: Women preferred LLM content more, not less",
-    Inches(7), Inches(4.3), Inches(5), Inches(0.6), font_size=16, color=RED)
-
-# ============== SLIDE 10: Persuasiveness Interaction ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Interaction: Persuasiveness", Inches(0.5), font_size=40, color=ACCENT)
-add_body_text(slide, "Gender × Content Source (b = 0.06, p = .428) — NOT SIGNIFICANT",
-    Inches(0.8), Inches(1.0), Inches(8), Inches(0.4), font_size=18, color=RED)
-
-add_image_placeholder(slide, Inches(0.8), Inches(1.6), Inches(5.5), Inches(4.2),
-    "thesis_source/thesis_latex/phase3_plots/interaction_persuasiveness.png")
-
-add_body_text(slide, "→ Both rated LLM content as more persuasive",
-    Inches(6.8), Inches(2), Inches(5.5), Inches(0.4), font_size=18, color=LIGHT)
-add_body_text(slide, "→ Visible gap is not statistically significant",
-    Inches(6.8), Inches(2.6), Inches(5.5), Inches(0.4), font_size=18, color=LIGHT)
-
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(6.8), Inches(4), Inches(5.5), Inches(1))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(60, 30, 30)
-box.line.fill.background()
-add_body_text(slide, "H1 NOT Supported: No interaction on persuasiveness",
-    Inches(7), Inches(4.3), Inches(5), Inches(0.6), font_size=16, color=RED)
-
-# ============== SLIDE 11: Donation Interaction ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Interaction: Donation Amount", Inches(0.5), font_size=40, color=ACCENT)
-add_body_text(slide, "Gender × Content Source (b = 0.0002, p = .735) — NOT SIGNIFICANT",
-    Inches(0.8), Inches(1.0), Inches(8), Inches(0.4), font_size=18, color=RED)
-
-add_image_placeholder(slide, Inches(0.8), Inches(1.6), Inches(5.5), Inches(4.2),
-    "thesis_source/thesis_latex/phase3_plots/interaction_donation_fixed.png")
-
-add_body_text(slide, "→ Women donate more across both conditions",
-    Inches(6.8), Inches(2), Inches(5.5), Inches(0.4), font_size=18, color=LIGHT)
-add_body_text(slide, "→ Parallel lines = no interaction",
-    Inches(6.8), Inches(2.6), Inches(5.5), Inches(0.4), font_size=18, color=LIGHT)
-
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(6.8), Inches(4), Inches(5.5), Inches(1))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(60, 30, 30)
-box.line.fill.background()
-add_body_text(slide, "H2b NOT Supported: Gender gap consistent across sources",
-    Inches(7), Inches(4.3), Inches(5), Inches(0.6), font_size=16, color=RED)
-
-# ============== SLIDE 12: Hypothesis Summary ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Hypothesis Testing Summary", Inches(0.5), font_size=40, color=ACCENT)
-
-# Table
-headers = ["Hypothesis", "Prediction", "Result"]
-x_positions = [Inches(0.8), Inches(2.5), Inches(8)]
-widths = [Inches(1.5), Inches(5.5), Inches(4)]
-
-y = Inches(1.5)
-for i, header in enumerate(headers):
-    box = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, x_positions[i], y, widths[i], Inches(0.5))
-    box.fill.solid()
-    box.fill.fore_color.rgb = PRIMARY
-    box.line.fill.background()
-    add_body_text(slide, header, x_positions[i] + Inches(0.1), y + Inches(0.1), widths[i], Inches(0.4), font_size=16, color=LIGHT, bold=True)
-
-rows = [
-    ("H1", "Women rate LLM as less persuasive", "Not Supported", RED),
-    ("H2a", "Women donate more than men", "Supported", GREEN),
-    ("H2b", "Larger gender gap for human appeals", "Not Supported", RED),
-    ("H3", "Women prefer human content for engagement", "Not Supported (Opposite)", RED)
-]
-
-y = Inches(2.0)
-for h, pred, result, result_color in rows:
-    for i, (cell, color) in enumerate([(h, LIGHT), (pred, LIGHT), (result, result_color)]):
-        box = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, x_positions[i], y, widths[i], Inches(0.7))
-        box.fill.solid()
-        box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-        box.line.color.rgb = RGBColor(50, 60, 80)
-        add_body_text(slide, cell, x_positions[i] + Inches(0.1), y + Inches(0.2), widths[i] - Inches(0.2), Inches(0.4), font_size=14, color=color)
-    y += Inches(0.7)
-
-# ============== SLIDE 13: Discussion ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Discussion", Inches(0.5), font_size=40, color=ACCENT)
-
-add_bullet_point(slide, Inches(0.8), Inches(1.5), "1", 
-    '"Sincerity Gap": Gender differences appeared only for quick, automatic engagement — not for deeper judgments or actual behavior.')
-add_bullet_point(slide, Inches(0.8), Inches(2.5), "2", 
-    "Algorithm Aversion Not Activated: Participants weren't told about LLM authorship, so skepticism wasn't triggered.")
-add_bullet_point(slide, Inches(0.8), Inches(3.5), "3", 
-    "Care Orientation Persists: Women's higher donations are triggered by distress signals — regardless of human or machine authorship.")
-
-# ============== SLIDE 14: Practical Implications ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Practical Implications", Inches(0.5), font_size=40, color=ACCENT)
-
-add_body_text(slide, "✓ LLMs can generate appeals that perform at least as well as human-written content",
-    Inches(0.8), Inches(1.5), Inches(7), Inches(0.5), font_size=20, color=LIGHT)
-add_body_text(slide, "✓ Especially useful for nonprofits with limited resources",
-    Inches(0.8), Inches(2.1), Inches(7), Inches(0.5), font_size=20, color=LIGHT)
-add_body_text(slide, "⚠️ Disclosure policies require caution — labeling may reduce impact",
-    Inches(0.8), Inches(2.7), Inches(7), Inches(0.5), font_size=20, color=LIGHT)
-add_body_text(slide, "→ Organizations face a trade-off between transparency and effectiveness",
-    Inches(0.8), Inches(3.3), Inches(7), Inches(0.5), font_size=20, color=LIGHT)
-
-# Key takeaway box
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(7.5), Inches(1.5), Inches(5), Inches(3))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(30, 50, 70)
-box.line.color.rgb = PRIMARY
-
-add_body_text(slide, "Key Takeaway:", Inches(7.8), Inches(1.8), Inches(4.5), Inches(0.4), font_size=18, color=LIGHT, bold=True)
-add_body_text(slide, "Gender does not limit the value of LLMs in fundraising. Donors respond to content quality, not author identity.",
-    Inches(7.8), Inches(2.3), Inches(4.5), Inches(2), font_size=18, color=ACCENT)
-
-# ============== SLIDE 15: Limitations ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Limitations & Future Research", Inches(0.5), font_size=40, color=ACCENT)
-
-limitations = [
-    "🔒 Participants not disclosed about LLM authorship",
-    "🎯 Single domain (cancer charities)",
-    "💰 Small donation amounts ($0.00-$0.10)",
-    "🇺🇸 U.S. sample only"
-]
-
-y = Inches(1.5)
-for lim in limitations:
-    box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(0.8), y, Inches(5.5), Inches(0.6))
-    box.fill.solid()
-    box.fill.fore_color.rgb = RGBColor(30, 41, 59)
-    box.line.fill.background()
-    add_body_text(slide, lim, Inches(1), y + Inches(0.15), Inches(5), Inches(0.4), font_size=16, color=LIGHT)
-    y += Inches(0.7)
-
-# Future directions
-add_body_text(slide, "Future Directions", Inches(7), Inches(1.5), Inches(5), Inches(0.4), font_size=20, color=ACCENT, bold=True)
-add_body_text(slide, "1. Test effects when LLM authorship is disclosed\n2. Explore other charitable domains\n3. Examine long-term donor relationships",
-    Inches(7), Inches(2), Inches(5.5), Inches(2), font_size=16, color=LIGHT)
-
-# ============== SLIDE 16: Conclusion ==============
-slide = add_dark_slide(prs)
-add_title_text(slide, "Conclusion", Inches(0.5), font_size=40, color=ACCENT)
-
-# Main conclusion box
-box = slide.shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, Inches(1.5), Inches(1.5), Inches(10.3), Inches(4))
-box.fill.solid()
-box.fill.fore_color.rgb = RGBColor(30, 50, 70)
-box.line.color.rgb = PRIMARY
-
-add_body_text(slide, "LLM-generated donation appeals outperform human-written appeals across all outcomes.",
-    Inches(2), Inches(2), Inches(9), Inches(0.8), font_size=22, color=LIGHT)
-
-add_body_text(slide, "Gender differences do not limit the effectiveness of LLM-generated charitable appeals.",
-    Inches(2), Inches(3), Inches(9), Inches(0.8), font_size=26, color=ACCENT, bold=True)
-
-add_body_text(slide, "Women's higher generosity persists regardless of whether a human or machine wrote the appeal.",
-    Inches(2), Inches(4), Inches(9), Inches(0.8), font_size=20, color=GRAY)
-
-# ============== SLIDE 17: Thank You ==============
-slide = add_dark_slide(prs)
-
-title = add_title_text(slide, "Thank You", Inches(0.8), font_size=56, color=LIGHT)
-title.left = Inches(0)
-title.width = prs.slide_width
-title.text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-title.top = Inches(2)
-
-sub = add_body_text(slide, "Questions?", Inches(0), Inches(3), prs.slide_width, Inches(0.8), font_size=32, color=ACCENT)
-sub.text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-
-info = add_body_text(slide, "Salah-din Mrait\ns.mrait@tilburguniversity.edu\n\nSupervisor: John Caffier",
-    Inches(0), Inches(4.5), prs.slide_width, Inches(2), font_size=18, color=GRAY)
-info.text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-
-# Save presentation
-prs.save('thesis_presentation_v2.pptx')
-print("PowerPoint presentation created: thesis_presentation_v2.pptx")
+def add_table(slide, headers, rows, x, widths, top, row_height=0.6, text_offset=0.15, text_inset=0.0,
+              font_size=14):
+    """Add a table of shapes at column positions x (inches): a blue header row, then rows of text or (text, color)"""
+    for i, header in enumerate(headers):
+        add_box(slide, Inches(x[i]), Inches(top), Inches(widths[i]), Inches(0.5), PRIMARY)
+        add_body_text(slide, header, Inches(x[i] + 0.1), Inches(top + 0.1), Inches(widths[i]), Inches(0.4),
+                      font_size=16, color=LIGHT, bold=True)
+    y = top + 0.5
+    for row in rows:
+        for i, cell in enumerate(row):
+            text, color = cell if isinstance(cell, (tuple, list)) else (cell, LIGHT)
+            add_box(slide, Inches(x[i]), Inches(y), Inches(widths[i]), Inches(row_height), PANEL, GRID)
+            add_body_text(slide, text, Inches(x[i] + 0.1), Inches(y + text_offset), Inches(widths[i] - text_inset),
+                          Inches(0.4), font_size=font_size, color=_rgb(color))
+        y += row_height
+
+
+# --- Slide definitions as data: positions and sizes in inches, colors as hex strings ---
+
+def _hex(color):
+    return None if color is None else str(color)
+
+def _rgb(color):
+    return None if color is None else RGBColor.from_string(str(color))
+
+def title(text, top=0.5, font_size=40, color=ACCENT, **options):
+    return {'type': 'title', 'text': text, 'top': top, 'font_size': font_size, 'color': _hex(color), **options}
+
+def text(text, left, top, width, height, font_size=18, color=LIGHT, bold=False, align=None):
+    return {'type': 'text', 'text': text, 'left': left, 'top': top, 'width': width, 'height': height,
+            'font_size': font_size, 'color': _hex(color), 'bold': bold, 'align': align}
+
+def bullet(left, top, number, text):
+    return {'type': 'bullet', 'left': left, 'top': top, 'number': number, 'text': text}
+
+def stat(left, top, number, label):
+    return {'type': 'stat', 'left': left, 'top': top, 'number': number, 'label': label}
+
+def box(left, top, width, height, fill=PANEL, line=None, shape='rectangle'):
+    return {'type': 'box', 'left': left, 'top': top, 'width': width, 'height': height, 'fill': _hex(fill),
+            'line': _hex(line), 'shape': shape}
+
+def image(path, left, top, width, height):
+    return {'type': 'image', 'path': path, 'left': left, 'top': top, 'width': width, 'height': height}
+
+def table(headers, rows, x, widths, top, **options):
+    rows = [[(cell[0], _hex(cell[1])) if isinstance(cell, tuple) else cell for cell in row] for row in rows]
+    return {'type': 'table', 'headers': headers, 'rows': rows, 'x': x, 'widths': widths, 'top': top, **options}
+
+
+def render_slide(prs, elements, images=None):
+    """Add one dark slide built from element dicts; images maps a source path to the file to embed"""
+    slide = add_dark_slide(prs)
+    for element in elements:
+        kind = element['type']
+        if kind == 'title':
+            left, width = element.get('left'), element.get('width')
+            shape = add_title_text(slide, element['text'], Inches(element['top']), element['font_size'],
+                                   _rgb(element['color']), element.get('bold', True),
+                                   None if width is None else Inches(width), None if left is None else Inches(left))
+            if element.get('align'):
+                shape.text_frame.paragraphs[0].alignment = ALIGN[element['align']]
+        elif kind == 'text':
+            shape = add_body_text(slide, element['text'], Inches(element['left']), Inches(element['top']),
+                                  Inches(element['width']), Inches(element['height']), element['font_size'],
+                                  _rgb(element['color']), element['bold'])
+            if element['align']:
+                shape.text_frame.paragraphs[0].alignment = ALIGN[element['align']]
+        elif kind == 'bullet':
+            add_bullet_point(slide, Inches(element['left']), Inches(element['top']), element['number'],
+                             element['text'])
+        elif kind == 'stat':
+            add_stat_box(slide, Inches(element['left']), Inches(element['top']), element['number'],
+                         element['label'])
+        elif kind == 'box':
+            add_box(slide, Inches(element['left']), Inches(element['top']), Inches(element['width']),
+                    Inches(element['height']), _rgb(element['fill']), _rgb(element['line']), element['shape'])
+        elif kind == 'image':
+            path = (images or {}).get(element['path'], element['path'])
+            add_image_placeholder(slide, Inches(element['left']), Inches(element['top']), Inches(element['width']),
+                                  Inches(element['height']), path)
+        elif kind == 'table':
+            options = {k: v for k, v in element.items() if k not in ('type', 'headers', 'rows', 'x', 'widths', 'top')}
+            add_table(slide, element['headers'], element['rows'], element['x'], element['widths'], element['top'],
+                      **options)
+        else:
+            raise ValueError(f"unknown slide element type {kind!r}")
+    return slide
+
+
+# --- Image pre-processing cache ---
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def prepare_image(path, size, cache_dir=IMAGE_CACHE_DIR):
+    """Path of path downscaled to at most size (pixels) and recompressed, cached by content hash"""
+    digest = hashlib.sha256(f"{IMAGE_CACHE_VERSION}:{size}:{_file_digest(path)}".encode()).hexdigest()
+    cached = os.path.join(cache_dir, digest[:24] + os.path.splitext(path)[1].lower())
+    if os.path.exists(cached):
+        return cached
+    from PIL import Image
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{cached}.{os.getpid()}.tmp"
+    with Image.open(path) as im:
+        fmt, palette = im.format or 'PNG', im.mode == 'P'
+        # Never upscale; a source already small enough is only recompressed
+        if im.width > size[0] or im.height > size[1]:
+            im = im.convert('RGBA').resize((min(im.width, size[0]), min(im.height, size[1])), Image.LANCZOS)
+            if palette:
+                # Back to an adaptive palette, as the source was, so the copy stays small
+                im = im.quantize(256, method=Image.Quantize.FASTOCTREE)
+        im.save(tmp, format=fmt, optimize=True)
+    # Keep the original bytes when re-encoding does not make the file smaller
+    if os.path.getsize(tmp) >= os.path.getsize(path):
+        shutil.copyfile(path, tmp)
+    os.replace(tmp, cached)
+    return cached
+
+def image_sizes(slides, dpi=IMAGE_DPI):
+    """{image path: (width, height) in pixels}, the largest placement of each existing image"""
+    sizes = {}
+    for elements in slides:
+        for element in elements:
+            if element['type'] == 'image' and os.path.exists(element['path']):
+                w, h = sizes.get(element['path'], (0, 0))
+                sizes[element['path']] = (max(w, math.ceil(element['width'] * dpi)),
+                                          max(h, math.ceil(element['height'] * dpi)))
+    return sizes
+
+def prepare_images(slides, dpi=IMAGE_DPI, cache_dir=IMAGE_CACHE_DIR, workers=1):
+    """{image path: cached downscaled copy}; one copy per source, so repeated images share one part"""
+    sizes = image_sizes(slides, dpi)
+    if workers == 1 or len(sizes) < 2:
+        return {path: prepare_image(path, size, cache_dir) for path, size in sizes.items()}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = {path: pool.submit(prepare_image, path, size, cache_dir) for path, size in sizes.items()}
+        return {path: future.result() for path, future in futures.items()}
+
+
+# --- Builder ---
+
+def deck_digest(slides, dpi=IMAGE_DPI):
+    """Hash of everything a deck is rendered from: the slide definitions, the bytes of their images
+    and this module, which holds the render functions, colors and layout"""
+    digest = hashlib.sha256(json.dumps([IMAGE_CACHE_VERSION, dpi, slides], sort_keys=True).encode())
+    digest.update(_file_digest(__file__).encode())
+    for path in sorted({e['path'] for elements in slides for e in elements if e['type'] == 'image'}):
+        digest.update(_file_digest(path).encode() if os.path.exists(path) else b'missing')
+    return digest.hexdigest()
+
+def _record_path(path):
+    return os.path.join(DECK_RECORD_DIR, hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16])
+
+def deck_is_current(slides, path=DECK_PATH, dpi=IMAGE_DPI):
+    """True if path was last built from exactly these slides, images and rendering code"""
+    record = _record_path(path)
+    if not (os.path.exists(path) and os.path.exists(record)):
+        return False
+    with open(record) as f:
+        return f.read() == deck_digest(slides, dpi)
+
+def build_deck(slides, path=DECK_PATH, dpi=IMAGE_DPI, cache_dir=IMAGE_CACHE_DIR, workers=1, force=False):
+    """Render slide definitions (lists of element dicts) to a .pptx file; returns path.
+
+    A deck whose slides (including every table cell), images and rendering code
+    are unchanged since it was last built is left as it is unless force is set.
+    """
+    if not force and deck_is_current(slides, path, dpi):
+        return path
+    digest = deck_digest(slides, dpi)
+    record = _record_path(path)
+    images = prepare_images(slides, dpi, cache_dir, workers) if dpi else {}
+    prs = new_presentation()
+    for elements in slides:
+        render_slide(prs, elements, images)
+    prs.save(path)
+    os.makedirs(DECK_RECORD_DIR, exist_ok=True)
+    with open(record, 'w') as f:
+        f.write(digest)
+    return path
+
+def build_decks(decks, dpi=IMAGE_DPI, cache_dir=IMAGE_CACHE_DIR, workers=None, force=False):
+    """Build many decks ({path: slides}, e.g. one per charity or wave) on a process pool"""
+    if workers == 1:
+        return [build_deck(slides, path, dpi, cache_dir, force=force) for path, slides in decks.items()]
+    # Shared images are prepared once before the decks are rendered in parallel
+    prepare_images([elements for slides in decks.values() for elements in slides], dpi, cache_dir, workers)
+    with ProcessPoolExecutor(max_workers=workers or min(len(decks), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(build_deck, slides, path, dpi, cache_dir, force=force)
+                   for path, slides in decks.items()]
+        return [future.result() for future in futures]
+
+
+# --- Result cells ---
+
+MISSING = "n/a"
+
+def format_p(p):
+    """APA style p-value: no leading zero, '< .001' below a thousandth"""
+    return "< .001" if p < 0.001 else f"{p:.3f}".lstrip('0')
+
+def format_estimate(row):
+    """'OR = x' for ordinal models, 'b = x' otherwise; small coefficients keep two significant digits"""
+    if row['family'].startswith('ordinal'):
+        return f"OR = {math.exp(row['estimate']):.2f}"
+    b = row['estimate']
+    return f"b = {b:.2f}" if abs(b) >= 0.01 else f"b = {b:.2g}"
+
+def p_cell(row, alpha=None):
+    """p-value table cell coloured by significance"""
+    import results
+    if row is None:
+        return (MISSING, GRAY)
+    return (format_p(row['p_value']), GREEN if row['p_value'] < (alpha or results.ALPHA) else RED)
+
+def verdict_cell(verdict):
+    return (verdict, GREEN if verdict == 'Supported' else RED)
+
+
+# ============== Thesis presentation ==============
+
+PHASE1_PLOTS = "thesis_source/thesis_latex/phase1_plots/"
+PHASE3_PLOTS = "thesis_source/thesis_latex/phase3_plots/"
+INTERACTION = 'genderFemale:content_sourceLLM'
+
+# Hypothesis: prediction, model and term of the results store testing it, predicted sign, slide verdict per outcome
+HYPOTHESES = {
+    'H1': ("Women rate LLM as less persuasive", 'phase3/persuasiveness', INTERACTION, -1,
+           {'Supported': "H1 Supported: Women rated LLM content as less persuasive",
+            'Not Supported': "H1 NOT Supported: No interaction on persuasiveness",
+            'Not Supported (Opposite)': "H1 NOT Supported: Women rated LLM content as more persuasive"}),
+    'H2a': ("Women donate more than men", 'phase2/donation (all rows)', 'genderFemale', 1,
+            {'Supported': "H2a Supported: Women allocate higher amounts than men",
+             'Not Supported': "H2a NOT Supported: No gender difference in amounts",
+             'Not Supported (Opposite)': "H2a NOT Supported: Men allocate higher amounts than women"}),
+    'H2b': ("Larger gender gap for human appeals", 'phase3/donation (donors only)', INTERACTION, -1,
+            {'Supported': "H2b Supported: Gender gap larger for human appeals",
+             'Not Supported': "H2b NOT Supported: Gender gap consistent across sources",
+             'Not Supported (Opposite)': "H2b NOT Supported: Gender gap larger for LLM appeals"}),
+    'H3': ("Women prefer human content for engagement", 'phase3/engagement', INTERACTION, -1,
+           {'Supported': "H3 Supported: Women preferred human content more",
+            'Not Supported': "H3 NOT Supported: No interaction on engagement",
+            'Not Supported (Opposite)': "H3 NOT Supported: Women preferred LLM content more, not less"}),
+}
+
+def _p_text(row):
+    return MISSING if row is None else (f"p {format_p(row['p_value'])}" if row['p_value'] < 0.001
+                                        else f"p = {format_p(row['p_value'])}")
+
+def thesis_slides(store=None, check_reference=True):
+    """Slide definitions of the thesis presentation, numbers and verdicts taken from the results store.
+
+    Unless check_reference is False, a store whose significance for a reported
+    term disagrees with the R output or the thesis raises ValueError instead
+    of producing contradicting verdicts.
+    """
+    import results
+    store = results.ResultsStore.load() if store is None else store
+    conflicts = results.reference_conflicts(store) if check_reference else []
+    if conflicts:
+        raise ValueError("results store disagrees with the thesis models:\n" +
+                         '\n'.join(f"  {' '.join(filter(None, [model, part, term]))}: {reason}"
+                                    for model, part, term, reason in conflicts))
+    slides = []
+
+    def descriptive(term, spec=",.0f"):
+        value = store.value('descriptives', term)
+        return MISSING if value is None else format(value, spec)
+
+    def tested(label):
+        prediction, model, term, sign, texts = HYPOTHESES[label]
+        row = store.get(model, term)
+        return row, results.verdict(row, sign), texts
+
+    # ============== SLIDE 1: Title ==============
+    slides.append([
+        title("Gender Differences in Responses to\nLLM-Generated vs Human-Written\nDonation Appeals",
+              top=1.5, font_size=44, color=LIGHT, align='center'),
+        text("A Multi-factorial Analysis of Digital Charitable Giving", 0.8, 3.3, 11.7, 0.5, font_size=24,
+             color=ACCENT, align='center'),
+        text("Salah-din Mrait\nBachelor End Project • Data Science Joint Degree\nTilburg University — Eindhoven University of Technology\n\nSupervisor: John Caffier\nJanuary 2026",
+             0.8, 4.3, 11.7, 2, font_size=18, color=GRAY, align='center'),
+    ])
+
+    # ============== SLIDE 2: Research Problem ==============
+    slides.append([
+        title("The Research Problem"),
+        bullet(0.8, 1.5, "1", "Charitable organizations increasingly use Large Language Models (LLMs) to create donation appeals"),
+        bullet(0.8, 2.3, "2", "Women donate more frequently and give higher amounts than men across cultures"),
+        bullet(0.8, 3.1, "3", "LLMs produce emotionally polished language but lack genuine emotional experience"),
+        bullet(0.8, 3.9, "4", "Will women — who value emotional authenticity — respond differently to LLM content?"),
+        # Research question box
+        box(7, 1.8, 5.5, 3, line=PRIMARY, shape='rounded'),
+        text("Main Research Question", 7.3, 2, 5, 0.5, font_size=18, color=ACCENT, bold=True),
+        text('"Do women and men respond differently to LLM-generated versus human-written emotional donation appeals for cancer charities?"',
+             7.3, 2.5, 5, 2, font_size=16),
+    ])
+
+    # ============== SLIDE 3: Theoretical Background ==============
+    elements = [title("Theoretical Background")]
+    y_pos = 1.5
+    for emoji, heading, desc in [
+        ("🧠", "Empathic Concern", "Women report higher empathy. Perceived sincerity matters when emotional engagement drives persuasion."),
+        ("⚠️", "Algorithm Aversion", "People trust algorithms less in emotional domains. Women may react more negatively to disclosed LLM content."),
+        ("❤️", "Care vs. Justice", "Women adopt care-focused moral reasoning; LLM appeals may fail if caring relationship perception weakens.")
+    ]:
+        elements += [
+            box(0.8, y_pos, 11.7, 1.3, shape='rounded'),
+            text(emoji, 1, y_pos + 0.4, 0.5, 0.5, font_size=28),
+            text(heading, 1.6, y_pos + 0.2, 3, 0.4, font_size=20, color=ACCENT, bold=True),
+            text(desc, 1.6, y_pos + 0.6, 10, 0.6, font_size=16),
+        ]
+        y_pos += 1.5
+    slides.append(elements)
+
+    # ============== SLIDE 4: Hypotheses ==============
+    hypotheses = [
+        ("H1", "Women will report significantly lower persuasiveness scores (1-7 Likert) for LLM appeals, while men show no difference."),
+        ("H2a", "Women will allocate higher monetary amounts (USD 0.00-0.10) regardless of appeal source."),
+        ("H2b", "The donation gap between genders will be larger for human-written appeals."),
+        ("H3", "Women's likelihood of selecting 'Like' will be higher for human-written appeals.")
+    ]
+    elements = [title("Research Hypotheses")]
+    y_pos = 1.3
+    for label, hypothesis in hypotheses:
+        elements += [
+            # Left border accent
+            box(0.8, y_pos, 0.1, 1.1, fill=SECONDARY),
+            box(0.9, y_pos, 11.6, 1.1),
+            text(label, 1.1, y_pos + 0.15, 1, 0.3, font_size=16, color=SECONDARY, bold=True),
+            text(hypothesis, 1.1, y_pos + 0.45, 11, 0.6, font_size=16),
+        ]
+        y_pos += 1.3
+    slides.append(elements)
+
+    # ============== SLIDE 5: Methods ==============
+    slides.append([
+        title("Research Methods"),
+        stat(1.5, 1.5, descriptive('participants'), "U.S. Participants"),
+        stat(5.2, 1.5, descriptive('observations'), "Total Observations"),
+        stat(8.9, 1.5, descriptive('posts_per_participant', ".0f"), "Appeals per Participant"),
+        text("📊 Design: Within-subjects experiment • Human vs LLM-generated appeals • Cancer charities",
+             0.8, 3.8, 12, 0.5, font_size=20),
+        text("📏 Outcomes: Engagement (Dislike/Neutral/Like) • Persuasiveness (1-7 scale) • Donation ($0.00-$0.10)",
+             0.8, 4.4, 12, 0.5, font_size=20),
+    ])
+
+    # ============== SLIDE 6: Analytical Approach ==============
+    slides.append([
+        title("Analytical Approach"),
+        bullet(0.8, 1.5, "1", "Engagement: Ordinal logistic mixed-effects regression (cumulative link model)"),
+        bullet(0.8, 2.3, "2", "Persuasiveness: Linear mixed-effects model (continuous outcome)"),
+        bullet(0.8, 3.1, "3", f"Donation: Hurdle model ({descriptive('zero_donation_share', '.1%')} zero-inflation "
+                              "required two-part approach)"),
+        # Model features box
+        box(7.5, 1.5, 5, 2.5, line=PRIMARY, shape='rounded'),
+        text("All models include:", 7.8, 1.7, 4.5, 0.4, font_size=18, color=ACCENT),
+        text("✓ Random intercepts for participants\n✓ Random intercepts for posts\n✓ Gender × Content Source interaction",
+             7.8, 2.2, 4.5, 1.5, font_size=16),
+    ])
+
+    # ============== SLIDE 7: Model Justification ==============
+    slides.append([
+        title("Model Selection Justification"),
+        image(PHASE1_PLOTS + "persuasiveness_qqplot.png", 0.8, 1.5, 5.5, 3.8),
+        text("Persuasiveness: Q-Q plot confirms normality → Linear mixed-effects model",
+             0.8, 5.5, 5.5, 0.5, font_size=14, color=GRAY),
+        image(PHASE1_PLOTS + "donation_histogram.png", 6.8, 1.5, 5.5, 3.8),
+        text(f"Donation: {descriptive('zero_donation_share', '.1%')} zeros → Hurdle model required",
+             6.8, 5.5, 5.5, 0.5, font_size=14, color=GRAY),
+    ])
+
+    # ============== SLIDE 8: Descriptive Results ==============
+    slides.append([
+        title("Descriptive Statistics"),
+        image(PHASE1_PLOTS + "engagement_distribution.png", 0.8, 1.5, 5.8, 4.5),
+        image(PHASE1_PLOTS + "persuasiveness_boxplot.png", 6.8, 1.5, 5.8, 4.5),
+    ])
+
+    # ============== SLIDE 9: Main Effects ==============
+    rows, advantages = [], 0
+    for outcome, model, interpretation in [
+        ("Engagement", 'phase2/engagement',
+         lambda b: f"{abs(math.exp(b) - 1):.0%} {'higher' if b > 0 else 'lower'} odds of favorable rating"),
+        ("Persuasiveness", 'phase2/persuasiveness', lambda b: f"{b:+.2f} points on 7-point scale"),
+        ("Donation Amount", 'phase2/donation (all rows)',
+         lambda b: f"{'Higher' if b > 0 else 'Lower'} amounts for LLM appeals"),
+    ]:
+        row = store.get(model, 'content_sourceLLM')
+        if row is None:
+            rows.append((outcome, MISSING, p_cell(row), MISSING))
+            continue
+        rows.append((outcome, format_estimate(row), p_cell(row), interpretation(row['estimate'])))
+        advantages += row['estimate'] > 0 and row['p_value'] < results.ALPHA
+    slides.append([
+        title("Main Effects: The LLM Advantage"),
+        table(["Outcome", "LLM Effect", "p-value", "Interpretation"], rows,
+              [0.8, 3.5, 5.5, 7.5], [2.5, 2, 2, 5], 1.5),
+        text("LLM-generated appeals outperformed human-written appeals on ALL outcomes" if advantages == len(rows)
+             else f"LLM-generated appeals outperformed human-written appeals on {advantages} of {len(rows)} outcomes",
+             0.8, 4.5, 12, 0.5, font_size=24, color=ACCENT, bold=True),
+    ])
+
+    # ============== SLIDE 10: Gender Effects on Donation ==============
+    row, verdict, texts = tested('H2a')
+    zero = store.get('phase2/donation', 'genderFemale', part='zero')
+    if zero is not None and zero['p_value'] < results.ALPHA:
+        # The zero part models P(no donation), so a negative coefficient means women donate more often
+        participation = (f"✓ Women were {'more' if zero['estimate'] < 0 else 'less'} likely to donate at all "
+                         f"({_p_text(zero)})")
+    else:
+        participation = f"✗ Gender did NOT predict whether someone donated at all ({_p_text(zero)})"
+    slides.append([
+        title("Gender Effects on Donation"),
+        image(PHASE1_PLOTS + "donation_means.png", 0.8, 1.5, 5.5, 4.2),
+        box(7, 1.5, 5.3, 1.3, line=PRIMARY, shape='rounded'),
+        text(MISSING if row is None else f"${row['estimate']:.2g}", 7, 1.6, 5.3, 0.7, font_size=36, color=ACCENT,
+             bold=True, align='center'),
+        text(MISSING if row is None else f"Women donate {'more' if row['estimate'] > 0 else 'less'} ({_p_text(row)})",
+             7, 2.3, 5.3, 0.4, font_size=14, color=GRAY, align='center'),
+        text(f"{'✓' if verdict == 'Supported' else '✗'} {texts[verdict]}", 7, 3.2, 5.5, 0.5, font_size=16,
+             color=ACCENT if verdict == 'Supported' else LIGHT),
+        text(participation, 7, 3.8, 5.5, 0.5, font_size=16),
+    ])
+
+    # ============== SLIDES 11-13: Interactions ==============
+    interactions = [
+        ("Interaction: Engagement", 'H3', "interaction_engagement_like.png",
+         [("→ Both genders prefer LLM content", LIGHT),
+          ("→ Women show stronger preference for LLM appeals", ACCENT),
+          ("→ Steeper slope for women = significant interaction", LIGHT)]),
+        ("Interaction: Persuasiveness", 'H1', "interaction_persuasiveness.png",
+         [("→ Both rated LLM content as more persuasive", LIGHT),
+          ("→ Visible gap is not statistically significant", LIGHT)]),
+        ("Interaction: Donation Amount", 'H2b', "interaction_donation_fixed.png",
+         [("→ Women donate more across both conditions", LIGHT),
+          ("→ Parallel lines = no interaction", LIGHT)]),
+    ]
+    for heading, label, plot, points in interactions:
+        row, verdict, texts = tested(label)
+        significant = row is not None and row['p_value'] < results.ALPHA
+        result = (f"Gender × Content Source ({format_estimate(row)}, {_p_text(row)}) — "
+                  f"{'SIGNIFICANT' if significant else 'NOT SIGNIFICANT'}") if row is not None \
+            else f"Gender × Content Source ({MISSING})"
+        elements = [
+            title(heading),
+            text(result, 0.8, 1.0, 8, 0.4, font_size=18, color=GREEN if significant else RED),
+            image(PHASE3_PLOTS + plot, 0.8, 1.6, 5.5, 4.2),
+        ]
+        elements += [text(point, 6.8, 2 + 0.6 * i, 5.5, 0.4, font_size=18, color=color)
+                     for i, (point, color) in enumerate(points)]
+        supported = verdict == 'Supported'
+        elements += [
+            box(6.8, 4, 5.5, 1, fill=PANEL_GREEN if supported else PANEL_RED, shape='rounded'),
+            text(texts[verdict], 7, 4.3, 5, 0.6, font_size=16, color=GREEN if supported else RED),
+        ]
+        slides.append(elements)
+
+    # ============== SLIDE 14: Hypothesis Summary ==============
+    slides.append([
+        title("Hypothesis Testing Summary"),
+        table(["Hypothesis", "Prediction", "Result"],
+              [(label, HYPOTHESES[label][0], verdict_cell(tested(label)[1])) for label in HYPOTHESES],
+              [0.8, 2.5, 8], [1.5, 5.5, 4], 1.5, row_height=0.7, text_offset=0.2, text_inset=0.2),
+    ])
+
+    # ============== SLIDE 15: Discussion ==============
+    slides.append([
+        title("Discussion"),
+        bullet(0.8, 1.5, "1", '"Sincerity Gap": Gender differences appeared only for quick, automatic engagement — not for deeper judgments or actual behavior.'),
+        bullet(0.8, 2.5, "2", "Algorithm Aversion Not Activated: Participants weren't told about LLM authorship, so skepticism wasn't triggered."),
+        bullet(0.8, 3.5, "3", "Care Orientation Persists: Women's higher donations are triggered by distress signals — regardless of human or machine authorship."),
+    ])
+
+    # ============== SLIDE 16: Practical Implications ==============
+    slides.append([
+        title("Practical Implications"),
+        text("✓ LLMs can generate appeals that perform at least as well as human-written content", 0.8, 1.5, 7, 0.5, font_size=20),
+        text("✓ Especially useful for nonprofits with limited resources", 0.8, 2.1, 7, 0.5, font_size=20),
+        text("⚠️ Disclosure policies require caution — labeling may reduce impact", 0.8, 2.7, 7, 0.5, font_size=20),
+        text("→ Organizations face a trade-off between transparency and effectiveness", 0.8, 3.3, 7, 0.5, font_size=20),
+        # Key takeaway box
+        box(7.5, 1.5, 5, 3, fill=PANEL_BLUE, line=PRIMARY, shape='rounded'),
+        text("Key Takeaway:", 7.8, 1.8, 4.5, 0.4, font_size=18, bold=True),
+        text("Gender does not limit the value of LLMs in fundraising. Donors respond to content quality, not author identity.",
+             7.8, 2.3, 4.5, 2, font_size=18, color=ACCENT),
+    ])
+
+    # ============== SLIDE 17: Limitations ==============
+    elements = [title("Limitations & Future Research")]
+    limitations = [
+        "🔒 Participants not disclosed about LLM authorship",
+        "🎯 Single domain (cancer charities)",
+        "💰 Small donation amounts ($0.00-$0.10)",
+        "🇺🇸 U.S. sample only"
+    ]
+    y = 1.5
+    for lim in limitations:
+        elements += [box(0.8, y, 5.5, 0.6, shape='rounded'), text(lim, 1, y + 0.15, 5, 0.4, font_size=16)]
+        y += 0.7
+    elements += [
+        text("Future Directions", 7, 1.5, 5, 0.4, font_size=20, color=ACCENT, bold=True),
+        text("1. Test effects when LLM authorship is disclosed\n2. Explore other charitable domains\n3. Examine long-term donor relationships",
+             7, 2, 5.5, 2, font_size=16),
+    ]
+    slides.append(elements)
+
+    # ============== SLIDE 18: Conclusion ==============
+    slides.append([
+        title("Conclusion"),
+        box(1.5, 1.5, 10.3, 4, fill=PANEL_BLUE, line=PRIMARY, shape='rounded'),
+        text("LLM-generated donation appeals outperform human-written appeals across all outcomes.",
+             2, 2, 9, 0.8, font_size=22),
+        text("Gender differences do not limit the effectiveness of LLM-generated charitable appeals.",
+             2, 3, 9, 0.8, font_size=26, color=ACCENT, bold=True),
+        text("Women's higher generosity persists regardless of whether a human or machine wrote the appeal.",
+             2, 4, 9, 0.8, font_size=20, color=GRAY),
+    ])
+
+    # ============== SLIDE 19: Thank You ==============
+    slides.append([
+        title("Thank You", top=2, font_size=56, color=LIGHT, left=0, width=SLIDE_WIDTH, align='center'),
+        text("Questions?", 0, 3, SLIDE_WIDTH, 0.8, font_size=32, color=ACCENT, align='center'),
+        text("Salah-din Mrait\ns.mrait@tilburguniversity.edu\n\nSupervisor: John Caffier",
+             0, 4.5, SLIDE_WIDTH, 2, font_size=18, color=GRAY, align='center'),
+    ])
+    return slides
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the thesis presentation")
+    parser.add_argument('--output', default=DECK_PATH)
+    parser.add_argument('--dpi', type=int, default=IMAGE_DPI,
+                        help="pixels per inch of placement images are downscaled to (0 embeds the originals)")
+    parser.add_argument('--results-dir', default=None, help="results store to fill tables and verdicts from")
+    parser.add_argument('--force', action='store_true', help="rebuild even if nothing the deck shows has changed")
+    parser.add_argument('--skip-reference-check', action='store_true',
+                        help="build even if the store's significance disagrees with the R output")
+    args = parser.parse_args()
+    import results
+    store = results.ResultsStore.load(args.results_dir or results.RESULTS_DIR)
+    try:
+        slides = thesis_slides(store, check_reference=not args.skip_reference_check)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if not args.force and deck_is_current(slides, args.output, args.dpi):
+        print(f"PowerPoint presentation unchanged, not rebuilt: {args.output} (use --force to rebuild)")
+    else:
+        build_deck(slides, args.output, dpi=args.dpi, force=True)
+        print(f"PowerPoint presentation created: {args.output}")
@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy import linalg, optimize
+from scipy.sparse.linalg import splu
+
+# Schur complements up to this many levels are factored densely
+DENSE_LIMIT = 3000
+# Memory allowed for the per-size Gram matrices N_c'N_c of the Schur complement
+GRAM_MAX_BYTES = 128 * 1024 ** 2
+
+
+def _group_sums(codes, size, values):
+    # Z_g' values for an indicator matrix given by integer codes
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        return np.bincount(codes, weights=values, minlength=size)
+    return np.column_stack([np.bincount(codes, weights=values[:, j], minlength=size)
+                            for j in range(values.shape[1])])
+
+
+class GroupStructure:
+    """Level counts and the participant x post count matrix of one or two grouping factors.
+
+    A = Lambda'Z'Z Lambda + I has diagonal blocks for each factor, so the factor
+    with more levels is eliminated in closed form and only the Schur complement
+    on the other factor is factored. Everything here depends on the rows and
+    groups only, so one structure serves every model fitted to the same rows.
+    """
+
+    def __init__(self, codes, sizes):
+        if len(codes) not in (1, 2):
+            raise ValueError("GroupStructure supports one or two grouping factors")
+        # Eliminate the larger factor; order maps solver blocks back to the groups
+        self.order = np.argsort(sizes)[::-1] if len(sizes) == 2 else np.array([0])
+        self.codes = [np.asarray(codes[g]) for g in self.order]
+        self.sizes = [int(sizes[g]) for g in self.order]
+        self.n = len(self.codes[0])
+        self.counts = [np.bincount(c, minlength=s).astype(float) for c, s in zip(self.codes, self.sizes)]
+        self.N = self.gram = self.entry = None
+        if len(codes) == 2:
+            # entry maps each row to its stored element of N, so weighted counts
+            # reuse the sparsity pattern
+            pairs, self.entry = np.unique(self.codes[0].astype(np.int64) * self.sizes[1] + self.codes[1],
+                                          return_inverse=True)
+            self.N = sp.csr_matrix((np.bincount(self.entry).astype(float),
+                                    (pairs // self.sizes[1], pairs % self.sizes[1])), shape=tuple(self.sizes))
+            self.gram = self._size_class_grams()
+
+    def _size_class_grams(self):
+        # D in N'DN depends on a level only through its count, so N'DN is a
+        # weighted sum of the per-count Gram matrices (one per design, not per theta)
+        classes = np.unique(self.counts[0])
+        if self.sizes[1] > DENSE_LIMIT or len(classes) * self.sizes[1] ** 2 * 8 > GRAM_MAX_BYTES:
+            return None
+        grams = {}
+        for c in classes:
+            rows = self.N[self.counts[0] == c]
+            grams[c] = (rows.T @ rows).toarray()
+        return grams
+
+    def group_sizes(self):
+        """Number of levels of each factor, in the order the groups were given"""
+        sizes = [0] * len(self.sizes)
+        for position, g in enumerate(self.order):
+            sizes[g] = self.sizes[position]
+        return sizes
+
+    def split(self, u):
+        """Blocks of a stacked random-effects vector, in solver order"""
+        return np.split(u, np.cumsum(self.sizes)[:-1])
+
+    def expand(self, lam, u):
+        """Z Lambda u: the random-effects contribution of every row"""
+        return sum(l * b[c] for l, b, c in zip(lam, self.split(u), self.codes))
+
+    def project(self, lam, values):
+        """Lambda'Z' values, stacked in solver order"""
+        return np.concatenate([l * np.bincount(c, weights=values, minlength=s)
+                               for l, c, s in zip(lam, self.codes, self.sizes)])
+
+    @property
+    def nbytes(self):
+        total = sum(a.nbytes for a in self.counts + list((self.gram or {}).values()))
+        if self.N is not None:
+            total += self.N.data.nbytes + self.N.indices.nbytes + self.N.indptr.nbytes
+        return total
+
+    def factor(self, lam, weights=None):
+        """(solve, logdet, bytes) for A = Lambda'Z'WZ Lambda + I at block scales lam (solver order).
+
+        weights are per-row W (the identity if None); solve takes and returns
+        lists of blocks.
+        """
+        if weights is None:
+            counts, N, gram = self.counts, self.N, self.gram
+        else:
+            counts = [np.bincount(c, weights=weights, minlength=s) for c, s in zip(self.codes, self.sizes)]
+            N = None if self.N is None else sp.csr_matrix(
+                (np.bincount(self.entry, weights=weights), self.N.indices, self.N.indptr), shape=self.N.shape)
+            gram = None
+        d1 = 1.0 / (lam[0] ** 2 * counts[0] + 1.0)
+        logdet = -np.log(d1).sum()
+        if N is None:
+            return (lambda r: [d1[:, None] * r[0] if r[0].ndim > 1 else d1 * r[0]]), logdet, 0
+
+        ab = lam[0] * lam[1]
+        if gram is not None:
+            NtDN = sum(gram[c] / (lam[0] ** 2 * c + 1.0) for c in gram)
+        else:
+            NtDN = N.T @ sp.diags(d1) @ N
+            if self.sizes[1] <= DENSE_LIMIT:
+                NtDN = NtDN.toarray()
+        diagonal = lam[1] ** 2 * counts[1] + 1.0
+        if sp.issparse(NtDN):
+            S = sp.diags(diagonal) - ab ** 2 * NtDN
+        else:
+            S = -ab ** 2 * NtDN
+            S[np.diag_indices_from(S)] += diagonal
+        if self.sizes[1] <= DENSE_LIMIT:
+            chol = linalg.cho_factor(S, lower=True)
+            logdet += 2 * np.log(np.diag(chol[0])).sum()
+            solve_S = lambda r: linalg.cho_solve(chol, r)
+            nbytes = S.nbytes
+        else:
+            lu = splu(S.tocsc(), permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.0,
+                      options={'SymmetricMode': True})
+            logdet += np.log(np.abs(lu.U.diagonal())).sum()
+            solve_S = lu.solve
+            nbytes = (lu.L.nnz + lu.U.nnz) * 12
+
+        def solve(r):
+            # Block elimination: participants (diagonal) first, then the Schur system
+            r1, r2 = r
+            scale = d1[:, None] if r1.ndim > 1 else d1
+            s2 = solve_S(r2 - ab * (N.T @ (scale * r1)))
+            s1 = scale * (r1 - ab * (N @ s2))
+            return [s1, s2]
+
+        return solve, logdet, nbytes
+
+
+class CrossedDesign:
+    """Sufficient statistics of an LMM with one or two crossed random intercepts.
+
+    Nothing of size n_obs is kept; the group structure may be shared.
+    ZtX and Zty hold the group sums in the structure's solver order.
+    """
+
+    def __init__(self, structure, n, XtX, Xty, yty, ZtX, Zty):
+        self.structure = structure
+        self.order = structure.order
+        self.n, self.p = n, XtX.shape[0]
+        self.XtX, self.Xty, self.yty = XtX, Xty, float(yty)
+        self.ZtX, self.Zty = ZtX, Zty
+        self.evaluations = 0
+        self.peak_bytes = self.nbytes
+
+    @property
+    def nbytes(self):
+        arrays = [self.XtX, self.Xty] + self.ZtX + self.Zty
+        return sum(a.nbytes for a in arrays) + self.structure.nbytes
+
+    def pls(self, theta, reml=True):
+        """Penalized least squares solution and (RE)ML deviance at theta (given in group order)"""
+        self.evaluations += 1
+        lam = np.asarray(theta, dtype=float)[self.order]
+        solve, logdet_A, nbytes = self.structure.factor(lam)
+        self.peak_bytes = max(self.peak_bytes, self.nbytes + nbytes)
+
+        ZLtX = [l * m for l, m in zip(lam, self.ZtX)]
+        ZLty = [l * m for l, m in zip(lam, self.Zty)]
+        # One solve for [X | y]
+        solved = solve([np.column_stack([a, b]) for a, b in zip(ZLtX, ZLty)])
+        solved_X, solved_y = [s[:, :-1] for s in solved], [s[:, -1] for s in solved]
+        M = self.XtX - sum(a.T @ b for a, b in zip(ZLtX, solved_X))
+        beta = np.linalg.solve(M, self.Xty - sum(a.T @ b for a, b in zip(ZLtX, solved_y)))
+        u = [sy - sx @ beta for sx, sy in zip(solved_X, solved_y)]
+        # Minimum of ||y - X beta - Z Lambda u||^2 + ||u||^2 from the normal equations
+        r2 = self.yty - sum(a @ b for a, b in zip(ZLty, u)) - self.Xty @ beta
+        logdet_M = np.linalg.slogdet(M)[1]
+        dof = self.n - self.p if reml else self.n
+        deviance = logdet_A + (logdet_M if reml else 0.0) + dof * (1 + np.log(2 * np.pi * r2 / dof))
+
+        blocks = [None] * len(u)
+        for position, g in enumerate(self.order):
+            blocks[g] = lam[position] * u[position]
+        return {'deviance': deviance, 'beta': beta, 'b': blocks, 'r2': r2, 'M': M, 'dof': dof}
+
+    def optimize(self, theta0, reml=True):
+        """Minimize the profiled deviance over theta >= 0"""
+        return minimize_theta(lambda t: self.pls(t, reml)['deviance'], theta0)
+
+
+def minimize_theta(deviance, theta0):
+    """Derivative-free minimization of deviance(theta) over theta >= 0.
+
+    The deviance is even in each theta, so it is minimized over t with theta = |t|:
+    no bounds for the simplex to collapse against, and no gradient that vanishes
+    at theta = 0 (lme4 uses a derivative-free optimizer for the same reason).
+    """
+    res = optimize.minimize(lambda t: deviance(np.abs(t)), np.asarray(theta0, dtype=float),
+                            method='Nelder-Mead', options={'xatol': 1e-6, 'fatol': 1e-6})
+    res.x = np.abs(res.x)
+    return res
+
+
+def group_structure(df, groups):
+    """GroupStructure for the grouping columns of df"""
+    codes, sizes = [], []
+    for group in groups:
+        c, uniques = pd.factorize(df[group])
+        codes.append(c)
+        sizes.append(len(uniques))
+    return GroupStructure(codes, sizes)
+
+
+def crossed_design(X, y, df, groups, structure=None):
+    """CrossedDesign for the grouping columns of df, reusing structure if given"""
+    structure = structure or group_structure(df, groups)
+    y = np.asarray(y, dtype=float)
+    return CrossedDesign(structure, len(y), X.T @ X, X.T @ y, y @ y,
+                         [_group_sums(c, s, X) for c, s in zip(structure.codes, structure.sizes)],
+                         [_group_sums(c, s, y) for c, s in zip(structure.codes, structure.sizes)])
+
+
+class MomentBank:
+    """Cross-products of a bank of columns, W'W and Z_g'W for every grouping factor.
+
+    Models whose fixed effects and response are columns of the bank get their
+    CrossedDesign by slicing, without touching the rows again.
+    """
+
+    def __init__(self, W, names, df, groups):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.n = len(W)
+        self.WtW = W.T @ W
+        self.group_sums = {}
+        for group in groups:
+            codes, uniques = pd.factorize(df[group])
+            self.group_sums[group] = _group_sums(codes, len(uniques), W)
+
+    def design(self, x_names, y_name, structure, groups):
+        """CrossedDesign of y_name on x_names; structure must be built on the bank's rows for groups"""
+        ix, iy = [self.index[name] for name in x_names], self.index[y_name]
+        sums = [self.group_sums[groups[g]] for g in structure.order]
+        return CrossedDesign(structure, self.n, self.WtW[np.ix_(ix, ix)], self.WtW[ix, iy], self.WtW[iy, iy],
+                             [m[:, ix] for m in sums], [m[:, iy] for m in sums])
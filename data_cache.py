@@ -0,0 +1,110 @@
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+CACHE_DIR = '.cache'
+
+# Low-cardinality labels repeated on every row are stored as categoricals
+CATEGORICAL_COLUMNS = ['participant_id', 'gender', 'content_source', 'rating',
+                       'personalization_type', 'charity_id', 'cluster_id']
+ENGAGEMENT_LEVELS = ['Dislike', 'Neutral', 'Like']
+
+# post_text is constant per post_id, so it lives in its own dimension table
+POST_COLUMNS = ['post_id', 'post_text']
+
+
+def file_hash(filepath, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(filepath, cache_dir=CACHE_DIR, digest=None):
+    """Return the (rows, posts) cache paths for the current contents of filepath"""
+    if digest is None:
+        digest = file_hash(filepath)
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    prefix = os.path.join(cache_dir, f"{stem}-{digest[:16]}")
+    return prefix + '.rows.parquet', prefix + '.posts.parquet'
+
+
+def read_source(filepath, usecols=None):
+    """Read the long-format CSV with categorical label columns"""
+    dtype = {col: 'category' for col in CATEGORICAL_COLUMNS}
+    df = pd.read_csv(filepath, dtype=dtype, usecols=usecols)
+    if 'rating' in df.columns:
+        df['rating'] = df['rating'].cat.set_categories(ENGAGEMENT_LEVELS)
+    return df
+
+
+def remove_stale(filepath, cache_dir=CACHE_DIR, keep=()):
+    """Delete cache files left behind by earlier versions of filepath"""
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    keep = {os.path.abspath(path) for path in keep}
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(stem + '-') and name.endswith('.parquet') and os.path.abspath(path) not in keep:
+            os.remove(path)
+
+
+def convert_to_cache(filepath, cache_dir=CACHE_DIR):
+    """Convert the long-format CSV into a row table and a post dimension table"""
+    rows_path, posts_path = cache_paths(filepath, cache_dir)
+    print(f"Converting {filepath} to columnar cache...")
+    df = read_source(filepath)
+
+    posts = (df[POST_COLUMNS]
+             .drop_duplicates('post_id')
+             .sort_values('post_id')
+             .reset_index(drop=True))
+    rows = df.drop(columns=['post_text'])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    remove_stale(filepath, cache_dir, keep=(rows_path, posts_path))
+    # Write to temporary names first so an interrupted run never leaves a half-written cache
+    rows.to_parquet(rows_path + '.tmp', index=False)
+    posts.to_parquet(posts_path + '.tmp', index=False)
+    os.replace(rows_path + '.tmp', rows_path)
+    os.replace(posts_path + '.tmp', posts_path)
+    print(f"Cached {len(rows)} rows and {len(posts)} posts in {cache_dir}/")
+    return rows_path, posts_path
+
+
+def load_cached(filepath, cache_dir=CACHE_DIR, columns=None):
+    """Load the row table for filepath, building the cache if it is missing or stale"""
+    if not HAVE_PYARROW:
+        print("pyarrow not installed, reading CSV directly.")
+        usecols = None if columns is None else list(columns)
+        df = read_source(filepath, usecols=usecols)
+        return df.drop(columns=['post_text'], errors='ignore')
+
+    rows_path, _ = cache_paths(filepath, cache_dir)
+    if not os.path.exists(rows_path):
+        rows_path, _ = convert_to_cache(filepath, cache_dir)
+    return pd.read_parquet(rows_path, columns=columns)
+
+
+def load_posts(filepath, cache_dir=CACHE_DIR):
+    """Load the post_id -> post_text dimension table for filepath"""
+    if not HAVE_PYARROW:
+        df = pd.read_csv(filepath, usecols=POST_COLUMNS)
+        return df.drop_duplicates('post_id').sort_values('post_id').reset_index(drop=True)
+
+    _, posts_path = cache_paths(filepath, cache_dir)
+    if not os.path.exists(posts_path):
+        _, posts_path = convert_to_cache(filepath, cache_dir)
+    return pd.read_parquet(posts_path)
+
+
+if __name__ == "__main__":
+    convert_to_cache('Data_LongFormat.csv')
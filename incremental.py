@@ -0,0 +1,132 @@
+import hashlib
+import io
+import os
+import pickle
+
+import pandas as pd
+
+import aggregate
+import streaming
+from data_cache import CACHE_DIR
+
+STATE_VERSION = 2
+# Bytes just before the watermark offset that must be unchanged for an append-only refresh
+TAIL_BYTES = 1 << 16
+
+
+def state_path(filepath, cache_dir=CACHE_DIR):
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    return os.path.join(cache_dir, f"{stem}.incremental.pkl")
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != STATE_VERSION:
+        print("Incremental state has an old format, rebuilding.")
+        return None
+    return state
+
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+
+def _tail_digest(f, offset):
+    start = max(0, offset - TAIL_BYTES)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
+
+
+class _Window(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a binary file"""
+
+    def __init__(self, f, start, end):
+        f.seek(start)
+        self.f = f
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        data = self.f.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def _record_end(f, start):
+    # Offset just past the last complete CSV record after start. Newlines inside
+    # quoted post_text do not end a record, and a half-written last line is left
+    # for the next run.
+    f.seek(start)
+    pos = end = start
+    in_quotes = False
+    for line in f:
+        pos += len(line)
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes and line.endswith(b'\n'):
+            end = pos
+    return end
+
+
+def refresh(filepath, path=None, chunksize=streaming.DEFAULT_CHUNKSIZE, keys=aggregate.CELL_KEYS):
+    """Fold rows added to filepath since the last run into the persisted statistics"""
+    path = path or state_path(filepath)
+    state = load_state(path)
+
+    with open(filepath, 'rb') as f:
+        header = f.readline()
+        columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+        size = os.fstat(f.fileno()).st_size
+        appended = (state is not None and state['header'] == header and size >= state['offset']
+                    and _tail_digest(f, state['offset']) == state['tail_digest'])
+
+        if state is None:
+            summary, participants = streaming.ChunkSummary(keys), set()
+        else:
+            summary, participants = state['summary'], state['participants']
+        if appended:
+            # Append-only growth: parse only the bytes after the watermark offset
+            start = state['offset']
+        else:
+            # No state yet, or the file was rewritten: scan it all but fold in only
+            # participants that are not behind the watermark
+            if state is not None:
+                print("Source file was rewritten, folding in unseen participants only.")
+            start = len(header)
+        end = _record_end(f, start)
+
+        new_rows = 0
+        added = set()
+        if end > start:
+            reader = io.BufferedReader(_Window(f, start, end))
+            for chunk in pd.read_csv(reader, header=None, names=columns, chunksize=chunksize):
+                ids = chunk['participant_id'].astype(str)
+                if not appended:
+                    keep = ~ids.isin(participants)
+                    chunk, ids = chunk[keep], ids[keep]
+                added.update(set(ids) - participants)
+                if len(chunk):
+                    summary.update(chunk)
+                    new_rows += len(chunk)
+        participants |= added
+        print(f"Incremental refresh: {new_rows} new rows, {len(added)} new participants "
+              f"({len(participants)} processed in total).")
+
+        tail_digest = _tail_digest(f, end)
+
+    state = {'version': STATE_VERSION, 'header': header, 'offset': end,
+             'tail_digest': tail_digest, 'participants': participants, 'summary': summary}
+    save_state(state, path)
+    return summary
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+import aggregate
+
+# Keys analyses slice by; cells of all of them are the finest aggregates kept
+INDEX_KEYS = ['post_id', 'charity_id', 'cluster_id', 'personalization_type', 'counterfactual_code'] + \
+    aggregate.CELL_KEYS
+
+
+def _values(value):
+    return list(value) if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)) else [value]
+
+
+class GroupIndex:
+    """Integer codes of one key and its row lists in CSR form: rows of code c are order[indptr[c]:indptr[c + 1]]"""
+
+    def __init__(self, codes, labels):
+        self.codes = np.asarray(codes)
+        self.labels = pd.Index(labels)
+        valid = self.codes >= 0
+        # Missing values (code -1) sort first and are left out of every row list
+        self.order = np.argsort(self.codes, kind='stable')[len(self.codes) - valid.sum():]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(self.codes[valid], minlength=len(self.labels)))])
+
+    @classmethod
+    def from_series(cls, series):
+        codes, labels = pd.factorize(series, sort=True)
+        return cls(codes.astype(np.int32), labels)
+
+    def code(self, values):
+        """Codes of the given values; values not present are dropped"""
+        codes = self.labels.get_indexer(_values(values))
+        return codes[codes >= 0]
+
+    def rows(self, values):
+        """Row positions holding any of values, ascending"""
+        codes = self.code(values)
+        if len(codes) == 1:
+            return self.order[self.indptr[codes[0]]:self.indptr[codes[0] + 1]]
+        return np.sort(np.concatenate([self.order[self.indptr[c]:self.indptr[c + 1]] for c in codes] or [[]])
+                       .astype(np.int64))
+
+    def sizes(self):
+        return pd.Series(np.diff(self.indptr), index=self.labels)
+
+
+class IndexedFrame:
+    """Row table with group indexes per key and per-cell aggregates, built once at load time.
+
+    A slice costs the size of its smallest group rather than a scan of the
+    table, and the statistics of any grouping of the keys are merged from the
+    cached cells instead of being recomputed from rows.
+    """
+
+    def __init__(self, df, keys=INDEX_KEYS):
+        self.df = df
+        self.keys = [key for key in keys if key in df.columns]
+        self.index = {key: GroupIndex.from_series(df[key]) for key in self.keys}
+        self.cells = self._cell_stats()
+        # Per-key aggregates, memoized on the cells
+        for key in self.keys:
+            self.cells.collapse([key])
+
+    def _cell_stats(self):
+        # Grouping on one integer cell id from the key codes is much cheaper than grouping on every key
+        codes = [self.index[key].codes.astype(np.int64) for key in self.keys]
+        shape = [len(self.index[key].labels) for key in self.keys]
+        valid = np.all([c >= 0 for c in codes], axis=0)
+        flat = np.ravel_multi_index([np.where(valid, c, 0) for c in codes], shape)
+        cell, cell_codes = pd.factorize(flat[valid], sort=True)
+        df = self.df if valid.all() else self.df[valid]
+        stats = aggregate.CellStats.from_frame(df.assign(_cell=cell), ['_cell'])
+
+        levels = [self.index[key].labels for key in self.keys]
+        key_codes = np.unravel_index(cell_codes, shape)
+        moments = stats.moments.set_axis(pd.MultiIndex(levels, [c[stats.moments.index] for c in key_codes],
+                                                       names=self.keys))
+        tallies = {}
+        for var, tally in stats.tallies.items():
+            cells, values = tally.index.get_level_values(0), tally.index.levels[1]
+            index = pd.MultiIndex(levels + [values], [c[cells] for c in key_codes] + [tally.index.codes[1]],
+                                  names=self.keys + [tally.index.names[1]])
+            tallies[var] = tally.set_axis(index)
+        return aggregate.CellStats(self.keys, moments, tallies)
+
+    def __len__(self):
+        return len(self.df)
+
+    def rows(self, **filters):
+        """Row positions matching filters (key=value or key=[values]), starting from the smallest group"""
+        if not filters:
+            return np.arange(len(self.df))
+        unknown = set(filters) - set(self.index)
+        if unknown:
+            raise KeyError(f"not an indexed key: {', '.join(sorted(unknown))}")
+        sizes = {key: self.index[key].sizes().iloc[self.index[key].code(value)].sum()
+                 for key, value in filters.items()}
+        first = min(sizes, key=sizes.get)
+        rows = self.index[first].rows(filters[first])
+        for key, value in filters.items():
+            if key != first:
+                rows = rows[np.isin(self.index[key].codes[rows], self.index[key].code(value))]
+        return rows
+
+    def frame(self, **filters):
+        """The rows matching filters"""
+        return self.df.iloc[self.rows(**filters)]
+
+    def stats(self, keys=aggregate.CELL_KEYS, **filters):
+        """CellStats over keys for the rows matching filters, merged from the cached cells"""
+        keys = list(keys)
+        if not filters:
+            return self.cells.collapse(keys)
+        return self.cells.select(**filters).collapse(keys)
+
+    def sizes(self, key):
+        """Row count of every value of key"""
+        return self.index[key].sizes()
+
+
+def load_indexed(filepath='Data_LongFormat.csv', keys=INDEX_KEYS):
+    """IndexedFrame of the cached row table of filepath"""
+    import data_cache
+    df = data_cache.load_cached(filepath)
+    df['persuasiveness'] = df[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1)
+    return IndexedFrame(df, keys)
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    data = load_indexed()
+    print(f"Indexed {len(data)} rows by {', '.join(data.keys)} "
+          f"({len(data.cells.moments)} cells) in {time.perf_counter() - start:.2f} s")
+    for key in data.keys[:5]:
+        print(f"\nPersuasiveness by {key}:")
+        print(data.stats([key]).describe('persuasiveness', ['mean', 'std']).head(10))
@@ -0,0 +1,152 @@
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+REPORT_VERSION = 2
+MB = 1024 ** 2
+
+
+def _read_status(field):
+    # VmRSS / VmHWM of this process in bytes, or None off Linux
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_metadata():
+    """Interpreter, platform and command line of this run"""
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'argv': sys.argv}
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0), so each stage gets its own peak
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _snapshot():
+    # Allocations made by tracemalloc itself and the import machinery are noise here
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*'),
+    ])
+
+
+def _maxrss(who):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+class Instrumentation:
+    """Per-stage wall and CPU time, peak RSS, and opt-in tracemalloc snapshots and cProfile of one run.
+
+    Peak RSS is per stage where the kernel lets the high-water mark be reset
+    and the process peak so far otherwise. tracemalloc and cProfile only see
+    this process, and tracing every allocation slows the run several times over.
+    Worker pools only show up in the run-level children_max_rss_mb, which the
+    kernel cannot reset per stage.
+    """
+
+    def __init__(self, trace_memory=False, cprofile=False, top=10, profile_dir=None):
+        self.trace_memory = trace_memory
+        self.cprofile = cprofile
+        self.top = top
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._owns_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        """Record the block as one stage of the run report"""
+        per_stage_peak = _reset_peak_rss()
+        before = _snapshot() if self.trace_memory else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile() if self.cprofile else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            record = {
+                'name': name,
+                'seconds': time.perf_counter() - wall,
+                'cpu_seconds': time.process_time() - cpu,
+                'rss_mb': (_read_status('VmRSS') or 0) / MB,
+                'peak_rss_mb': (_read_status('VmHWM') if per_stage_peak else _maxrss(resource.RUSAGE_SELF)) / MB,
+                'peak_rss_scope': 'stage' if per_stage_peak else 'process',
+            }
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record.update(traced_mb=current / MB, traced_peak_mb=peak / MB,
+                              top_allocations=self._allocation_diff(before))
+            if profiler:
+                record['profile'] = self._profile_summary(name, profiler)
+            self.stages.append(record)
+
+    def _allocation_diff(self, before):
+        # Lines whose live allocations grew most during the stage
+        stats = _snapshot().compare_to(before, 'lineno')
+        return [{'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 'size_kb': stat.size_diff / 1024, 'count': stat.count_diff}
+                for stat in stats[:self.top]]
+
+    def _profile_summary(self, name, profiler):
+        # Top functions by cumulative time; the full profile is dumped for snakeviz/pstats if requested
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        summary = {}
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            summary['path'] = os.path.join(self.profile_dir, f"{name}.prof")
+            stats.dump_stats(summary['path'])
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:self.top]
+        summary['functions'] = [{'function': f"{filename}:{line}({function})", 'calls': calls,
+                                 'total_seconds': total, 'cumulative_seconds': cumulative}
+                                for (filename, line, function), (_, calls, total, cumulative, _) in rows]
+        return summary
+
+    def report(self, **metadata):
+        """The run report as a JSON-serializable dict"""
+        return {
+            'version': REPORT_VERSION,
+            'started': self.started.isoformat(),
+            'seconds': time.perf_counter() - self._start,
+            **run_metadata(),
+            **metadata,
+            # Largest RSS of any finished child process over the whole run, not per stage
+            'children_max_rss_mb': _maxrss(resource.RUSAGE_CHILDREN) / MB,
+            'stages': self.stages,
+        }
+
+    def write(self, path, **metadata):
+        with open(path, 'w') as f:
+            json.dump(self.report(**metadata), f, indent=1)
+        if self._owns_tracing:
+            tracemalloc.stop()
+        return path
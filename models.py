@@ -0,0 +1,570 @@
+import copy
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy import optimize, stats
+from scipy.sparse.linalg import splu
+from scipy.special import expit
+
+import aggregate
+import crossed
+from data_cache import CACHE_DIR
+
+# Reference level first, as in the R scripts
+LEVELS = {
+    'gender': ['Male', 'Female'],
+    'content_source': ['Human', 'LLM'],
+    'rating': aggregate.ENGAGEMENT_LEVELS,
+}
+GROUPS = ['participant_id', 'post_id']
+MAIN_EFFECTS = ['gender', 'content_source']
+INTERACTION = MAIN_EFFECTS + ['gender:content_source']
+
+FIT_CACHE_VERSION = 3
+FIT_CACHE_PATH = os.path.join(CACHE_DIR, 'models.pkl')
+
+
+# --- Design matrices ---
+
+def prepare(df):
+    """Add the persuasiveness composite if it is missing"""
+    if 'persuasiveness' not in df.columns:
+        df = df.assign(persuasiveness=df[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1))
+    return df
+
+
+def _term_columns(df, term, levels=None):
+    # Treatment-coded columns of one term; interactions are products of their parts
+    levels = {**LEVELS, **(levels or {})}
+    if ':' in term:
+        columns = {'': np.ones(len(df))}
+        for part in term.split(':'):
+            columns = {f"{a}:{b}" if a else b: x * y
+                       for a, x in columns.items() for b, y in _term_columns(df, part, levels).items()}
+        return columns
+    if term in levels or not pd.api.types.is_numeric_dtype(df[term]):
+        term_levels = levels.get(term) or sorted(df[term].dropna().unique())
+        values = df[term].astype(str).to_numpy()
+        return {f"{term}{level}": (values == level).astype(float) for level in term_levels[1:]}
+    return {term: df[term].to_numpy(dtype=float)}
+
+
+def fixed_design(df, terms, intercept=True, levels=None):
+    """Dense fixed-effects matrix with R-style column names; levels overrides LEVELS (reference first)"""
+    columns = {'(Intercept)': np.ones(len(df))} if intercept else {}
+    for term in terms:
+        columns.update(_term_columns(df, term, levels))
+    return np.column_stack(list(columns.values())), list(columns)
+
+
+def random_design(df, groups=GROUPS):
+    """Sparse indicator matrix [Z_1 | Z_2 | ...] for random intercepts of each grouping factor"""
+    blocks, sizes, names = [], [], []
+    for group in groups:
+        codes, uniques = pd.factorize(df[group])
+        blocks.append(sp.csr_matrix((np.ones(len(df)), (np.arange(len(df)), codes)),
+                                    shape=(len(df), len(uniques))))
+        sizes.append(len(uniques))
+        names.append(uniques)
+    return sp.hstack(blocks).tocsc(), sizes, names
+
+
+# --- Results ---
+
+class ModelResult:
+    """Fixed effects, variance components and fit statistics of one model"""
+
+    def __init__(self, name, family, coef, se, variances=None, n_obs=0, groups=None,
+                 loglik=None, converged=True, iterations=0, extra=None):
+        self.name = name
+        self.family = family
+        self.coef = pd.Series(coef)
+        self.se = pd.Series(se, index=self.coef.index)
+        self.variances = variances or {}
+        self.n_obs = n_obs
+        self.groups = groups or {}
+        self.loglik = loglik
+        self.converged = converged
+        self.iterations = iterations
+        self.extra = extra or {}
+
+    def table(self, level=0.95):
+        """Coefficient table with Wald z tests and CIs"""
+        z = self.coef / self.se
+        crit = stats.norm.ppf(0.5 + level / 2)
+        return pd.DataFrame({
+            'Estimate': self.coef,
+            'Std. Error': self.se,
+            'z value': z,
+            'Pr(>|z|)': 2 * stats.norm.sf(np.abs(z)),
+            'CI low': self.coef - crit * self.se,
+            'CI high': self.coef + crit * self.se,
+        })
+
+    def to_dict(self):
+        """JSON-serializable record of the fit, including the rendered summary"""
+        record = {
+            'name': self.name, 'family': self.family, 'n_obs': int(self.n_obs),
+            'groups': {g: int(n) for g, n in self.groups.items()},
+            'loglik': None if self.loglik is None else float(self.loglik),
+            'converged': bool(self.converged), 'iterations': int(self.iterations),
+            'coefficients': self.table().to_dict(orient='index'),
+            'variances': {g: float(v) for g, v in self.variances.items()},
+        }
+        if 'thresholds' in self.extra:
+            record['thresholds'] = self.extra['thresholds'].to_dict()
+        record['summary'] = self.summary()
+        return record
+
+    def summary(self):
+        lines = [f"{self.name} ({self.family})",
+                 f"Observations: {self.n_obs}" + ''.join(f", {g}: {n}" for g, n in self.groups.items())]
+        if self.loglik is not None:
+            lines.append(f"Log-likelihood: {self.loglik:.3f}   Converged: {self.converged}   "
+                         f"Iterations: {self.iterations}")
+        if 'peak_bytes' in self.extra:
+            lines.append(f"Solver: {self.extra['solver']}, {self.extra['evaluations']} deviance evaluations, "
+                         f"{self.extra['peak_bytes'] / 1024 ** 2:.1f} MB working memory")
+        if self.variances:
+            lines.append("Random effects (variance, std. dev.):")
+            for group, var in self.variances.items():
+                lines.append(f"  {group:<15} {var:12.6g} {np.sqrt(var):12.6g}")
+        lines.append("Fixed effects:")
+        lines.append(self.table().to_string(float_format='{:.6g}'.format))
+        if self.family.startswith('ordinal') or self.family.startswith('binomial'):
+            lines.append("Odds ratios:")
+            lines.append(np.exp(self.coef).to_string(float_format='{:.4f}'.format))
+        return '\n'.join(lines)
+
+
+# --- Fit cache ---
+
+def dataset_digest(df, columns):
+    """Digest of the given columns of df (values and row order)"""
+    hashes = pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def _term_variables(terms):
+    return sorted({part for term in terms for part in term.split(':')})
+
+
+class FitCache:
+    """Fitted models and group structures keyed by the digest of the rows they used.
+
+    An identical model (same rows, family, response, terms and groups) is
+    returned from the cache; a model that extends a cached one is warm-started
+    from it. Group structures are kept in memory only.
+    """
+
+    def __init__(self):
+        self.fits = {}
+        self.structures = {}
+        # (key, result) of every fit made by this process, for merging across workers
+        self.added = []
+        self.reused = self.warm_started = self.cold = 0
+
+    def structure(self, df, groups):
+        key = (dataset_digest(df, groups), tuple(groups))
+        if key not in self.structures:
+            self.structures[key] = crossed.group_structure(df, groups)
+        return self.structures[key]
+
+    def fit(self, df, family, response, terms, groups, name, fit):
+        """Return the cached model or run fit(warm), where warm is the largest nested cached fit or None"""
+        digest = dataset_digest(df, [response] + _term_variables(terms) + list(groups))
+        key = (digest, family, response, tuple(groups))
+        candidates = self.fits.setdefault(key, [])
+        for result in candidates:
+            if result.extra['terms'] == tuple(terms):
+                self.reused += 1
+                result = copy.copy(result)
+                result.name = name
+                return result
+        nested = [r for r in candidates if set(r.extra['terms']) < set(terms)]
+        warm = max(nested, key=lambda r: len(r.extra['terms']), default=None)
+        if warm is None:
+            self.cold += 1
+        else:
+            self.warm_started += 1
+        result = fit(warm)
+        result.extra['terms'] = tuple(terms)
+        candidates.append(result)
+        self.added.append((key, result))
+        return result
+
+    def merge(self, added):
+        """Add fits made elsewhere (e.g. FitCache.added of a worker) unless already present"""
+        for key, result in added:
+            candidates = self.fits.setdefault(key, [])
+            if all(r.extra['terms'] != result.extra['terms'] for r in candidates):
+                candidates.append(result)
+
+    def report(self):
+        return (f"Model cache: {self.reused} reused, {self.warm_started} warm-started, "
+                f"{self.cold} cold fits.")
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump({'version': FIT_CACHE_VERSION, 'fits': self.fits}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        cache = cls()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            if state.get('version') == FIT_CACHE_VERSION:
+                cache.fits = state['fits']
+        return cache
+
+
+def _fit_cached(cache, df, family, response, terms, groups, name, fit):
+    if cache is None:
+        result = fit(None)
+        result.extra['terms'] = tuple(terms)
+        return result
+    return cache.fit(df, family, response, terms, groups, name, fit)
+
+
+# --- Linear mixed model ---
+
+def _splu_spd(A):
+    # LU of a symmetric positive definite matrix with symmetric pivoting
+    return splu(A.tocsc(), permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.0,
+                options={'SymmetricMode': True})
+
+
+def _lmm_pls(X, Z, y, theta, sizes, reml=True):
+    # Penalized least squares for relative covariance factors theta (lme4's formulation)
+    n, p = X.shape
+    lam = np.repeat(theta, sizes)
+    ZL = Z @ sp.diags(lam)
+    A = ZL.T @ ZL + sp.identity(Z.shape[1], format='csc')
+    lu = _splu_spd(A)
+    logdet_A = np.log(np.abs(lu.U.diagonal())).sum()
+
+    ZLtX = ZL.T @ X
+    ZLty = ZL.T @ y
+    solved_X = lu.solve(ZLtX)
+    solved_y = lu.solve(ZLty)
+    M = X.T @ X - ZLtX.T @ solved_X
+    beta = np.linalg.solve(M, X.T @ y - ZLtX.T @ solved_y)
+    u = solved_y - solved_X @ beta
+    resid = y - X @ beta - ZL @ u
+    r2 = resid @ resid + u @ u
+    logdet_M = np.linalg.slogdet(M)[1]
+    if reml:
+        dof = n - p
+        deviance = logdet_A + logdet_M + dof * (1 + np.log(2 * np.pi * r2 / dof))
+    else:
+        dof = n
+        deviance = logdet_A + n * (1 + np.log(2 * np.pi * r2 / n))
+    return {'deviance': deviance, 'beta': beta, 'u': u, 'b': lam * u, 'r2': r2, 'M': M, 'dof': dof}
+
+
+def lmm_result(design, names, groups, reml=True, theta0=None, name=''):
+    """Fit an LMM from a crossed.CrossedDesign and return its ModelResult"""
+    start = np.ones(len(groups)) if theta0 is None else np.asarray(theta0, dtype=float)
+    res = design.optimize(start, reml)
+    pls = design.pls(res.x, reml)
+    solver_info = {'solver': 'crossed', 'evaluations': design.evaluations, 'peak_bytes': design.peak_bytes}
+    return _lmm_summary(pls, res, names, groups, design.structure.group_sizes(), design.n, reml,
+                        name, solver_info)
+
+
+def _lmm_summary(pls, res, names, groups, sizes, n_obs, reml, name, solver_info):
+    sigma2 = pls['r2'] / pls['dof']
+    cov = sigma2 * np.linalg.inv(pls['M'])
+    variances = {group: sigma2 * t ** 2 for group, t in zip(groups, res.x)}
+    variances['Residual'] = sigma2
+    return ModelResult(
+        name, 'gaussian (REML)' if reml else 'gaussian (ML)', dict(zip(names, pls['beta'])),
+        np.sqrt(np.diag(cov)), variances, n_obs, dict(zip(groups, sizes)), loglik=-pls['deviance'] / 2,
+        converged=res.success, iterations=res.nit,
+        extra={'theta': res.x, 'sigma2': sigma2, 'cov': cov, **solver_info})
+
+
+def fit_lmm(df, response, terms, groups=GROUPS, reml=True, name=None, theta0=None, solver='crossed',
+            cache=None):
+    """Linear mixed model with crossed random intercepts, fitted by (RE)ML.
+
+    solver='crossed' works from sufficient statistics and the Schur complement
+    on the smaller grouping factor (one or two factors); solver='sparse' runs
+    the general sparse LU on the full random-effects system. With a FitCache,
+    theta is warm-started from a nested model fitted to the same rows.
+    """
+    name = name or f"{response} ~ {' + '.join(terms)}"
+    family = 'gaussian (REML)' if reml else 'gaussian (ML)'
+
+    def fit(warm):
+        X, names = fixed_design(df, terms)
+        y = df[response].to_numpy(dtype=float)
+        start = warm.extra['theta'] if warm is not None else theta0
+
+        if solver == 'crossed':
+            structure = cache.structure(df, groups) if cache is not None else None
+            design = crossed.crossed_design(X, y, df, groups, structure)
+            return lmm_result(design, names, groups, reml, start, name)
+        start = np.ones(len(groups)) if start is None else np.asarray(start, dtype=float)
+        Z, sizes, _ = random_design(df, groups)
+        res = crossed.minimize_theta(lambda t: _lmm_pls(X, Z, y, t, sizes, reml)['deviance'], start)
+        pls = _lmm_pls(X, Z, y, res.x, sizes, reml)
+        return _lmm_summary(pls, res, names, groups, sizes, len(y), reml, name,
+                            {'solver': 'sparse', 'evaluations': res.nfev})
+
+    return _fit_cached(cache, df, family, response, terms, groups, name, fit)
+
+
+# --- Logistic regression (zero part of the hurdle) ---
+
+def fit_logistic(df, response, terms, name=None, max_iter=50, tol=1e-10, cache=None):
+    """Fixed-effects logistic regression by IRLS; response is a 0/1 array or column"""
+    name = name or f"logit ~ {' + '.join(terms)}"
+
+    def fit(warm):
+        X, names = fixed_design(df, terms)
+        y = np.asarray(df[response] if isinstance(response, str) else response, dtype=float)
+        beta = np.zeros(X.shape[1]) if warm is None else warm.coef.reindex(names, fill_value=0.0).to_numpy()
+        for iteration in range(1, max_iter + 1):
+            mu = expit(X @ beta)
+            w = np.clip(mu * (1 - mu), 1e-12, None)
+            step = np.linalg.solve(X.T @ (X * w[:, None]), X.T @ (y - mu))
+            beta += step
+            if np.max(np.abs(step)) < tol:
+                break
+        mu = expit(X @ beta)
+        info = X.T @ (X * (mu * (1 - mu))[:, None])
+        cov = np.linalg.inv(info)
+        loglik = np.sum(y * np.log(mu) + (1 - y) * np.log1p(-mu))
+        return ModelResult(name, 'binomial (logit)', dict(zip(names, beta)), np.sqrt(np.diag(cov)),
+                           n_obs=len(y), loglik=loglik, converged=iteration < max_iter,
+                           iterations=iteration, extra={'cov': cov})
+
+    if not isinstance(response, str):
+        cache = None
+    return _fit_cached(cache, df, 'binomial (logit)', response, terms, (), name, fit)
+
+
+def fit_glmm_logistic(df, response, terms, groups=GROUPS, name=None, cache=None):
+    """Logistic regression with crossed random intercepts (Laplace approximation).
+
+    Standard errors come from the Hessian over the fixed effects with the
+    variance parameters held at their estimates, as in fit_clmm.
+    """
+    name = name or f"logit ~ {' + '.join(terms)}"
+    family = 'binomial (logit, Laplace)'
+
+    def fit(warm):
+        X, names = fixed_design(df, terms)
+        y = df[response].to_numpy(dtype=float)
+        structure = cache.structure(df, groups) if cache is not None else crossed.group_structure(df, groups)
+        p, state = X.shape[1], {'u': None}
+
+        def negloglik(params, theta=None):
+            theta = np.abs(params[p:]) if theta is None else theta
+            value, state['u'] = _laplace(X @ params[:p], structure, lambda eta: _binomial_derivatives(eta, y),
+                                         theta, state['u'])
+            return -value
+
+        if warm is not None:
+            params0 = np.concatenate([warm.coef.reindex(names, fill_value=0.0).to_numpy(), warm.extra['theta']])
+            state['u'] = warm.extra['u']
+        else:
+            # Fixed-effects logit as the starting point
+            start = fit_logistic(df, response, terms)
+            params0 = np.concatenate([start.coef.reindex(names).to_numpy(), np.ones(len(groups))])
+        res = optimize.minimize(negloglik, params0, method='L-BFGS-B')
+        beta, theta = res.x[:p], np.abs(res.x[p:])
+        cov = np.linalg.inv(_numeric_hessian(lambda b: negloglik(b, theta), beta))
+        return ModelResult(
+            name, family, dict(zip(names, beta)), np.sqrt(np.diag(cov)),
+            {g: t ** 2 for g, t in zip(groups, theta)}, len(y), dict(zip(groups, structure.group_sizes())),
+            loglik=-res.fun, converged=res.success, iterations=res.nit,
+            extra={'theta': theta, 'u': state['u'], 'cov': cov})
+
+    return _fit_cached(cache, df, family, response, terms, groups, name, fit)
+
+
+class HurdleResult:
+    """Two-part model: logistic GLMM for a zero donation plus an LMM for positive amounts"""
+
+    def __init__(self, zero, amount):
+        self.zero = zero
+        self.amount = amount
+
+    def to_dict(self):
+        return {'name': self.amount.name, 'family': 'hurdle', 'zero': self.zero.to_dict(),
+                'amount': self.amount.to_dict(), 'summary': self.summary()}
+
+    def summary(self):
+        return '\n\n'.join([
+            "Zero part (probability of a zero donation; OR < 1 means more likely to donate):",
+            self.zero.summary(),
+            "Conditional part (amount | donation > 0):",
+            self.amount.summary(),
+        ])
+
+
+def fit_hurdle(df, terms, zero_terms=MAIN_EFFECTS, groups=GROUPS, name='donation_amount', cache=None):
+    """Hurdle model for donation_amount with the zero part on zero_terms; both parts have the random intercepts"""
+    is_zero = (df['donation_amount'] == 0).to_numpy(dtype=float)
+    zero = fit_glmm_logistic(df.assign(zero_donation=is_zero), 'zero_donation', zero_terms, groups,
+                             name=f"{name}: P(zero) ~ {' + '.join(zero_terms)}", cache=cache)
+    donors = df[is_zero == 0]
+    amount = fit_lmm(donors, 'donation_amount', terms, groups,
+                     name=f"{name} | > 0 ~ {' + '.join(terms)}", cache=cache)
+    return HurdleResult(zero, amount)
+
+
+# --- Cumulative-logit mixed model ---
+
+def _ordinal_derivatives(eta, y, cuts):
+    # log P(Y = y) under logit P(Y <= k) = cut_k - eta, with its first and
+    # (negated) second derivatives with respect to eta
+    upper = np.append(cuts, np.inf)[y]
+    lower = np.insert(cuts, 0, -np.inf)[y]
+    F_u, F_l = expit(upper - eta), expit(lower - eta)
+    f_u, f_l = F_u * (1 - F_u), F_l * (1 - F_l)
+    p = np.clip(F_u - F_l, 1e-300, None)
+    dp = f_l - f_u
+    d2p = f_u * (1 - 2 * F_u) - f_l * (1 - 2 * F_l)
+    score = dp / p
+    weight = score ** 2 - d2p / p
+    return np.log(p), score, weight
+
+
+def _binomial_derivatives(eta, y):
+    # log P(Y = y) of a logit model with its score and weight with respect to eta
+    mu = expit(eta)
+    return y * eta - np.logaddexp(0, eta), y - mu, mu * (1 - mu)
+
+
+def _laplace_ordinal(X, structure, y, cuts, beta, theta, u0=None, max_iter=50, tol=1e-8):
+    offset = X @ beta if X.shape[1] else np.zeros(len(y))
+    return _laplace(offset, structure, lambda eta: _ordinal_derivatives(eta, y, cuts), theta, u0, max_iter, tol)
+
+
+def _laplace(offset, structure, derivatives, theta, u0=None, max_iter=50, tol=1e-8):
+    # Laplace approximation to the marginal log-likelihood; Newton iterations for the
+    # modes, with the Hessian factored by crossed.GroupStructure (u is in solver order).
+    # derivatives(eta) returns the per-row log-likelihood, score and weight.
+    lam = np.asarray(theta, dtype=float)[structure.order]
+    u = np.zeros(sum(structure.sizes)) if u0 is None else u0.copy()
+
+    def objective(u):
+        logp, score, weight = derivatives(offset + structure.expand(lam, u))
+        return logp.sum() - 0.5 * u @ u, score, weight
+
+    value, score, weight = objective(u)
+    for iteration in range(max_iter):
+        solve, _, _ = structure.factor(lam, weight)
+        step = np.concatenate(solve(structure.split(structure.project(lam, score) - u)))
+        scale = 1.0
+        while True:
+            candidate = u + scale * step
+            new_value, new_score, new_weight = objective(candidate)
+            if new_value >= value - 1e-12 or scale < 1e-8:
+                break
+            scale /= 2
+        u, value, score, weight = candidate, new_value, new_score, new_weight
+        if np.max(np.abs(scale * step)) < tol:
+            break
+    _, logdet, _ = structure.factor(lam, weight)
+    return value - 0.5 * logdet, u
+
+
+def _numeric_hessian(f, x, h=1e-4):
+    k = len(x)
+    H = np.empty((k, k))
+    for i in range(k):
+        for j in range(i, k):
+            e_i, e_j = np.eye(k)[i] * h, np.eye(k)[j] * h
+            H[i, j] = H[j, i] = (f(x + e_i + e_j) - f(x + e_i - e_j) - f(x - e_i + e_j) + f(x - e_i - e_j)) / (4 * h * h)
+    return H
+
+
+def fit_clmm(df, response, terms, groups=GROUPS, name=None, start=None, cache=None):
+    """Cumulative-logit model with crossed random intercepts (Laplace approximation).
+
+    Standard errors come from the Hessian over thresholds and fixed effects with
+    the variance parameters held at their estimates. With a FitCache, a model
+    extending a cached one starts from its thresholds, effects, variances and
+    conditional modes.
+    """
+    name = name or f"{response} ~ {' + '.join(terms)}"
+    family = 'ordinal (cumulative logit, Laplace)'
+
+    def fit(warm):
+        levels = LEVELS.get(response) or sorted(df[response].dropna().unique())
+        y = pd.Categorical(df[response].astype(str), categories=levels).codes
+        X, names = fixed_design(df, terms, intercept=False)
+        structure = cache.structure(df, groups) if cache is not None else crossed.group_structure(df, groups)
+        sizes = structure.group_sizes()
+        n_cuts, p, k = len(levels) - 1, X.shape[1], len(groups)
+        state = {'u': None}
+
+        def unpack(params):
+            # Thresholds are kept ordered through log-increments
+            cuts = np.cumsum(np.concatenate([params[:1], np.exp(params[1:n_cuts])]))
+            return cuts, params[n_cuts:n_cuts + p], np.abs(params[n_cuts + p:])
+
+        def negloglik(params):
+            cuts, beta, theta = unpack(params)
+            value, state['u'] = _laplace_ordinal(X, structure, y, cuts, beta, theta, state['u'])
+            return -value
+
+        params0 = start
+        if warm is not None:
+            old = warm.extra['start']
+            beta0 = warm.coef.reindex(names, fill_value=0.0).to_numpy()
+            params0 = np.concatenate([old[:n_cuts], beta0, old[n_cuts + len(warm.coef):]])
+            state['u'] = warm.extra['u']
+        elif params0 is None:
+            cum = np.cumsum(np.bincount(y, minlength=len(levels)))[:-1] / len(y)
+            cuts0 = np.log(cum / (1 - cum))
+            params0 = np.concatenate([cuts0[:1], np.log(np.diff(cuts0)), np.zeros(p), np.ones(k)])
+        res = optimize.minimize(negloglik, params0, method='L-BFGS-B')
+        cuts, beta, theta = unpack(res.x)
+
+        def negloglik_natural(params):
+            value, _ = _laplace_ordinal(X, structure, y, params[:n_cuts], params[n_cuts:], theta, state['u'])
+            return -value
+
+        natural = np.concatenate([cuts, beta])
+        cov = np.linalg.inv(_numeric_hessian(negloglik_natural, natural))
+        se = np.sqrt(np.diag(cov))
+        cut_names = [f"{a}|{b}" for a, b in zip(levels[:-1], levels[1:])]
+        return ModelResult(
+            name, family, dict(zip(names, beta)), se[n_cuts:], {g: t ** 2 for g, t in zip(groups, theta)},
+            len(y), dict(zip(groups, sizes)), loglik=-res.fun, converged=res.success, iterations=res.nit,
+            extra={'thresholds': pd.Series(cuts, index=cut_names), 'threshold_se': se[:n_cuts],
+                   'theta': theta, 'start': res.x, 'u': state['u'], 'cov': cov[n_cuts:, n_cuts:]})
+
+    return _fit_cached(cache, df, family, response, terms, groups, name, fit)
+
+
+# --- Phase reports (Python counterparts of the R scripts) ---
+
+def main(cache_path=FIT_CACHE_PATH, workers=None):
+    # The phase reports are assembled from per-model jobs, see scheduler.phase_jobs
+    import scheduler
+    scheduler.main(workers=workers, cache_path=cache_path)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Phase 2/3 mixed models on Data_LongFormat.csv")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per model up to the CPU count)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"refit every model instead of reusing the fits stored in {FIT_CACHE_PATH}")
+    args = parser.parse_args()
+    main(cache_path=None if args.no_cache else FIT_CACHE_PATH, workers=args.workers)
@@ -0,0 +1,219 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import crossed
+import models
+
+COVARIATES = ['age', 'ideology', 'religiosity', 'familiar']
+TRANSFORMS = {
+    'raw': lambda y: y,
+    'log1p': np.log1p,
+    'standardized': lambda y: (y - y.mean()) / y.std(),
+}
+# outcome -> (response column, transforms, models)
+OUTCOMES = {
+    'engagement': ('rating', ['ordinal'], ['clmm']),
+    'persuasiveness': ('persuasiveness', ['raw', 'standardized'], ['lmm']),
+    'donation': ('donation_amount', ['raw', 'log1p', 'standardized'], ['all rows', 'donors only', 'hurdle']),
+}
+RANDOM_EFFECTS = {
+    'crossed': ['participant_id', 'post_id'],
+    'participant': ['participant_id'],
+    'post': ['post_id'],
+}
+TERMS = {'main': models.MAIN_EFFECTS, 'interaction': models.INTERACTION}
+REFERENCES = {
+    f"{gender}/{source}": {
+        'gender': [gender] + [g for g in models.LEVELS['gender'] if g != gender],
+        'content_source': [source] + [s for s in models.LEVELS['content_source'] if s != source],
+    }
+    for gender in models.LEVELS['gender'] for source in models.LEVELS['content_source']
+}
+SPEC_COLUMNS = ['outcome', 'transform', 'model', 'random_effects', 'covariates', 'terms', 'reference']
+DEFAULT_CHUNK = 8
+
+
+def enumerate_specs(outcomes=None, covariates=COVARIATES):
+    """Every combination of the specification choices, as dicts keyed by SPEC_COLUMNS"""
+    subsets = [combo for size in range(len(covariates) + 1) for combo in itertools.combinations(covariates, size)]
+    specs = []
+    for outcome in outcomes or OUTCOMES:
+        _, transforms, model_choices = OUTCOMES[outcome]
+        for transform, model, random_effects, subset, terms, reference in itertools.product(
+                transforms, model_choices, RANDOM_EFFECTS, subsets, TERMS, REFERENCES):
+            specs.append({'outcome': outcome, 'transform': transform, 'model': model,
+                          'random_effects': random_effects, 'covariates': '+'.join(subset),
+                          'terms': terms, 'reference': reference})
+    return specs
+
+
+def reference_map(terms, levels, intercept=True):
+    """(A, names) with X_default = X_levels @ A for the gender x content_source columns of terms.
+
+    Changing reference levels only reparametrizes the fixed effects, so the
+    estimates under levels are A @ beta and their covariance A cov A'. Without
+    an intercept (clmm) the extra last row of A is a shift of the thresholds.
+    """
+    cells = pd.DataFrame(list(itertools.product(models.LEVELS['gender'], models.LEVELS['content_source'])),
+                         columns=['gender', 'content_source'])
+    X_a, _ = models.fixed_design(cells, terms, intercept)
+    X_b, names = models.fixed_design(cells, terms, intercept, levels)
+    if not intercept:
+        X_b = np.column_stack([X_b, np.ones(len(cells))])
+    A = np.linalg.lstsq(X_b, X_a, rcond=None)[0]
+    return A[:len(names)], names
+
+
+class _Dataset:
+    """Rows of one model family with a moment bank of every fixed-effect and response column"""
+
+    def __init__(self, df):
+        self.df = df
+        self.term_columns = {term: list(models._term_columns(df, term))
+                             for term in models.INTERACTION + COVARIATES}
+        X, names = models.fixed_design(df, models.INTERACTION + COVARIATES)
+        responses = {}
+        for outcome in ('persuasiveness', 'donation'):
+            response, transforms, _ = OUTCOMES[outcome]
+            for transform in transforms:
+                responses[f"{response}:{transform}"] = TRANSFORMS[transform](df[response].to_numpy(dtype=float))
+        W = np.column_stack([X] + list(responses.values()))
+        self.bank = crossed.MomentBank(W, names + list(responses), df, models.GROUPS)
+        self.structures = {}
+
+    def x_names(self, terms):
+        return ['(Intercept)'] + [name for term in terms for name in self.term_columns[term]]
+
+    def structure(self, random_effects):
+        if random_effects not in self.structures:
+            self.structures[random_effects] = crossed.group_structure(self.df, RANDOM_EFFECTS[random_effects])
+        return self.structures[random_effects]
+
+
+# Per-process state: the prepared datasets and small caches shared by the specs a process fits
+_state = {}
+
+
+def _worker_state(source):
+    if _state.get('source') != source:
+        import data_cache
+        df = models.prepare(data_cache.load_cached(source))
+        df = df.assign(zero_donation=(df['donation_amount'] == 0).astype(float))
+        _state.clear()
+        _state.update(source=source, datasets={'all': _Dataset(df), 'donors': _Dataset(df[df['donation_amount'] > 0])},
+                      fits=models.FitCache(), theta={})
+    return _state
+
+
+def _fit_base(spec, state):
+    # Fit one specification at the default reference levels; returns {part: (result, intercept)}
+    terms = TERMS[spec['terms']] + [c for c in spec['covariates'].split('+') if c]
+    groups = RANDOM_EFFECTS[spec['random_effects']]
+    if spec['outcome'] == 'engagement':
+        df = state['datasets']['all'].df
+        return {'': (models.fit_clmm(df, 'rating', terms, groups), False)}
+
+    response = OUTCOMES[spec['outcome']][0]
+    data = 'donors' if spec['model'] in ('donors only', 'hurdle') else 'all'
+    dataset = state['datasets'][data]
+    x_names, y_name = dataset.x_names(terms), f"{response}:{spec['transform']}"
+    design = dataset.bank.design(x_names, y_name, dataset.structure(spec['random_effects']), groups)
+    warm_key = (data, y_name, spec['random_effects'])
+    result = models.lmm_result(design, x_names, groups, theta0=state['theta'].get(warm_key), name=y_name)
+    state['theta'][warm_key] = result.extra['theta']
+    if spec['model'] != 'hurdle':
+        return {'': (result, True)}
+
+    # The zero part is a logistic GLMM with the spec's random effects, as in models.fit_hurdle; it does not
+    # depend on the transform, so the cache fits it once per terms and groups and warm-starts nested terms
+    zero = models.fit_glmm_logistic(state['datasets']['all'].df, 'zero_donation', terms, groups,
+                                    cache=state['fits'])
+    return {'amount': (result, True), 'zero': (zero, True)}
+
+
+def _rows(spec, parts, references):
+    rows = []
+    focal = TERMS[spec['terms']]
+    for part, (result, intercept) in parts.items():
+        coef = result.coef.to_numpy()
+        cov = result.extra['cov']
+        for reference in references:
+            A, names = reference_map(focal, REFERENCES[reference], intercept)
+            # The gender x content_source block leads the coefficient vector
+            k = A.shape[1]
+            beta = A @ coef[:k]
+            se = np.sqrt(np.einsum('ij,jk,ik->i', A, cov[:k, :k], A))
+            for name, b, s in zip(names, beta, se):
+                if name == '(Intercept)':
+                    continue
+                rows.append({**spec, 'reference': reference, 'part': part, 'term': name, 'estimate': b,
+                             'se': s, 'p_value': 2 * stats.norm.sf(abs(b / s)), 'n_obs': result.n_obs,
+                             'converged': result.converged})
+    return rows
+
+
+def _run_chunk(bases, source):
+    state = _worker_state(source)
+    rows = []
+    for spec, references in bases:
+        rows += _rows(spec, _fit_base(spec, state), references)
+    return rows
+
+
+def run_multiverse(specs, source='Data_LongFormat.csv', workers=None, chunk=DEFAULT_CHUNK):
+    """Fit specs in batches and return one row per specification, model part and focal coefficient.
+
+    Specifications that differ only in reference levels are fitted once and
+    reparametrized. Each worker prepares the data, the moment banks and the
+    group structures once; LMM specifications are then sliced from the banks.
+    """
+    bases = {}
+    for spec in specs:
+        key = tuple(spec[c] for c in SPEC_COLUMNS if c != 'reference')
+        bases.setdefault(key, ({**spec, 'reference': None}, []))[1].append(spec['reference'])
+    # clmm specifications are the slow ones, so they go first
+    bases = sorted(bases.values(), key=lambda base: base[0]['outcome'] != 'engagement')
+    chunks = [bases[i:i + chunk] for i in range(0, len(bases), chunk)]
+    print(f"Fitting {len(bases)} base specifications ({len(specs)} with reference levels) "
+          f"in {len(chunks)} batches...")
+
+    start, rows = time.perf_counter(), []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _state.clear()
+        for i, part in enumerate(chunks, 1):
+            rows += _run_chunk(part, source)
+            print(f"  {i}/{len(chunks)} batches ({time.perf_counter() - start:.0f} s)")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, part, source) for part in chunks]
+            for i, future in enumerate(as_completed(futures), 1):
+                rows += future.result()
+                print(f"  {i}/{len(chunks)} batches ({time.perf_counter() - start:.0f} s)")
+    table = pd.DataFrame(rows)
+    return table.sort_values(SPEC_COLUMNS + ['part', 'term'], kind='stable').reset_index(drop=True)
+
+
+def main(outcomes=None, workers=None, output='multiverse_results.csv'):
+    specs = enumerate_specs(outcomes)
+    table = run_multiverse(specs, workers=workers)
+    table.to_csv(output, index=False)
+    print(f"Multiverse results ({len(table)} rows) saved to {output}.")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Specification curve over the phase 2/3 model choices")
+    parser.add_argument('--outcomes', nargs='+', choices=list(OUTCOMES), default=None,
+                        help="outcomes to include (default: all)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: CPU count; 1 runs in-process)")
+    parser.add_argument('--output', default='multiverse_results.csv')
+    args = parser.parse_args()
+    main(outcomes=args.outcomes, workers=args.workers, output=args.output)
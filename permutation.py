@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import aggregate
+
+DEFAULT_N_PERM = 10000
+# Upper bound on the dense buffers of one chunk of permutations
+DEFAULT_MAX_BYTES = 128 * 1024 ** 2
+
+# Outcome -> per-row value whose cell mean enters the interaction contrast
+OUTCOMES = {
+    'persuasiveness': lambda df: df['persuasiveness'] if 'persuasiveness' in df.columns
+    else df[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1),
+    'zero_donation': lambda df: (df['donation_amount'] == 0).astype(float),
+    'like': lambda df: (df['rating'] == 'Like').astype(float).where(df['rating'].notna()),
+}
+SCHEMES = ('gender', 'source', 'both')
+
+
+class PermutationDesign:
+    """Outcome counts and sums as sparse participant x post matrices.
+
+    gender is a participant label and content_source a post label, so with
+    indicator vectors g (Female) and s (LLM) the Female/LLM cell sum is g'Ms and
+    the other three cells follow from the row and column sums of M. A
+    permutation only changes g and s; the rows are never touched again.
+    """
+
+    def __init__(self, df, strata='charity_id'):
+        p_codes, self.participants = pd.factorize(df['participant_id'])
+        q_codes, self.posts = pd.factorize(df['post_id'])
+        n_p, n_q = len(self.participants), len(self.posts)
+        self.gender = _unit_labels(p_codes, n_p, (df['gender'] == 'Female').to_numpy(), 'gender', 'participant')
+        self.source = _unit_labels(q_codes, n_q, (df['content_source'] == 'LLM').to_numpy(),
+                                   'content_source', 'post')
+        # Post labels are only exchanged within a stratum of posts
+        if strata is None:
+            self.strata = np.zeros(n_q, dtype=np.int64)
+        else:
+            self.strata = _unit_labels(q_codes, n_q, pd.factorize(df[strata])[0], strata, 'post').astype(np.int64)
+        self.post_order = np.argsort(self.strata, kind='stable')
+
+        # Columns (count, sum) per outcome; column k lives in [k * n_q, (k + 1) * n_q)
+        self.outcomes = list(OUTCOMES)
+        columns = []
+        for outcome in self.outcomes:
+            values = OUTCOMES[outcome](df).to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            columns += [valid.astype(float), np.where(valid, values, 0.0)]
+        self.n_columns = len(columns)
+        self.matrix = sp.hstack([sp.csr_matrix((values, (p_codes, q_codes)), shape=(n_p, n_q))
+                                 for values in columns]).tocsr()
+        self.row_sums = np.column_stack([np.bincount(p_codes, weights=values, minlength=n_p) for values in columns])
+        self.col_sums = np.column_stack([np.bincount(q_codes, weights=values, minlength=n_q) for values in columns])
+        self.totals = self.col_sums.sum(axis=0)
+        self.n_participants, self.n_posts = n_p, n_q
+
+    @property
+    def bytes_per_permutation(self):
+        return 8 * (self.n_columns * self.n_posts + 2 * (self.n_participants + self.n_posts))
+
+    def cell_sums(self, g, s):
+        """Cell sums for Female indicators g (B x P) and LLM indicators s (B x Q); shape (B, columns, 4).
+
+        Cells are ordered Female/LLM, Female/Human, Male/LLM, Male/Human.
+        """
+        projected = (self.matrix.T @ g.T).reshape(self.n_columns, self.n_posts, len(g))
+        female_llm = np.einsum('kqb,bq->bk', projected, s)
+        female = g @ self.row_sums
+        llm = s @ self.col_sums
+        return np.stack([female_llm, female - female_llm, llm - female_llm,
+                         self.totals - female - llm + female_llm], axis=2)
+
+    def contrasts(self, g, s):
+        """Interaction contrast (LLM - Human | Female) - (LLM - Human | Male) per outcome; shape (B, outcomes)"""
+        sums = self.cell_sums(g, s)
+        means = sums[:, 1::2] / sums[:, 0::2]
+        return (means[:, :, 0] - means[:, :, 1]) - (means[:, :, 2] - means[:, :, 3])
+
+    def permuted_sources(self, rng, size):
+        """size copies of the post labels, each shuffled within its stratum"""
+        # Sorting stratum + uniform noise shuffles the posts of each stratum among themselves
+        shuffled = np.argsort(self.strata[None, :] + rng.random((size, self.n_posts)), axis=1)
+        s = np.empty((size, self.n_posts))
+        s[:, self.post_order] = self.source[shuffled]
+        return s
+
+
+def _unit_labels(codes, size, values, column, unit):
+    # One label per participant or post; the label must not vary within the unit
+    labels = np.zeros(size, dtype=np.asarray(values).dtype)
+    labels[codes] = values
+    if not np.array_equal(labels[codes], values):
+        raise ValueError(f"{column} varies within a {unit}")
+    return labels.astype(float) if labels.dtype == bool else labels
+
+
+def _permutation_chunk(design, seed, size, scheme):
+    rng = np.random.default_rng(seed)
+    g = np.broadcast_to(design.gender, (size, design.n_participants))
+    s = np.broadcast_to(design.source, (size, design.n_posts))
+    if scheme in ('gender', 'both'):
+        g = rng.permuted(g, axis=1)
+    if scheme in ('source', 'both'):
+        s = design.permuted_sources(rng, size)
+    return design.contrasts(np.ascontiguousarray(g), np.ascontiguousarray(s))
+
+
+class PermutationResult:
+    """Observed interaction contrasts and their permutation distribution"""
+
+    def __init__(self, observed, permutations):
+        self.observed = observed
+        self.permutations = permutations
+
+    def p_values(self):
+        """Two-sided p-values, counting the observed labelling as one permutation"""
+        extreme = (self.permutations.abs() >= self.observed.abs() - 1e-12).sum()
+        return (extreme + 1) / (len(self.permutations) + 1)
+
+    def summary(self):
+        return pd.DataFrame({
+            'estimate': self.observed,
+            'null_mean': self.permutations.mean(),
+            'null_sd': self.permutations.std(ddof=1),
+            'p_value': self.p_values(),
+        })
+
+
+def permutation_test(df, n_perm=DEFAULT_N_PERM, seed=0, scheme='both', strata='charity_id',
+                     max_bytes=DEFAULT_MAX_BYTES, workers=1):
+    """Permutation test of the gender x content_source interaction on cell means.
+
+    scheme permutes gender across participants ('gender'), content_source
+    across posts within strata ('source'), or both. Permutations run in
+    chunks that keep the dense buffers under max_bytes; each chunk has its
+    own seed from a SeedSequence, so results do not depend on the number of
+    workers.
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"scheme must be one of {SCHEMES}")
+    design = PermutationDesign(df, strata)
+    names = [f"{outcome}[gender x source]" for outcome in design.outcomes]
+    observed = pd.Series(design.contrasts(design.gender[None, :], design.source[None, :])[0], index=names)
+
+    chunk = max(1, min(n_perm, max_bytes // design.bytes_per_permutation))
+    sizes = [min(chunk, n_perm - start) for start in range(0, n_perm, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers == 1 or len(sizes) == 1:
+        parts = [_permutation_chunk(design, s, size, scheme) for s, size in zip(seeds, sizes)]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_permutation_chunk, design, s, size, scheme) for s, size in zip(seeds, sizes)]
+            parts = [future.result() for future in futures]
+    permutations = pd.DataFrame(np.concatenate(parts), columns=names)
+    return PermutationResult(observed, permutations)
+
+
+if __name__ == "__main__":
+    import data_cache
+    df = data_cache.load_cached('Data_LongFormat.csv')
+    for scheme in SCHEMES:
+        result = permutation_test(df, scheme=scheme, workers=None)
+        print(f"\nPermuting {scheme} ({len(result.permutations)} permutations):")
+        print(result.summary().to_string(float_format='{:.4f}'.format))
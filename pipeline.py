@@ -0,0 +1,395 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from data_cache import CACHE_DIR
+
+PIPELINE_VERSION = 1
+PIPELINE_DIR = os.path.join(CACHE_DIR, 'pipeline')
+MANIFEST_PATH = os.path.join(PIPELINE_DIR, 'manifest.json')
+# Where create_pptx.py reads the figures from
+PHASE1_PLOTS = 'thesis_source/thesis_latex/phase1_plots'
+PHASE3_PLOTS = 'thesis_source/thesis_latex/phase3_plots'
+DECK = 'thesis_presentation_v2.pptx'
+
+
+class Step:
+    """One pipeline step: run(*args) reads the input files and writes the output files.
+
+    A step reruns when the content of an input, its params or the source of
+    the functions in code changes; outputs are hashed too, so a rebuilt step
+    whose outputs come out byte-identical does not rebuild its dependents.
+    """
+
+    def __init__(self, name, run, args=(), inputs=(), outputs=(), params=None, code=()):
+        self.name = name
+        self.run = run
+        self.args = tuple(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.code = list(code)
+
+
+# --- Content hashes ---
+
+def _is_literal(value):
+    if isinstance(value, (bool, int, float, str, type(None))):
+        return True
+    return isinstance(value, (tuple, list)) and all(_is_literal(v) for v in value)
+
+
+def code_digest(objects):
+    """Hash of the source of functions/classes and of the same-module functions and constants they use"""
+    digest, seen, stack = hashlib.sha256(), set(), list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        digest.update(inspect.getsource(obj).encode())
+        module = sys.modules[obj.__module__]
+        codes = [obj.__code__] if inspect.isfunction(obj) else \
+            [f.__code__ for f in vars(obj).values() if inspect.isfunction(f)]
+        names = set()
+        while codes:
+            code = codes.pop()
+            names.update(code.co_names)
+            codes.extend(c for c in code.co_consts if inspect.iscode(c))
+        for name in sorted(names):
+            value = getattr(module, name, None)
+            if (inspect.isfunction(value) or inspect.isclass(value)) and value.__module__ == obj.__module__:
+                stack.append(value)
+            elif _is_literal(value):
+                digest.update(f"{name}={value!r}".encode())
+    return digest.hexdigest()
+
+
+class FileHashes:
+    """SHA-256 of files, remembered by (size, mtime) so unchanged files are not read again"""
+
+    def __init__(self, known=None):
+        self.known = known or {}
+
+    def __call__(self, path):
+        stat = os.stat(path)
+        entry = self.known.get(path)
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+        import data_cache
+        digest = data_cache.file_hash(path)
+        self.known[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+
+def step_key(step, hashes):
+    """Hash of everything a step's outputs depend on; None while an input is missing"""
+    if not all(os.path.exists(path) for path in step.inputs):
+        return None
+    key = {'version': PIPELINE_VERSION, 'name': step.name, 'params': step.params,
+           'code': code_digest(step.code) if step.code else None,
+           'inputs': {path: hashes(path) for path in step.inputs}}
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {'steps': {}, 'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def up_to_date(step, key, manifest, hashes):
+    """True if the recorded run of step had this key and its outputs are still as written"""
+    record = manifest['steps'].get(step.name)
+    if key is None or not record or record['key'] != key:
+        return False
+    return all(os.path.exists(path) and hashes(path) == record['outputs'].get(path) for path in step.outputs)
+
+
+# --- Graph ---
+
+def dependencies(steps):
+    """{step name: names of the steps producing its inputs}; rejects duplicate producers and cycles"""
+    producers = {}
+    for step in steps:
+        for path in step.outputs:
+            if path in producers:
+                raise ValueError(f"{path} is written by both {producers[path]} and {step.name}")
+            producers[path] = step.name
+    deps = {step.name: sorted({producers[path] for path in step.inputs if path in producers}) for step in steps}
+    state = {}
+
+    def visit(name, trail):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"dependency cycle: {' -> '.join(trail + [name])}")
+        state[name] = 'visiting'
+        for dep in deps[name]:
+            visit(dep, trail + [name])
+        state[name] = 'done'
+
+    for name in deps:
+        visit(name, [])
+    return deps
+
+
+def select(steps, targets):
+    """The targets and every step they depend on, in declaration order"""
+    if not targets:
+        return list(steps)
+    deps = dependencies(steps)
+    names = {step.name for step in steps}
+    unknown = set(targets) - names
+    if unknown:
+        raise KeyError(f"unknown step: {', '.join(sorted(unknown))}")
+    wanted, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(deps[name])
+    return [step for step in steps if step.name in wanted]
+
+
+def _execute(step):
+    start = time.perf_counter()
+    step.run(*step.args)
+    missing = [path for path in step.outputs if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"{step.name} did not write {', '.join(missing)}")
+    return time.perf_counter() - start
+
+
+def run(steps, targets=None, workers=None, force=False, dry_run=False, manifest_path=MANIFEST_PATH):
+    """Run the out-of-date steps, independent ones in parallel; returns ({name: status}, {name: seconds}).
+
+    Statuses: 'up to date', 'ran', 'failed', 'blocked' (a dependency failed)
+    and, for a dry run, 'would run'. workers=1 runs the steps in this process.
+    """
+    steps = select(steps, targets)
+    deps = dependencies(steps)
+    by_name = {step.name: step for step in steps}
+    manifest = load_manifest(manifest_path)
+    hashes = FileHashes(manifest.get('files'))
+    status, seconds, running, keys = {}, {}, {}, {}
+    workers = workers or min(len(steps), os.cpu_count() or 1)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and not dry_run else None
+
+    def finish(name, elapsed=None, error=None):
+        step = by_name[name]
+        if error is not None:
+            status[name] = 'failed'
+            print(f"  {name}: FAILED ({error})")
+            return
+        status[name], seconds[name] = 'ran', elapsed
+        manifest['steps'][name] = {'key': keys[name], 'seconds': elapsed,
+                                   'outputs': {path: hashes(path) for path in step.outputs}}
+        save_manifest(manifest | {'files': hashes.known}, manifest_path)
+        print(f"  {name}: done ({elapsed:.1f} s)")
+
+    try:
+        while len(status) < len(steps):
+            progressed = False
+            for step in steps:
+                if step.name in status or step.name in running:
+                    continue
+                dep_status = [status.get(dep) for dep in deps[step.name]]
+                if any(s in ('failed', 'blocked') for s in dep_status):
+                    status[step.name] = 'blocked'
+                elif 'would run' in dep_status and dry_run:
+                    status[step.name] = 'would run'
+                elif all(s in ('up to date', 'ran') for s in dep_status):
+                    key = keys[step.name] = step_key(step, hashes)
+                    if not force and up_to_date(step, key, manifest, hashes):
+                        status[step.name] = 'up to date'
+                    elif dry_run:
+                        status[step.name] = 'would run'
+                    elif pool is None:
+                        print(f"  {step.name}: running")
+                        try:
+                            finish(step.name, _execute(step))
+                        except Exception as error:
+                            finish(step.name, error=error)
+                    else:
+                        print(f"  {step.name}: running")
+                        running[step.name] = pool.submit(_execute, step)
+                        continue
+                else:
+                    continue
+                progressed = True
+            if progressed:
+                continue
+            if not running:
+                raise RuntimeError(f"steps waiting on nothing: {sorted(set(by_name) - set(status))}")
+            done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+            for name, future in list(running.items()):
+                if future in done:
+                    del running[name]
+                    error = future.exception()
+                    finish(name, None if error else future.result(), error)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if not dry_run:
+            save_manifest(manifest | {'files': hashes.known}, manifest_path)
+    return {step.name: status[step.name] for step in steps}, seconds
+
+
+# --- Steps of this project ---
+
+def _command(args):
+    subprocess.run(args, check=True)
+
+
+def _copy(sources, destination):
+    os.makedirs(destination, exist_ok=True)
+    for source in sources:
+        shutil.copyfile(source, os.path.join(destination, os.path.basename(source)))
+
+
+def _cell_stats(source, path):
+    import aggregate
+    import analysis
+    cell_stats = aggregate.CellStats.from_frame(analysis.load_and_preprocess(source))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(cell_stats, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _plot_tables(cell_stats_path, path):
+    import plotting
+    with open(cell_stats_path, 'rb') as f:
+        cell_stats = pickle.load(f)
+    with open(path, 'wb') as f:
+        pickle.dump(plotting.plot_tables(cell_stats), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _figure(name, tables_path, out_dir):
+    import plotting
+    with open(tables_path, 'rb') as f:
+        tables = pickle.load(f)
+    os.makedirs(out_dir, exist_ok=True)
+    plotting._init_worker()
+    plotting._render(name, tables, out_dir)
+
+
+def _summary(cell_stats_path, path):
+    import analysis
+    with open(cell_stats_path, 'rb') as f:
+        analysis.write_summary(pickle.load(f), path)
+
+
+def _descriptives(source):
+    import results
+    results.write_descriptives(source)
+
+
+def _phase_reports(model_workers):
+    import models
+    models.main(workers=model_workers)
+
+
+def project_steps(source='Data_LongFormat.csv', r_scripts=False, model_workers=None):
+    """The analysis-to-presentation pipeline: descriptives, figures, models and the deck.
+
+    By default the phase reports come from the Python models; r_scripts runs
+    the R scripts for the reports and the interaction plots instead.
+    """
+    import plotting
+    import results
+    cell_stats = os.path.join(PIPELINE_DIR, 'cell_stats.pkl')
+    tables = os.path.join(PIPELINE_DIR, 'plot_tables.pkl')
+    steps = [
+        Step('cell_stats', _cell_stats, (source, cell_stats),
+             [source, 'aggregate.py', 'data_cache.py', 'analysis.py', 'compact.py'],
+             [cell_stats], code=[_cell_stats]),
+        Step('plot_tables', _plot_tables, (cell_stats, tables), [cell_stats], [tables],
+             code=[_plot_tables, plotting.plot_tables]),
+        Step('summary', _summary, (cell_stats, 'analysis_summary.md'),
+             [cell_stats, 'analysis.py', 'aggregate.py', 'reliability.py'], ['analysis_summary.md']),
+        Step('results:descriptives', _descriptives, (source,), [source, 'data_cache.py'],
+             [results.section_path('descriptives')], code=[_descriptives, results.descriptive_records]),
+    ]
+    # One step per figure, keyed on the source of its own drawing function only
+    for name, (draw, _) in plotting.FIGURES.items():
+        steps.append(Step(f"figure:{name}", _figure, (name, tables, PHASE1_PLOTS), [tables],
+                          [os.path.join(PHASE1_PLOTS, name)], code=[_figure, draw, plotting._init_worker]))
+
+    interaction_plots = ['interaction_engagement_like.png', 'interaction_persuasiveness.png',
+                         'interaction_donation_fixed.png']
+    if r_scripts:
+        steps += [
+            Step('r:phase2', _command, (['Rscript', 'analysis_phase2.R'],), [source, 'analysis_phase2.R'],
+                 ['phase2_results.txt']),
+            Step('r:phase3', _command, (['Rscript', 'analysis_phase3.R'],), [source, 'analysis_phase3.R'],
+                 ['phase3_results.txt', 'interaction_engagement_like.png', 'interaction_persuasiveness.png',
+                  'interaction_donation.png']),
+            Step('r:donation_fix', _command, (['Rscript', 'fix_donation_interaction.R'],),
+                 [source, 'fix_donation_interaction.R'], ['phase3_donation_fix.txt', 'interaction_donation_fixed.png']),
+            Step('interaction_plots', _copy, (interaction_plots, PHASE3_PLOTS), interaction_plots,
+                 [os.path.join(PHASE3_PLOTS, name) for name in interaction_plots]),
+        ]
+    else:
+        steps.append(Step('models', _phase_reports, (model_workers,),
+                          [source, 'models.py', 'crossed.py', 'scheduler.py', 'results.py', 'aggregate.py',
+                           'data_cache.py'],
+                          # scheduler.REPORTS; the R outputs of the same reports are never written here
+                          ['phase2_results_py.txt', 'phase3_results_py.txt', 'phase3_donation_fix_py.txt',
+                           results.section_path('models')]))
+
+    figures = [os.path.join(PHASE1_PLOTS, name) for name in plotting.FIGURES]
+    # The deck's tables and verdicts are read from the results store sections; staleness is
+    # decided here, so create_pptx.py is not left to skip on its own record
+    steps.append(Step('deck', _command, ([sys.executable, 'create_pptx.py', '--force'],),
+                      ['create_pptx.py', 'results.py'] + figures +
+                      [os.path.join(PHASE3_PLOTS, name) for name in interaction_plots] +
+                      [results.section_path('descriptives'), results.section_path('models')],
+                      [DECK]))
+    return steps
+
+
+def main(targets=None, workers=None, force=False, dry_run=False, r_scripts=False):
+    """Bring the targets (default: every step) up to date; returns False if a step failed"""
+    start = time.perf_counter()
+    steps = project_steps(r_scripts=r_scripts)
+    print(f"Pipeline: {len(select(steps, targets))} steps" + (" (dry run)" if dry_run else ''))
+    status, seconds = run(steps, targets, workers=workers, force=force, dry_run=dry_run)
+    print(f"\n{'step':<40}{'status':<14}{'seconds':>8}")
+    for name, state in status.items():
+        print(f"{name:<40}{state:<14}{seconds[name] if name in seconds else 0:>8.1f}")
+    print(f"\nPipeline finished in {time.perf_counter() - start:.1f} s.")
+    return not any(state in ('failed', 'blocked') for state in status.values())
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild the out-of-date analysis, figure, model and deck outputs")
+    parser.add_argument('targets', nargs='*', help="steps to bring up to date with their dependencies (default: all)")
+    parser.add_argument('--workers', type=int, default=None, help="parallel steps (1 runs them in this process)")
+    parser.add_argument('--force', action='store_true', help="rerun the selected steps even if up to date")
+    parser.add_argument('--dry-run', action='store_true', help="only list the steps that would run")
+    parser.add_argument('--r', action='store_true', dest='r_scripts',
+                        help="phase reports and interaction plots from the R scripts instead of models.py")
+    parser.add_argument('--list', action='store_true', help="print the steps with their inputs and outputs")
+    args = parser.parse_args()
+    if args.list:
+        for step in project_steps(r_scripts=args.r_scripts):
+            print(f"{step.name}\n  in:  {', '.join(step.inputs)}\n  out: {', '.join(step.outputs)}")
+        sys.exit(0)
+    sys.exit(0 if main(args.targets, args.workers, args.force, args.dry_run, args.r_scripts) else 1)
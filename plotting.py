@@ -0,0 +1,289 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import aggregate
+
+ENGAGEMENT_LEVELS = aggregate.ENGAGEMENT_LEVELS
+DEFAULT_BINS = 20
+DEFAULT_N_BOOT = 1000
+# Q-Q plots show at most this many order statistics
+QQ_POINTS = 2000
+NORMAL = NormalDist()
+
+
+# --- Summary tables ---
+# Figures are drawn from these small per-cell tables rather than from raw rows,
+# so rendering cost no longer grows with the number of observations.
+
+def _tally_arrays(tally):
+    return tally.index.to_numpy(dtype=float), tally.to_numpy(dtype=np.int64)
+
+
+def _cell_tally(cell_stats, var, cell):
+    return cell_stats.tallies[var].loc[cell]
+
+
+def bootstrap_mean_ci(values, counts, n_boot=DEFAULT_N_BOOT, seed=0, level=95):
+    """Percentile bootstrap CI of the mean from a value tally.
+
+    Resampling n rows with replacement is a multinomial draw over the distinct
+    values, so all replicates are drawn at once without touching the rows.
+    """
+    rng = np.random.default_rng(seed)
+    n = counts.sum()
+    draws = rng.multinomial(n, counts / n, size=n_boot)
+    means = draws @ values / n
+    tail = (100 - level) / 2
+    return np.percentile(means, [tail, 100 - tail])
+
+
+def box_stats(values, counts, label, whis=1.5):
+    """matplotlib bxp statistics computed from a value tally"""
+    q1, med, q3 = (aggregate._quantile_from_tally(values, counts, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    inside = (values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)
+    return {'label': label, 'med': med, 'q1': q1, 'q3': q3,
+            'whislo': values[inside].min(), 'whishi': values[inside].max(),
+            'fliers': values[~inside]}
+
+
+def qq_points(values, counts, max_points=QQ_POINTS):
+    """Normal probability plot coordinates (as scipy.stats.probplot) from a value tally"""
+    n = counts.sum()
+    ranks = np.unique(np.linspace(0, n - 1, min(n, max_points)).round().astype(np.int64))
+    # Filliben's estimate of the uniform order statistic medians
+    medians = (ranks + 1 - 0.3175) / (n + 0.365)
+    medians[ranks == 0] = 1 - 0.5 ** (1 / n)
+    medians[ranks == n - 1] = 0.5 ** (1 / n)
+    # At most max_points quantiles, so the stdlib normal keeps scipy out of this process
+    theoretical = np.array([NORMAL.inv_cdf(m) for m in medians])
+    ordered = values[np.searchsorted(np.cumsum(counts), ranks, side='right')]
+    slope, intercept = np.polyfit(theoretical, ordered, 1)
+    return theoretical, ordered, slope, intercept
+
+
+def plot_tables(cell_stats, bins=DEFAULT_BINS, n_boot=DEFAULT_N_BOOT, seed=0):
+    """Reduce per-cell statistics to the tables every figure is drawn from"""
+    cells = cell_stats.moments.index
+    genders = list(cells.get_level_values('gender').unique())
+    sources = list(cells.get_level_values('content_source').unique())
+
+    engagement = cell_stats.engagement_counts().stack().rename('count').reset_index()
+
+    means = []
+    for cell in cells:
+        values, counts = _tally_arrays(_cell_tally(cell_stats, 'donation_amount', cell))
+        low, high = bootstrap_mean_ci(values, counts, n_boot=n_boot, seed=seed)
+        means.append((*cell, values @ counts / counts.sum(), low, high))
+    donation_means = pd.DataFrame(means, columns=['gender', 'content_source', 'mean', 'ci_low', 'ci_high'])
+
+    # One histogram pass per facet over the tally, with shared bin edges
+    pooled = cell_stats.collapse()
+    all_values, _ = _tally_arrays(pooled.tallies['donation_amount'])
+    edges = np.histogram_bin_edges(all_values, bins=bins)
+    hist = []
+    for cell in cells:
+        values, counts = _tally_arrays(_cell_tally(cell_stats, 'donation_amount', cell))
+        heights, _ = np.histogram(values, bins=edges, weights=counts)
+        hist.extend((*cell, left, right, h) for left, right, h in zip(edges[:-1], edges[1:], heights))
+    donation_hist = pd.DataFrame(hist, columns=['gender', 'content_source', 'left', 'right', 'count'])
+
+    boxes = {}
+    for cell in cells:
+        values, counts = _tally_arrays(_cell_tally(cell_stats, 'persuasiveness', cell))
+        boxes[cell] = box_stats(values, counts, label=cell[1])
+
+    values, counts = _tally_arrays(pooled.tallies['persuasiveness'])
+    return {
+        'genders': genders,
+        'sources': sources,
+        'engagement': engagement,
+        'donation_means': donation_means,
+        'donation_hist': donation_hist,
+        'persuasiveness_box': boxes,
+        'persuasiveness_tally': (values, counts),
+        'persuasiveness_qq': qq_points(values, counts),
+    }
+
+
+# --- Figures ---
+
+def _grouped_bars(ax, table, x, hue, y, x_order, hue_order, colors, err=None):
+    width = 0.8 / len(hue_order)
+    for j, level in enumerate(hue_order):
+        rows = table[table[hue] == level].set_index(x).reindex(x_order)
+        positions = np.arange(len(x_order)) - 0.4 + width * (j + 0.5)
+        ax.bar(positions, rows[y], width=width, color=colors[j], label=level)
+        if err is not None:
+            ax.vlines(positions, rows[err[0]], rows[err[1]], color='.26', linewidth=2.5)
+    ax.set_xticks(np.arange(len(x_order)), x_order)
+
+
+def plot_engagement_distribution(tables, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    colors = sns.color_palette("viridis", len(tables['sources']))
+    table = tables['engagement']
+    fig, axes = plt.subplots(1, len(tables['genders']), figsize=(11, 5), sharey=True, squeeze=False)
+    for ax, gender in zip(axes[0], tables['genders']):
+        _grouped_bars(ax, table[table['gender'] == gender], 'rating', 'content_source', 'count',
+                      ENGAGEMENT_LEVELS, tables['sources'], colors)
+        ax.set_title(gender)
+        ax.set_xlabel("Engagement Rating")
+    axes[0, 0].set_ylabel("Count")
+    handles, labels = axes[0, 0].get_legend_handles_labels()
+    fig.legend(handles, labels, title="content_source", loc='center right', frameon=False)
+    sns.despine(fig)
+    fig.tight_layout(rect=(0, 0, 0.88, 1))
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_persuasiveness_boxplot(tables, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    colors = sns.color_palette('Set2', len(tables['sources']))
+    fig, ax = plt.subplots(figsize=(10, 6))
+    width = 0.8 / len(tables['sources'])
+    for i, gender in enumerate(tables['genders']):
+        for j, source in enumerate(tables['sources']):
+            stats = tables['persuasiveness_box'].get((gender, source))
+            if stats is None:
+                continue
+            position = i - 0.4 + width * (j + 0.5)
+            artists = ax.bxp([stats], positions=[position], widths=width * 0.8, patch_artist=True,
+                             boxprops={'facecolor': colors[j], 'edgecolor': '.3'},
+                             medianprops={'color': '.3'}, whiskerprops={'color': '.3'},
+                             capprops={'color': '.3'}, flierprops={'markeredgecolor': '.3'})
+            if i == 0:
+                artists['boxes'][0].set_label(source)
+    ax.set_xticks(np.arange(len(tables['genders'])), tables['genders'])
+    ax.set_xlim(-0.5, len(tables['genders']) - 0.5)
+    ax.set_xlabel('gender')
+    ax.set_ylabel('persuasiveness')
+    ax.legend(title='content_source')
+    ax.set_title('Persuasiveness Scores by Gender and Content Source')
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_donation_means(tables, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    colors = sns.color_palette('Set2', len(tables['sources']))
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _grouped_bars(ax, tables['donation_means'], 'gender', 'content_source', 'mean',
+                  tables['genders'], tables['sources'], colors, err=('ci_low', 'ci_high'))
+    ax.legend(title='content_source')
+    ax.set_xlabel('gender')
+    ax.set_title('Mean Donation Amount by Gender and Content Source')
+    ax.set_ylabel('Mean Donation Amount ($)')
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_donation_histogram(tables, path):
+    # Zero-inflation check
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    table = tables['donation_hist']
+    genders, sources = tables['genders'], tables['sources']
+    fig, axes = plt.subplots(len(sources), len(genders), figsize=(6 * len(genders), 4 * len(sources)),
+                             sharex=True, sharey=True, squeeze=False)
+    for r, source in enumerate(sources):
+        for c, gender in enumerate(genders):
+            ax = axes[r, c]
+            rows = table[(table['gender'] == gender) & (table['content_source'] == source)]
+            ax.bar(rows['left'], rows['count'], width=rows['right'] - rows['left'], align='edge',
+                   color=sns.color_palette()[0], alpha=0.75, edgecolor='white')
+            if r == 0:
+                ax.set_title(f"gender = {gender}")
+            if c == len(genders) - 1:
+                ax.annotate(f"content_source = {source}", xy=(1.02, 0.5), xycoords='axes fraction',
+                            rotation=270, ha='left', va='center')
+            if r == len(sources) - 1:
+                ax.set_xlabel('donation_amount')
+            if c == 0:
+                ax.set_ylabel('Count')
+    sns.despine(fig)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_persuasiveness_histogram(tables, path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    values, counts = tables['persuasiveness_tally']
+    # One bar per attainable score when the values are discrete (Likert means), else 50 bins
+    gap = np.diff(values).min() if len(values) > 1 else 1.0
+    bins = int(round((values[-1] - values[0]) / gap)) + 1 if len(values) <= 50 else 50
+    # Weighted KDEs take their bandwidth from the effective sample size of the weights;
+    # rescale it to the bandwidth the raw rows would get
+    n_eff = counts.sum() ** 2 / (counts.astype(float) ** 2).sum()
+    bw_adjust = (n_eff / counts.sum()) ** 0.2
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.histplot(x=values, weights=counts, bins=bins, kde=True, kde_kws={'bw_adjust': bw_adjust}, ax=ax)
+    ax.set_xlabel('persuasiveness')
+    ax.set_title('Distribution of Persuasiveness Scores')
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_persuasiveness_qqplot(tables, path):
+    import matplotlib.pyplot as plt
+    theoretical, ordered, slope, intercept = tables['persuasiveness_qq']
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.plot(theoretical, ordered, 'bo')
+    ax.plot(theoretical, slope * theoretical + intercept, 'r-')
+    ax.set_xlabel('Theoretical quantiles')
+    ax.set_ylabel('Ordered Values')
+    ax.set_title('Q-Q Plot of Persuasiveness Scores')
+    fig.savefig(path)
+    plt.close(fig)
+
+
+# Output file -> (figure function, tables it reads)
+FIGURES = {
+    'engagement_distribution.png': (plot_engagement_distribution, ['genders', 'sources', 'engagement']),
+    'persuasiveness_boxplot.png': (plot_persuasiveness_boxplot, ['genders', 'sources', 'persuasiveness_box']),
+    'donation_means.png': (plot_donation_means, ['genders', 'sources', 'donation_means']),
+    'donation_histogram.png': (plot_donation_histogram, ['genders', 'sources', 'donation_hist']),
+    'persuasiveness_histogram.png': (plot_persuasiveness_histogram, ['persuasiveness_tally']),
+    'persuasiveness_qqplot.png': (plot_persuasiveness_qqplot, ['persuasiveness_qq']),
+}
+
+
+def _init_worker():
+    # Headless backend and the project style, set once per worker process
+    import matplotlib
+    matplotlib.use('Agg')
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+
+
+def _render(name, tables, out_dir):
+    func, _ = FIGURES[name]
+    path = os.path.join(out_dir, name)
+    func(tables, path)
+    return path
+
+
+def render_figures(cell_stats, out_dir='.', names=None, workers=None, seed=0):
+    """Render the figures in names (default: all) on a process pool; returns the written paths"""
+    names = list(names or FIGURES)
+    os.makedirs(out_dir, exist_ok=True)
+    tables = plot_tables(cell_stats, seed=seed)
+    if workers == 1:
+        _init_worker()
+        return [_render(name, tables, out_dir) for name in names]
+    workers = workers or min(len(names), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # Each task only receives the few summary tables its figure reads
+        futures = [pool.submit(_render, name, {key: tables[key] for key in FIGURES[name][1]}, out_dir)
+                   for name in names]
+        return [future.result() for future in futures]
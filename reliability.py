@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+import aggregate
+
+DEFAULT_N_BOOT = 2000
+# Upper bound on the replicate weight matrix of one bootstrap chunk
+DEFAULT_MAX_BYTES = 64 * 1024 ** 2
+
+
+# --- Statistics of (cells, k, k) item covariance matrices ---
+
+def cronbach_alpha(cov):
+    """Cronbach's alpha of each covariance matrix"""
+    cov = np.asarray(cov, dtype=float)
+    k = cov.shape[-1]
+    return k / (k - 1) * (1 - np.trace(cov, axis1=-2, axis2=-1) / cov.sum(axis=(-2, -1)))
+
+
+def item_total_correlations(cov):
+    """Corrected item-total correlations: item i against the sum of the other items"""
+    cov = np.asarray(cov, dtype=float)
+    variances = np.diagonal(cov, axis1=-2, axis2=-1)
+    row_sums = cov.sum(axis=-1)
+    rest_variance = cov.sum(axis=(-2, -1))[..., None] - 2 * row_sums + variances
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (row_sums - variances) / np.sqrt(variances * rest_variance)
+
+
+def alpha_if_deleted(cov):
+    """Alpha of the remaining items with each item left out in turn"""
+    cov = np.asarray(cov, dtype=float)
+    k = cov.shape[-1]
+    variances = np.diagonal(cov, axis1=-2, axis2=-1)
+    total = cov.sum(axis=(-2, -1))[..., None] - 2 * cov.sum(axis=-1) + variances
+    trace = np.trace(cov, axis1=-2, axis2=-1)[..., None] - variances
+    if k <= 2:
+        return np.full(variances.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (k - 1) / (k - 2) * (1 - trace / total)
+
+
+def positive_definite(cov, rtol=1e-10):
+    """Mask of the covariance matrices (stacked on the leading axes) that are finite and positive definite.
+
+    The smallest eigenvalue must exceed rtol times the largest, so matrices
+    that are singular up to rounding (e.g. fewer rows than items) fail too.
+    """
+    cov = np.asarray(cov, dtype=float)
+    finite = np.isfinite(cov).all(axis=(-2, -1))
+    values = np.linalg.eigvalsh(np.where(finite[..., None, None], cov, 0))
+    return finite & (values[..., 0] > rtol * np.maximum(values[..., -1], 0))
+
+
+def one_factor(cov, max_iter=500, tol=1e-10):
+    """(loadings, uniquenesses) of a one-factor model by iterated principal axes (minres).
+
+    Matrices that are not positive definite (NaN, a constant item, too few
+    rows) have no factor solution and get NaN loadings and uniquenesses.
+    """
+    cov = np.asarray(cov, dtype=float)
+    diagonal = np.diagonal(cov, axis1=-2, axis2=-1)
+    valid = positive_definite(cov)
+    loadings = np.full(diagonal.shape, np.nan)
+    if not valid.any():
+        return loadings, diagonal - loadings ** 2
+    good, good_diagonal = cov[valid], diagonal[valid]
+    # Squared multiple correlations as starting communalities
+    communality = good_diagonal - 1 / np.diagonal(np.linalg.inv(good), axis1=-2, axis2=-1)
+    index = np.arange(cov.shape[-1])
+    for _ in range(max_iter):
+        reduced = good.copy()
+        reduced[..., index, index] = communality
+        values, vectors = np.linalg.eigh(reduced)
+        fitted = vectors[..., -1] * np.sqrt(np.maximum(values[..., -1], 0))[..., None]
+        # Heywood cases are held at the item variance
+        updated = np.minimum(fitted ** 2, good_diagonal)
+        converged = np.max(np.abs(updated - communality)) < tol
+        communality = updated
+        if converged:
+            break
+    fitted *= np.where(fitted.sum(axis=-1, keepdims=True) < 0, -1, 1)
+    loadings[valid] = fitted
+    return loadings, diagonal - loadings ** 2
+
+
+def mcdonald_omega(cov):
+    """McDonald's omega total: one-factor common variance over the variance of the item sum"""
+    loadings, _ = one_factor(cov)
+    return loadings.sum(axis=-1) ** 2 / np.asarray(cov, dtype=float).sum(axis=(-2, -1))
+
+
+# --- Tables ---
+
+def reliability_table(cov, index):
+    """alpha and omega per cell for covariance matrices stacked along the first axis"""
+    return pd.DataFrame({'cronbach_alpha': cronbach_alpha(cov), 'mcdonald_omega': mcdonald_omega(cov)},
+                        index=index)
+
+
+def item_table(cov, items=aggregate.PERSUASIVENESS_ITEMS):
+    """Per-item statistics of one covariance matrix"""
+    loadings, _ = one_factor(cov)
+    return pd.DataFrame({'item_total_r': item_total_correlations(cov),
+                         'alpha_if_deleted': alpha_if_deleted(cov),
+                         'loading': loadings / np.sqrt(np.diagonal(cov))},
+                        index=pd.Index(list(items), name='item'))
+
+
+# --- One-pass item moments for the cluster bootstrap ---
+
+def _pairs(k):
+    return [(i, j) for i in range(k) for j in range(i, k)]
+
+
+def item_moments(df, keys, items=aggregate.PERSUASIVENESS_ITEMS):
+    """Per-group n, item sums and item cross-products in one grouped pass; rows merge by adding"""
+    x = df[list(items)].to_numpy(dtype=float)
+    columns = {'n': np.ones(len(df))}
+    for i, item in enumerate(items):
+        columns[item] = x[:, i]
+    for i, j in _pairs(len(items)):
+        columns[f"{items[i]}*{items[j]}"] = x[:, i] * x[:, j]
+    columns.update({key: df[key].to_numpy() for key in keys})
+    return pd.DataFrame(columns).groupby(list(keys), observed=True, sort=True).sum()
+
+
+def moments_covariance(moments, k):
+    """Sample covariance matrices from (..., 1 + k + k(k+1)/2) moment rows"""
+    moments = np.asarray(moments, dtype=float)
+    n, sums = moments[..., 0], moments[..., 1:1 + k]
+    cp = np.empty(moments.shape[:-1] + (k, k))
+    for column, (i, j) in enumerate(_pairs(k), start=1 + k):
+        cp[..., i, j] = cp[..., j, i] = moments[..., column]
+    centered = cp - sums[..., :, None] * sums[..., None, :] / n[..., None, None]
+    return centered / (n - 1)[..., None, None]
+
+
+def bootstrap_ci(df, keys=(), items=aggregate.PERSUASIVENESS_ITEMS, unit='participant_id', n_boot=DEFAULT_N_BOOT,
+                 seed=0, level=95, max_bytes=DEFAULT_MAX_BYTES):
+    """alpha and omega per cell with percentile intervals from a cluster bootstrap over unit.
+
+    The rows are read once into per-unit moments; a replicate is a multinomial
+    reweighting of the units of a cell, so no replicate touches the rows.
+    """
+    keys = list(keys)
+    moments = item_moments(df, keys + [unit], items)
+    k, tail = len(items), (100 - level) / 2
+    rng = np.random.default_rng(seed)
+    rows = {}
+    cells = moments.groupby(level=keys, sort=True) if keys else [('All', moments)]
+    for cell, block in cells:
+        values = block.to_numpy()
+        n_units = len(values)
+        chunk = max(1, min(n_boot, max_bytes // (8 * n_units)))
+        replicates = []
+        for start in range(0, n_boot, chunk):
+            weights = rng.multinomial(n_units, np.full(n_units, 1.0 / n_units), size=min(chunk, n_boot - start))
+            replicates.append(moments_covariance(weights @ values, k))
+        replicates = np.concatenate(replicates)
+        cov = moments_covariance(values.sum(axis=0), k)
+        row = {}
+        for name, statistic in (('cronbach_alpha', cronbach_alpha), ('mcdonald_omega', mcdonald_omega)):
+            draws = statistic(replicates)
+            row[name] = float(statistic(cov))
+            row[f"{name}_low"], row[f"{name}_high"] = np.percentile(draws, [tail, 100 - tail])
+        rows[cell] = row
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    if len(keys) > 1:
+        table.index = pd.MultiIndex.from_tuples(table.index, names=keys)
+    else:
+        table.index.name = keys[0] if keys else None
+    return table
+
+
+if __name__ == "__main__":
+    import data_cache
+    df = data_cache.load_cached('Data_LongFormat.csv')
+    print("Persuasiveness reliability (participant cluster bootstrap, 95% CI):")
+    print(pd.concat([bootstrap_ci(df), bootstrap_ci(df, aggregate.CELL_KEYS)]).to_string(float_format='{:.3f}'.format))
+    cell_stats = aggregate.CellStats.from_frame(df)
+    print("\nItems:")
+    print(item_table(cell_stats.collapse().covariance(aggregate.PERSUASIVENESS_ITEMS)[0])
+          .to_string(float_format='{:.3f}'.format))
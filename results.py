@@ -0,0 +1,173 @@
+import glob
+import hashlib
+import json
+import math
+import os
+
+import pandas as pd
+
+STORE_VERSION = 1
+# One JSON file per section, each written by one stage: results/models.json, results/descriptives.json
+RESULTS_DIR = 'results'
+ALPHA = 0.05
+# (estimate, z or t value) of the terms the presentation reports, as printed by the R scripts in
+# phase2_results.txt, phase3_results.txt and phase3_donation_fix.txt; p is the two-sided normal p
+R_REFERENCE = {
+    ('phase2/engagement', '', 'genderFemale'): (0.3134, 1.534),
+    ('phase2/engagement', '', 'content_sourceLLM'): (0.4550, 4.415),
+    ('phase2/persuasiveness', '', 'genderFemale'): (0.06190, 0.609),
+    ('phase2/persuasiveness', '', 'content_sourceLLM'): (0.20136, 5.014),
+    ('phase2/donation (all rows)', '', 'genderFemale'): (0.0012545, 2.223),
+    ('phase2/donation (all rows)', '', 'content_sourceLLM'): (0.0017840, 2.542),
+    ('phase3/engagement', '', 'genderFemale:content_sourceLLM'): (0.4222, 2.550),
+    ('phase3/persuasiveness', '', 'genderFemale:content_sourceLLM'): (0.06449, 1.029),
+    ('phase3/donation (donors only)', '', 'genderFemale:content_sourceLLM'): (0.0002250, 0.423),
+}
+# Significance the thesis reports where R printed no usable test: the glmmTMB zero part did not converge
+THESIS_SIGNIFICANCE = {
+    ('phase2/donation', 'zero', 'genderFemale'): False,
+}
+COLUMNS = ['model', 'part', 'term', 'family', 'n_obs', 'estimate', 'std_error', 'statistic', 'p_value',
+           'ci_low', 'ci_high']
+
+
+def section_path(section, results_dir=RESULTS_DIR):
+    return os.path.join(results_dir, f"{section}.json")
+
+
+def write_section(section, rows, results_dir=RESULTS_DIR, **metadata):
+    """Replace one section of the store; rows are sorted and no timestamp is kept, so equal results give equal bytes"""
+    rows = sorted(rows, key=lambda row: (row['model'], row.get('part', ''), row['term']))
+    path = section_path(section, results_dir)
+    os.makedirs(results_dir, exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': STORE_VERSION, 'section': section, 'metadata': metadata, 'rows': rows}, f, indent=1)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def model_records(name, record):
+    """Store rows of one ModelResult/HurdleResult to_dict() record; hurdle parts are 'zero' and 'amount'"""
+    parts = [('zero', record['zero']), ('amount', record['amount'])] if record['family'] == 'hurdle' \
+        else [('', record)]
+    rows = []
+    for part, fit in parts:
+        for term, c in fit['coefficients'].items():
+            rows.append({'model': name, 'part': part, 'term': term, 'family': fit['family'],
+                         'n_obs': fit['n_obs'], 'estimate': c['Estimate'], 'std_error': c['Std. Error'],
+                         'statistic': c['z value'], 'p_value': c['Pr(>|z|)'],
+                         'ci_low': c['CI low'], 'ci_high': c['CI high']})
+    return rows
+
+
+def write_model_results(paths, results_dir=RESULTS_DIR):
+    """models section from the scheduler's job artifacts ({job name: artifact path})"""
+    rows = []
+    for name, path in sorted(paths.items()):
+        with open(path) as f:
+            rows += model_records(name, json.load(f)['result'])
+    return write_section('models', rows, results_dir)
+
+
+def descriptive_records(df):
+    """Store rows of the sample sizes and shares quoted in the presentation"""
+    values = {
+        'participants': df['participant_id'].nunique(),
+        'observations': len(df),
+        'posts': df['post_id'].nunique(),
+        'posts_per_participant': len(df) / df['participant_id'].nunique(),
+        'zero_donation_share': float((df['donation_amount'] == 0).mean()),
+    }
+    return [{'model': 'descriptives', 'part': '', 'term': term, 'estimate': float(value)}
+            for term, value in values.items()]
+
+
+def write_descriptives(filepath='Data_LongFormat.csv', results_dir=RESULTS_DIR):
+    """descriptives section from the cached rows of filepath"""
+    import data_cache
+    df = data_cache.load_cached(filepath, columns=['participant_id', 'post_id', 'donation_amount'])
+    return write_section('descriptives', descriptive_records(df), results_dir, source=filepath)
+
+
+class ResultsStore:
+    """Read side of the store: one row per model, part and term"""
+
+    def __init__(self, table):
+        self.table = table.reindex(columns=list(dict.fromkeys(COLUMNS + list(table.columns))))
+
+    @classmethod
+    def load(cls, results_dir=RESULTS_DIR):
+        """All sections in results_dir; an empty store if there are none"""
+        rows = []
+        for path in sorted(glob.glob(os.path.join(results_dir, '*.json'))):
+            with open(path) as f:
+                section = json.load(f)
+            if section.get('version') != STORE_VERSION:
+                raise ValueError(f"{path} has store version {section.get('version')}, expected {STORE_VERSION}")
+            rows += section['rows']
+        return cls(pd.DataFrame(rows))
+
+    def get(self, model, term, part=''):
+        """The row of one coefficient as a dict, or None if the store does not have it"""
+        if self.table.empty:
+            return None
+        match = self.table[(self.table['model'] == model) & (self.table['term'] == term) &
+                           (self.table['part'].fillna('') == part)]
+        return None if match.empty else match.iloc[0].to_dict()
+
+    def value(self, model, term, part='', default=None):
+        row = self.get(model, term, part)
+        return default if row is None else row['estimate']
+
+    def models(self):
+        return sorted(self.table['model'].unique()) if not self.table.empty else []
+
+    def digest(self, models=None):
+        """Hash of the rows of the given models (default: all); equal digests mean equal tables"""
+        table = self.table if models is None else self.table[self.table['model'].isin(models)]
+        text = table.sort_values(['model', 'part', 'term']).to_json(orient='records', double_precision=15)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+def reference_p(key):
+    """Two-sided normal p-value of an R_REFERENCE entry"""
+    return math.erfc(abs(R_REFERENCE[key][1]) / math.sqrt(2))
+
+
+def reference_conflicts(store, alpha=ALPHA):
+    """(model, part, term, reason) for every reported term whose significance differs from R or the thesis"""
+    expected = {key: reference_p(key) < alpha for key in R_REFERENCE}
+    expected.update(THESIS_SIGNIFICANCE)
+    conflicts = []
+    for (model, part, term), significant in expected.items():
+        row = store.get(model, term, part)
+        if row is None:
+            conflicts.append((model, part, term, "missing from the store"))
+        elif (row['p_value'] < alpha) != significant:
+            conflicts.append((model, part, term, f"p = {row['p_value']:.3g} but the reference is "
+                                                 f"{'' if significant else 'not '}significant"))
+    return conflicts
+
+
+def verdict(row, expected_sign, alpha=ALPHA):
+    """'Supported', 'Not Supported (Opposite)' or 'Not Supported' for a directional hypothesis on one coefficient"""
+    if row is None or pd.isna(row['p_value']) or row['p_value'] >= alpha:
+        return 'Not Supported'
+    return 'Supported' if row['estimate'] * expected_sign > 0 else 'Not Supported (Opposite)'
+
+
+if __name__ == "__main__":
+    import argparse
+    import scheduler
+    parser = argparse.ArgumentParser(description="Write the results store from the data and the model artifacts")
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    args = parser.parse_args()
+    print(f"Wrote {write_descriptives(results_dir=args.results_dir)}")
+    paths = {job.name: scheduler.artifact_path(job.name) for job in scheduler.phase_jobs()}
+    missing = [name for name, path in paths.items() if not os.path.exists(path)]
+    if missing:
+        print(f"No artifacts for {', '.join(missing)}; run python models.py first.")
+    else:
+        print(f"Wrote {write_model_results(paths, args.results_dir)}")
+    store = ResultsStore.load(args.results_dir)
+    print(store.table[['model', 'part', 'term', 'estimate', 'p_value']].to_string(index=False))
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import models
+from data_cache import CACHE_DIR
+
+ARTIFACT_DIR = os.path.join(CACHE_DIR, 'artifacts')
+
+# Rows each job reads; the worker derives them from the loaded source once
+DATASETS = {
+    'all': lambda df: df,
+    'donors': lambda df: df[df['donation_amount'] > 0],
+}
+
+
+class Job:
+    """One model specification: models.<model>(data, *args, **kwargs) on a declared dataset"""
+
+    def __init__(self, name, outcome, model, data, args, kwargs=None, cost=1):
+        self.name = name
+        self.outcome = outcome
+        self.model = model
+        self.data = data
+        self.args = args
+        self.kwargs = kwargs or {}
+        # Relative run time; expensive jobs are submitted first
+        self.cost = cost
+
+
+def phase_jobs():
+    """Jobs behind the Python counterparts of phase2_results.txt, phase3_results.txt and phase3_donation_fix.txt"""
+    jobs = []
+    for phase, terms in ((2, models.MAIN_EFFECTS), (3, models.INTERACTION)):
+        jobs += [
+            Job(f'phase{phase}/engagement', 'engagement', 'fit_clmm', 'all', ('rating', terms), cost=5),
+            Job(f'phase{phase}/persuasiveness', 'persuasiveness', 'fit_lmm', 'all', ('persuasiveness', terms)),
+            # Zero part kept on main effects, as in the simplified R ziformula
+            Job(f'phase{phase}/donation', 'donation', 'fit_hurdle', 'all', (terms,),
+                {'zero_terms': models.MAIN_EFFECTS}, cost=2),
+            # The glmmTMB zero-inflation part collapsed (intercept near -22), so the R donation
+            # coefficients are those of a gaussian LMM on all rows
+            Job(f'phase{phase}/donation (all rows)', 'donation (all rows)', 'fit_lmm', 'all',
+                ('donation_amount', terms)),
+        ]
+    jobs.append(Job('phase3/donation (donors only)', 'donation (donors only)', 'fit_lmm', 'donors',
+                    ('donation_amount', models.INTERACTION),
+                    {'name': 'donation_amount | > 0 (donors only)'}))
+    return jobs
+
+
+# Named apart from the R outputs (phase2_results.txt, ...), which stay as R printed them
+REPORTS = [
+    ('phase2_results_py.txt', "Phase 2: Main Effects",
+     ['phase2/engagement', 'phase2/persuasiveness', 'phase2/donation', 'phase2/donation (all rows)']),
+    ('phase3_results_py.txt', "Phase 3: Interaction Analysis",
+     ['phase3/engagement', 'phase3/persuasiveness', 'phase3/donation', 'phase3/donation (all rows)']),
+    ('phase3_donation_fix_py.txt', "Donation Interaction Model (LMM on Donors)",
+     ['phase3/donation (donors only)']),
+]
+
+
+def artifact_path(name, artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, re.sub(r'[^\w/]+', '_', name).strip('_') + '.json')
+
+
+# Per-process state: the loaded source and a FitCache, reused by every job the process runs
+_state = {}
+
+
+def _worker_state(source, cache_path):
+    if _state.get('key') != (source, cache_path):
+        import data_cache
+        _state['key'] = (source, cache_path)
+        _state['df'] = models.prepare(data_cache.load_cached(source))
+        _state['data'] = {}
+        _state['cache'] = models.FitCache.load(cache_path) if cache_path else models.FitCache()
+    return _state
+
+
+def _run_job(job, source, cache_path, artifact_dir):
+    state = _worker_state(source, cache_path)
+    if job.data not in state['data']:
+        state['data'][job.data] = DATASETS[job.data](state['df'])
+    cache = state['cache']
+    start, added = time.perf_counter(), len(cache.added)
+    counts = cache.reused, cache.warm_started, cache.cold
+
+    result = getattr(models, job.model)(state['data'][job.data], *job.args, cache=cache, **job.kwargs)
+    artifact = {'job': job.name, 'outcome': job.outcome, 'model': job.model, 'data': job.data,
+                'seconds': time.perf_counter() - start, 'result': result.to_dict()}
+    path = artifact_path(job.name, artifact_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(artifact, f, indent=1)
+    os.replace(path + '.tmp', path)
+    delta = [now - before for now, before in zip((cache.reused, cache.warm_started, cache.cold), counts)]
+    return path, cache.added[added:], delta
+
+
+def run_jobs(jobs, source='Data_LongFormat.csv', workers=None, cache_path=models.FIT_CACHE_PATH,
+             artifact_dir=ARTIFACT_DIR):
+    """Fit every job and write its JSON artifact; returns {job name: artifact path}.
+
+    workers=1 runs the jobs in this process in the given order, so later
+    jobs are warm-started from earlier ones. Otherwise the jobs run on a
+    process pool, most expensive first, and the new fits are merged into the
+    cache at cache_path afterwards.
+    """
+    cache = models.FitCache.load(cache_path) if cache_path else models.FitCache()
+    paths, counts = {}, [0, 0, 0]
+
+    def collect(job, outcome):
+        path, added, delta = outcome
+        paths[job.name] = path
+        cache.merge(added)
+        counts[:] = [a + b for a, b in zip(counts, delta)]
+        print(f"  {job.name}: done")
+
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if workers == 1:
+        _state.clear()
+        for job in jobs:
+            collect(job, _run_job(job, source, cache_path, artifact_dir))
+    else:
+        ordered = sorted(jobs, key=lambda job: -job.cost)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_job, job, source, cache_path, artifact_dir): job for job in ordered}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+    print(f"Model cache: {counts[0]} reused, {counts[1]} warm-started, {counts[2]} cold fits.")
+    if cache_path:
+        cache.save(cache_path)
+    return paths
+
+
+def assemble_reports(paths, reports=REPORTS, out_dir='.'):
+    """Write the text reports from the job artifacts"""
+    written = []
+    for filename, title, names in reports:
+        path = os.path.join(out_dir, filename)
+        with open(path, 'w') as f:
+            f.write(f"--- {title} ---\n")
+            for name in names:
+                with open(paths[name]) as artifact_file:
+                    artifact = json.load(artifact_file)
+                f.write(f"\n\n--- {artifact['outcome'].capitalize()} Model ---\n")
+                f.write(artifact['result']['summary'] + "\n")
+        written.append(path)
+    return written
+
+
+def main(workers=None, cache_path=models.FIT_CACHE_PATH):
+    """Fit the phase jobs, write the phase reports and the models section of the results store"""
+    start = time.perf_counter()
+    jobs = phase_jobs()
+    print(f"Fitting {len(jobs)} models...")
+    paths = run_jobs(jobs, workers=workers, cache_path=cache_path)
+    written = assemble_reports(paths)
+    import results
+    written.append(results.write_model_results(paths))
+    print(f"Model results saved to {', '.join(written)} ({time.perf_counter() - start:.1f} s).")
+
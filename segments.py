@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import aggregate
+
+# Keys a report is written for every value of
+SEGMENT_KEYS = ['charity_id', 'cluster_id', 'personalization_type']
+REPORT_DIR = os.path.join('reports', 'segments')
+
+
+def segment_slug(value):
+    """File-system safe directory name of a segment value"""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)).strip('_') or 'empty'
+
+
+def segment_slugs(values):
+    """{value: directory name} for the values of one key; values whose slugs collide (ignoring case, for
+    case-insensitive file systems) get a short hash of the value appended, so no report overwrites another"""
+    slugs = {value: segment_slug(value) for value in values}
+    taken = pd.Series(list(slugs.values())).str.lower().value_counts()
+    return {value: f"{slug}-{hashlib.sha256(str(value).encode()).hexdigest()[:8]}" if taken[slug.lower()] > 1
+            else slug for value, slug in slugs.items()}
+
+
+def split_segments(cell_stats, key):
+    """(value, CellStats over CELL_KEYS) for every value of key, split from one collapse of the cells"""
+    stats = cell_stats.collapse([key] + aggregate.CELL_KEYS)
+    tallies = {var: dict(iter(tally.groupby(level=key, observed=True, sort=False)))
+               for var, tally in stats.tallies.items()}
+    for value, moments in stats.moments.groupby(level=key, observed=True, sort=False):
+        yield value, aggregate.CellStats(aggregate.CELL_KEYS, moments.droplevel(key),
+                                         {var: tallies[var][value].droplevel(key) for var in tallies})
+
+
+def segment_index(cell_stats, keys=SEGMENT_KEYS):
+    """One row per segment with its size and headline statistics, from the per-key collapses"""
+    frames = []
+    for key in keys:
+        stats = cell_stats.collapse([key])
+        frame = pd.DataFrame({'n': stats.count(),
+                              'persuasiveness_mean': stats.mean('persuasiveness'),
+                              'donation_mean': stats.mean('donation_amount'),
+                              'zero_donation_share': stats.zero_share()})
+        frame.index = pd.MultiIndex.from_arrays([[key] * len(frame), frame.index.astype(str)],
+                                                names=['key', 'value'])
+        frames.append(frame)
+    return pd.concat(frames)
+
+
+def _write_segment(key, value, slug, cell_stats, out_dir, figures):
+    """(report directory, error message or None); one failing segment must not stop the batch"""
+    import analysis
+    import plotting
+    segment_dir = os.path.join(out_dir, key, slug)
+    try:
+        os.makedirs(segment_dir, exist_ok=True)
+        analysis.write_summary(cell_stats, os.path.join(segment_dir, 'analysis_summary.md'))
+        if figures:
+            tables = plotting.plot_tables(cell_stats)
+            for name in plotting.FIGURES:
+                plotting._render(name, tables, segment_dir)
+    except Exception as e:
+        return segment_dir, f"{type(e).__name__}: {e}"
+    return segment_dir, None
+
+
+def _init_worker(figures):
+    if figures:
+        import plotting
+        plotting._init_worker()
+
+
+def write_index(index, dirs, path, errors=None):
+    """Markdown index of the segment reports, grouped by key; segments in errors are listed as failed"""
+    errors = errors or {}
+    with open(path, 'w') as f:
+        f.write("# Segment Reports\n\n")
+        for key, table in index.groupby(level='key', sort=False):
+            table = table.droplevel('key')
+            links = [f"{value} (failed: {errors[(key, value)]})" if (key, value) in errors else
+                     f"[{value}]({os.path.relpath(dirs[(key, value)], os.path.dirname(path))}/analysis_summary.md)"
+                     for value in table.index]
+            f.write(f"## {key} ({len(table)} segments)\n\n")
+            table = table.set_axis(pd.Index(links, name=key))
+            f.write(table.to_markdown(floatfmt=('', '.0f', '.3f', '.3f', '.3f')) + "\n\n")
+    return path
+
+
+def write_segment_reports(cell_stats, keys=SEGMENT_KEYS, out_dir=REPORT_DIR, figures=True, workers=None):
+    """analysis_summary.md (and the figures) for every value of every key, plus index.md; returns the index path.
+
+    cell_stats must be kept by every key in keys and CELL_KEYS, e.g. the cells
+    of indexed.load_indexed(). Segments are split from its per-key collapses,
+    so no rows are read again, and rendered on a process pool.
+    """
+    missing = set(keys) - set(cell_stats.keys)
+    if missing:
+        raise KeyError(f"cell statistics are not kept by {', '.join(sorted(missing))}")
+    tasks = []
+    for key in keys:
+        split = [(str(value), stats) for value, stats in split_segments(cell_stats, key)]
+        slugs = segment_slugs([value for value, _ in split])
+        tasks += [(key, value, slugs[value], stats, out_dir, figures) for value, stats in split]
+    print(f"Writing {len(tasks)} segment reports to {out_dir}/...")
+    if workers == 1:
+        _init_worker(figures)
+        written = [_write_segment(*task) for task in tasks]
+    else:
+        workers = workers or min(len(tasks), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(figures,)) as pool:
+            # Batches keep the per-task overhead small when there are thousands of segments
+            written = list(pool.map(_write_segment, *zip(*tasks), chunksize=max(1, len(tasks) // (4 * workers))))
+    dirs = {(key, value): path for (key, value, *_), (path, _) in zip(tasks, written)}
+    errors = {(key, value): error for (key, value, *_), (_, error) in zip(tasks, written) if error}
+    for (key, value), error in errors.items():
+        print(f"  {key}={value} failed: {error}")
+    if errors:
+        print(f"{len(errors)} of {len(tasks)} segment reports failed.")
+    return write_index(segment_index(cell_stats, keys), dirs, os.path.join(out_dir, 'index.md'), errors)
+
+
+if __name__ == "__main__":
+    import argparse
+    import indexed
+    parser = argparse.ArgumentParser(description="Write the descriptive report and figures of every segment")
+    parser.add_argument('--keys', nargs='*', default=SEGMENT_KEYS, help="segment keys (default: %(default)s)")
+    parser.add_argument('--out-dir', default=REPORT_DIR)
+    parser.add_argument('--no-figures', action='store_true', help="only write the markdown reports")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    data = indexed.load_indexed(keys=list(dict.fromkeys(args.keys + aggregate.CELL_KEYS)))
+    path = write_segment_reports(data.cells, args.keys, args.out_dir, not args.no_figures, args.workers)
+    print(f"Segment index saved to {path} ({time.perf_counter() - start:.1f} s).")
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import data_cache
+import text_features
+from data_cache import CACHE_DIR
+
+INDEX_VERSION = 1
+DEFAULT_PARTITIONS = ('charity_id', 'cluster_id')
+# Post-level columns kept for candidate filters
+DEFAULT_ATTRIBUTES = ('content_source', 'charity_id')
+# Queries scored per block; a block holds at most this many x candidates scores
+DEFAULT_CHUNK = 1024
+
+
+def _csr_arrays(matrix):
+    return {'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr}
+
+
+class SimilarityIndex:
+    """L2-normalized sparse post vectors with partition membership, for blocked top-k cosine search.
+
+    A partition assigns each post to one or more labels (a post is shown to
+    participants of several cluster_id profiles, but has a single charity_id);
+    a query only scores the candidates sharing a label with it.
+    """
+
+    def __init__(self, post_ids, vectors, partitions=None, attributes=None, digest=None):
+        self.post_ids = np.asarray(post_ids)
+        self.vectors = vectors
+        # name -> (labels, posts x labels membership csr)
+        self.partitions = partitions or {}
+        # name -> (labels, per-post codes)
+        self.attributes = attributes or {}
+        self.digest = digest
+        self.position = pd.Index(self.post_ids)
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def _rows(self, post_ids):
+        if post_ids is None:
+            return np.arange(len(self))
+        rows = self.position.get_indexer(post_ids)
+        if (rows < 0).any():
+            raise KeyError(f"post_id not in the index: {np.asarray(post_ids)[rows < 0][:5].tolist()}")
+        return rows
+
+    def _candidates(self, where):
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in (where or {}).items():
+            labels, codes = self.attributes[name]
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= np.isin(codes, [labels.index(v) for v in values if v in labels])
+        return np.flatnonzero(mask)
+
+    def query(self, post_ids=None, k=5, within=None, where=None, exclude_self=True, chunk=DEFAULT_CHUNK):
+        """(neighbour post_ids, cosine similarities), each (queries, k), most similar first.
+
+        within names a partition to search inside; where filters candidates on
+        post attributes, e.g. {'content_source': 'Human'}. Missing neighbours
+        are -1 with similarity nan.
+        """
+        rows = self._rows(post_ids)
+        candidates = self._candidates(where)
+        neighbours = np.full((len(rows), k), -1, dtype=np.int64)
+        similarities = np.full((len(rows), k), np.nan)
+        if within is not None:
+            membership = self.partitions[within][1]
+            # Queries sorted by their first label, so a block mostly stays inside one partition
+            first = np.asarray(membership[rows].argmax(axis=1)).ravel()
+            order = np.argsort(first, kind='stable')
+        else:
+            order = np.arange(len(rows))
+
+        candidate_vectors = self.vectors[candidates]
+        for start in range(0, len(order), chunk):
+            block = order[start:start + chunk]
+            q = rows[block]
+            if within is not None:
+                shared = (membership[q] @ membership[candidates].T).tocsr()
+                # Only candidates sharing a label with some query of the block are scored
+                columns = np.flatnonzero(shared.getnnz(axis=0))
+                allowed = shared[:, columns].toarray() > 0
+            else:
+                columns = np.arange(len(candidates))
+                allowed = np.ones((len(q), len(columns)), dtype=bool)
+            if not len(columns):
+                continue
+            scores = (self.vectors[q] @ candidate_vectors[columns].T).toarray()
+            scores[~allowed] = -np.inf
+            if exclude_self:
+                scores[candidates[columns][None, :] == q[:, None]] = -np.inf
+            top = min(k, len(columns))
+            best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            ranked = np.argsort(-best_scores, axis=1, kind='stable')
+            best, best_scores = np.take_along_axis(best, ranked, axis=1), np.take_along_axis(best_scores, ranked, axis=1)
+            valid = np.isfinite(best_scores)
+            neighbours[block, :top] = np.where(valid, self.post_ids[candidates[columns][best]], -1)
+            similarities[block, :top] = np.where(valid, best_scores, np.nan)
+        return neighbours, similarities
+
+    def save(self, directory):
+        """Write the arrays as .npy files (memory-mappable) and the labels as JSON"""
+        os.makedirs(directory, exist_ok=True)
+        arrays = {'post_ids': self.post_ids, **{f"vectors.{k}": v for k, v in _csr_arrays(self.vectors).items()}}
+        meta = {'version': INDEX_VERSION, 'digest': self.digest, 'shape': list(self.vectors.shape),
+                'partitions': {}, 'attributes': {}}
+        for name, (labels, membership) in self.partitions.items():
+            meta['partitions'][name] = {'labels': labels, 'shape': list(membership.shape)}
+            arrays.update({f"partition.{name}.{k}": v for k, v in _csr_arrays(membership).items()})
+        for name, (labels, codes) in self.attributes.items():
+            meta['attributes'][name] = labels
+            arrays[f"attribute.{name}"] = codes
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(array))
+        # meta.json last: a directory without it is an incomplete index
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=1)
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Open a saved index; with mmap the arrays stay on disk and are paged in on use"""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != INDEX_VERSION:
+            raise ValueError(f"{directory} holds index version {meta['version']}, expected {INDEX_VERSION}")
+        mode = 'r' if mmap else None
+
+        def array(name):
+            return np.load(os.path.join(directory, name + '.npy'), mmap_mode=mode)
+
+        def csr(prefix, shape):
+            return sp.csr_matrix((array(f"{prefix}.data"), array(f"{prefix}.indices"), array(f"{prefix}.indptr")),
+                                 shape=tuple(shape), copy=False)
+
+        partitions = {name: (info['labels'], csr(f"partition.{name}", info['shape']))
+                      for name, info in meta['partitions'].items()}
+        attributes = {name: (labels, array(f"attribute.{name}")) for name, labels in meta['attributes'].items()}
+        return cls(array('post_ids'), csr('vectors', meta['shape']), partitions, attributes, meta['digest'])
+
+
+def _membership(pairs, post_ids, column):
+    # posts x labels indicator matrix from the distinct (post_id, label) pairs of the long table
+    codes, labels = pd.factorize(pairs[column], sort=True)
+    rows = pd.Index(post_ids).get_indexer(pairs['post_id'])
+    keep = rows >= 0
+    matrix = sp.csr_matrix((np.ones(keep.sum()), (rows[keep], codes[keep])), shape=(len(post_ids), len(labels)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return [str(label) for label in labels], matrix
+
+
+def build_index(posts, vectors, rows, partitions=DEFAULT_PARTITIONS, attributes=DEFAULT_ATTRIBUTES, digest=None):
+    """SimilarityIndex over the posts with vectors (same order), partitions and attributes taken from rows"""
+    post_ids = np.asarray(posts)
+    index_partitions = {}
+    for column in partitions:
+        pairs = rows[['post_id', column]].drop_duplicates()
+        index_partitions[column] = _membership(pairs, post_ids, column)
+    index_attributes = {}
+    for column in attributes:
+        pairs = rows[['post_id', column]].drop_duplicates()
+        if pairs['post_id'].duplicated().any():
+            raise ValueError(f"{column} varies within a post; use it as a partition instead")
+        values = pairs.set_index('post_id')[column].reindex(post_ids)
+        codes, labels = pd.factorize(values, sort=True)
+        index_attributes[column] = ([str(label) for label in labels], codes.astype(np.int32))
+    return SimilarityIndex(post_ids, vectors.tocsr(), index_partitions, index_attributes, digest)
+
+
+def index_path(digest, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"text_index-{digest[:16]}")
+
+
+def load_index(filepath='Data_LongFormat.csv', partitions=DEFAULT_PARTITIONS, attributes=DEFAULT_ATTRIBUTES,
+               cache_dir=CACHE_DIR, mmap=True):
+    """SimilarityIndex of the TF-IDF post vectors of filepath, built once and then memory-mapped from the cache"""
+    features = text_features.post_features(filepath, cache_dir)
+    key = json.dumps([features.digest, data_cache.file_hash(filepath), list(partitions), list(attributes)])
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    directory = index_path(digest, cache_dir)
+    if not os.path.exists(os.path.join(directory, 'meta.json')):
+        print(f"Building similarity index over {len(features.post_ids)} posts...")
+        rows = data_cache.load_cached(filepath, cache_dir, columns=['post_id'] + sorted(set(partitions) | set(attributes)))
+        index = build_index(features.post_ids, features.tfidf, rows, partitions, attributes, digest)
+        for name in os.listdir(cache_dir):
+            if name.startswith('text_index-') and name != os.path.basename(directory):
+                shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        index.save(directory)
+    return SimilarityIndex.load(directory, mmap=mmap)
+
+
+def nearest_sources(index, df, k=1, within='charity_id', query_source='LLM', match_source='Human',
+                    outcome='persuasiveness'):
+    """For each query_source post, its k nearest match_source posts in the same partition, with outcome means"""
+    means = df.groupby('post_id', observed=True)[outcome].mean()
+    labels, codes = index.attributes['content_source']
+    queries = index.post_ids[codes == labels.index(query_source)]
+    neighbours, similarities = index.query(queries, k, within=within, where={'content_source': match_source})
+    table = pd.DataFrame({
+        'post_id': np.repeat(queries, k),
+        'rank': np.tile(np.arange(1, k + 1), len(queries)),
+        'neighbour_post_id': neighbours.ravel(),
+        'similarity': similarities.ravel(),
+    })
+    table[outcome] = table['post_id'].map(means)
+    table[f"neighbour_{outcome}"] = table['neighbour_post_id'].map(means)
+    return table[table['neighbour_post_id'] >= 0].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import models
+    index = load_index()
+    df = models.prepare(data_cache.load_cached('Data_LongFormat.csv'))
+    for within in DEFAULT_PARTITIONS:
+        table = nearest_sources(index, df, within=within)
+        gap = table['persuasiveness'] - table['neighbour_persuasiveness']
+        print(f"\nNearest human appeal to each LLM appeal within {within}:")
+        print(f"  mean similarity {table['similarity'].mean():.3f}, "
+              f"corr(similarity, LLM persuasiveness) {table['similarity'].corr(table['persuasiveness']):.3f}, "
+              f"corr(similarity, LLM - human persuasiveness) {table['similarity'].corr(gap):.3f}")
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+import aggregate
+
+DEFAULT_CHUNKSIZE = 100_000
+PAIR_COLUMNS = ['participant_id', 'post_id']
+
+
+def pair_hashes(df):
+    """64-bit hashes of the participant/post pair of every row"""
+    return pd.util.hash_pandas_object(df[PAIR_COLUMNS].astype(str), index=False).to_numpy()
+
+
+class PairSet:
+    """Sorted set of hashed participant/post pairs for duplicate detection"""
+
+    def __init__(self, hashes=None):
+        self.hashes = np.empty(0, dtype=np.uint64) if hashes is None else hashes
+
+    def add(self, hashes):
+        """Add a block of hashes and return how many of them were already seen"""
+        unique = np.unique(hashes)
+        repeated = len(hashes) - len(unique)
+        seen = np.isin(unique, self.hashes, assume_unique=True)
+        self.hashes = np.union1d(self.hashes, unique)
+        return int(repeated + seen.sum())
+
+    def merge(self, other):
+        merged = PairSet(self.hashes.copy())
+        duplicates = merged.add(other.hashes)
+        return merged, duplicates
+
+    def __len__(self):
+        return len(self.hashes)
+
+
+class ChunkSummary:
+    """Mergeable accumulators for one or more blocks of the long-format data"""
+
+    def __init__(self, keys=aggregate.CELL_KEYS):
+        self.keys = list(keys)
+        self.rows = 0
+        self.duplicates = 0
+        self.missing = pd.Series(dtype='int64')
+        self.pairs = PairSet()
+        self.cell_stats = None
+
+    def update(self, chunk):
+        """Fold one block of rows into the accumulators"""
+        self.rows += len(chunk)
+        self.missing = self.missing.add(chunk.isnull().sum(), fill_value=0).astype('int64')
+        self.duplicates += self.pairs.add(pair_hashes(chunk))
+
+        chunk = chunk.assign(persuasiveness=chunk[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1))
+        stats = aggregate.CellStats.from_frame(chunk, self.keys)
+        self.cell_stats = stats if self.cell_stats is None else self.cell_stats.merge(stats)
+        return self
+
+    def merge(self, other):
+        """Combine the accumulators of two disjoint sets of blocks"""
+        merged = ChunkSummary(self.keys)
+        merged.rows = self.rows + other.rows
+        merged.missing = self.missing.add(other.missing, fill_value=0).astype('int64')
+        merged.pairs, cross_duplicates = self.pairs.merge(other.pairs)
+        merged.duplicates = self.duplicates + other.duplicates + cross_duplicates
+        if self.cell_stats is None or other.cell_stats is None:
+            merged.cell_stats = self.cell_stats if other.cell_stats is None else other.cell_stats
+        else:
+            merged.cell_stats = self.cell_stats.merge(other.cell_stats)
+        return merged
+
+
+def scan_csv(filepath, chunksize=DEFAULT_CHUNKSIZE, keys=aggregate.CELL_KEYS):
+    """Stream filepath in bounded blocks and return the merged ChunkSummary"""
+    print(f"Streaming data from {filepath} in chunks of {chunksize} rows...")
+    summary = ChunkSummary(keys)
+    for chunk in pd.read_csv(filepath, chunksize=chunksize):
+        summary.update(chunk)
+
+    print(f"Duplicate participant-message combinations: {summary.duplicates}")
+    missing = summary.missing
+    print("Missing values:\n", missing[missing > 0])
+    return summary
@@ -0,0 +1,168 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+
+CHARITIES = [
+    'Cancer Research Institute',
+    'Dana-Farber Cancer Institute',
+    'National Pediatric Cancer Foundation',
+    'Pancreatic Cancer Action Network',
+    'The Leukemia & Lymphoma Society',
+    'The Lustgarten Foundation for Pancreatic Cancer Research',
+]
+SOURCES = ['Human', 'LLM']
+PERSONALIZATION = ['generic', 'personalized', 'counterfactual']
+# Profile codes: (Y)oung/(O)ld, (F)emale/(M)ale, (L)iberal/(R)conservative, (R)eligious/(N)ot
+PROFILES = [''.join(code) for code in itertools.product('YO', 'FM', 'LR', 'RN')]
+COLUMNS = ['participant_id', 'charity_id', 'cluster_id', 'personalization_type', 'counterfactual_code',
+           'content_source', 'post_id', 'post_text', 'rating', 'donation_amount', 'persuasiveness_1',
+           'persuasiveness_2', 'persuasiveness_3', 'familiar', 'age', 'gender', 'ideology', 'religiosity']
+POSTS_PER_PARTICIPANT = len(CHARITIES)
+SCALES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+# Marginals of Data_LongFormat.csv
+DONATION_AMOUNTS = np.array([0.001, 0.002, 0.01, 0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.08, 0.09, 0.1])
+DONATION_WEIGHTS = np.array([4, 2, 1347, 1101, 113, 19, 95, 4, 2, 2, 1, 126], dtype=float)
+FAMILIAR_LEVELS, FAMILIAR_WEIGHTS = np.array([-1, 0, 1]), np.array([0.10, 0.55, 0.35])
+# Intercept of the zero-donation logit giving about 35% zeros after the random effects
+ZERO_LOGIT = -0.85
+# Latent ordinal cut points giving roughly 9% Dislike, 23% Neutral, 68% Like
+RATING_CUTS = np.array([-1.9, -0.6])
+WORDS = ('your gift today helps fund research care families patients hope cure support together '
+         'every donation matters breakthrough treatment children community give now change lives '
+         'science fight future stand with us make difference critical vital').split()
+
+
+def _profile_codes(age, female, ideology, religiosity):
+    # The cluster_id of a participant is the profile code of their own demographics
+    parts = [np.where(age < 45, 'Y', 'O'), np.where(female, 'F', 'M'),
+             np.where(ideology <= 3, 'L', 'R'), np.where(religiosity >= 4, 'R', 'N')]
+    codes = parts[0]
+    for part in parts[1:]:
+        codes = np.char.add(codes, part)
+    return codes
+
+
+def post_catalogue(variants=2, seed=0):
+    """One row per post: generic posts per charity x source and targeted posts per charity x source x profile"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for charity, source in itertools.product(CHARITIES, SOURCES):
+        for variant in range(variants):
+            rows.append((charity, source, 'generic', '', variant))
+            rows += [(charity, source, 'targeted', profile, variant) for profile in PROFILES]
+    posts = pd.DataFrame(rows, columns=['charity_id', 'content_source', 'kind', 'profile', 'variant'])
+    posts['post_id'] = rng.permutation(len(posts)) + 1
+    texts = []
+    for charity, profile in zip(posts['charity_id'], posts['profile']):
+        words = ' '.join(rng.choice(WORDS, size=rng.integers(25, 35)))
+        texts.append(f"{words.capitalize()}. Support {charity}{' (' + profile + ')' if profile else ''}. "
+                     f"Donate now: [link]")
+    posts['post_text'] = texts
+    # Crossed post effect on every outcome
+    posts['effect'] = rng.normal(0, 0.3, len(posts))
+    return posts.sort_values('post_id').reset_index(drop=True)
+
+
+def generate(n_rows, seed=0, variants=2, effects=None):
+    """Synthetic long-format data with the schema and structure of Data_LongFormat.csv.
+
+    Each participant rates one post per charity, covering every personalization
+    type x content source once; outcomes share crossed participant and post
+    effects. effects overrides the fixed effects on the latent scale
+    (female, llm, interaction). Label columns are categoricals as in data_cache.
+    """
+    rng = np.random.default_rng(seed)
+    effects = {'female': 0.05, 'llm': 0.15, 'interaction': 0.05, **(effects or {})}
+    n_participants = max(1, -(-n_rows // POSTS_PER_PARTICIPANT))
+    posts = post_catalogue(variants, seed)
+
+    # Participants
+    female = rng.random(n_participants) < 0.5
+    age = np.clip(rng.normal(45, 16, n_participants), 18, 83).round().astype(int)
+    ideology = rng.integers(1, 7, n_participants)
+    religiosity = rng.choice(np.arange(1, 7), n_participants, p=[0.17, 0.10, 0.07, 0.33, 0.25, 0.08])
+    cluster = _profile_codes(age, female, ideology, religiosity)
+    counterfactual = np.array(PROFILES)[rng.integers(0, len(PROFILES), n_participants)]
+    # 24 hex digits like the Prolific ids; the index prefix keeps them unique
+    ids = [f"{i:08x}{x:016x}" for i, x in enumerate(rng.integers(0, 2 ** 63, n_participants, dtype=np.int64))]
+    participant_effect = rng.normal(0, 0.8, n_participants)
+    donor_propensity = rng.normal(0, 1.5, n_participants)
+
+    # Rows: one per participant x charity, with the 6 (personalization, source) slots shuffled over charities
+    participant = np.repeat(np.arange(n_participants), POSTS_PER_PARTICIPANT)
+    charity = np.tile(np.arange(POSTS_PER_PARTICIPANT), n_participants)
+    slot = rng.permuted(np.tile(np.arange(POSTS_PER_PARTICIPANT), (n_participants, 1)), axis=1).ravel()
+    personalization, source = slot // len(SOURCES), slot % len(SOURCES)
+    variant = rng.integers(0, variants, len(participant))
+    profile = np.where(personalization == 1, cluster[participant], counterfactual[participant])
+    profile = np.where(personalization == 0, '', profile)
+
+    lookup = posts.set_index(['charity_id', 'content_source', 'profile', 'variant'])['post_id']
+    key = pd.MultiIndex.from_arrays([np.array(CHARITIES)[charity], np.array(SOURCES)[source], profile, variant])
+    post_id = lookup.reindex(key).to_numpy()
+    post_index = post_id - 1
+    keep = slice(0, n_rows)
+
+    # Outcomes on a shared latent scale
+    is_female, is_llm = female[participant], source == 1
+    latent = (participant_effect[participant] + posts['effect'].to_numpy()[post_index]
+              + effects['female'] * is_female + effects['llm'] * is_llm
+              + effects['interaction'] * (is_female & is_llm))
+    n = len(participant)
+    persuasion = 5.0 + 1.5 * latent + rng.normal(0, 1.0, n)
+    items = [np.clip(np.rint(persuasion + rng.normal(0, 0.6, n)), 1, 7).astype(int) for _ in range(3)]
+    engagement = latent + rng.logistic(0, 0.6, n)
+    rating = np.searchsorted(RATING_CUTS, engagement)
+    # Zero donations: mostly a participant trait, shifted by the latent appeal
+    zero_logit = ZERO_LOGIT - donor_propensity[participant] - 0.5 * latent
+    zero = rng.random(n) < 1 / (1 + np.exp(-zero_logit))
+    amount = rng.choice(DONATION_AMOUNTS, n, p=DONATION_WEIGHTS / DONATION_WEIGHTS.sum())
+    donation = np.where(zero, 0.0, amount)
+
+    def categorical(codes, categories):
+        return pd.Categorical.from_codes(np.asarray(codes)[keep], categories=categories)
+
+    df = pd.DataFrame({
+        'participant_id': categorical(participant, ids),
+        'charity_id': categorical(charity, CHARITIES),
+        'cluster_id': pd.Categorical(cluster[participant][keep], categories=PROFILES),
+        'personalization_type': categorical(personalization, PERSONALIZATION),
+        'counterfactual_code': pd.Categorical(counterfactual[participant][keep], categories=PROFILES),
+        'content_source': categorical(source, SOURCES),
+        'post_id': post_id[keep],
+        'post_text': pd.Categorical.from_codes(post_index[keep], categories=posts['post_text']),
+        'rating': categorical(rating, data_cache.ENGAGEMENT_LEVELS),
+        'donation_amount': donation[keep],
+        'persuasiveness_1': items[0][keep],
+        'persuasiveness_2': items[1][keep],
+        'persuasiveness_3': items[2][keep],
+        'familiar': rng.choice(FAMILIAR_LEVELS, n, p=FAMILIAR_WEIGHTS)[keep],
+        'age': age[participant][keep],
+        'gender': categorical((~female[participant]).astype(int), ['Female', 'Male']),
+        'ideology': ideology[participant][keep],
+        'religiosity': religiosity[participant][keep],
+    })
+    return df[COLUMNS]
+
+
+def write_csv(df, path, chunksize=500_000):
+    """Write df as a long-format CSV in blocks, so large frames are not formatted in one piece"""
+    for start in range(0, len(df), chunksize):
+        df.iloc[start:start + chunksize].to_csv(path, mode='w' if start == 0 else 'a',
+                                                header=start == 0, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a synthetic dataset with the Data_LongFormat.csv schema")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--output', default=None, help="CSV path (default: synthetic_<rows>.csv)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    path = write_csv(generate(args.rows, seed=args.seed), args.output or f"synthetic_{args.rows}.csv")
+    print(f"Wrote {args.rows} rows to {path}.")
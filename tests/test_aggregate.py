@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregate
+from test_segments import small_cells_frame
+
+
+def frame_with_missing_values(seed=0):
+    df = pd.concat([small_cells_frame(seed=seed)] * 5, ignore_index=True)
+    rng = np.random.default_rng(seed)
+    df.loc[rng.choice(len(df), 200, replace=False), 'donation_amount'] = np.nan
+    df.loc[rng.choice(len(df), 60, replace=False), 'persuasiveness_2'] = np.nan
+    df['persuasiveness'] = df[aggregate.PERSUASIVENESS_ITEMS].mean(axis=1)
+    df['engagement_numeric'] = df['rating'].map(aggregate.ENGAGEMENT_MAP).astype(float)
+    return df
+
+
+@pytest.mark.parametrize('var', ['donation_amount', 'persuasiveness', 'persuasiveness_2'])
+def test_describe_skips_missing_values_like_pandas(var):
+    df = frame_with_missing_values()
+    expected = df.groupby(aggregate.CELL_KEYS)[var].agg(['count', 'mean', 'std'])
+    cells = aggregate.CellStats.from_frame(df)
+    pd.testing.assert_frame_equal(cells.describe(var, ('count', 'mean', 'std')), expected, check_dtype=False,
+                                  check_names=False)
+
+
+def test_merged_chunks_and_correlations_match_pandas():
+    df = frame_with_missing_values()
+    half = len(df) // 2
+    cells = aggregate.CellStats.from_frame(df.iloc[:half]).merge(aggregate.CellStats.from_frame(df.iloc[half:]))
+    expected = df.groupby(aggregate.CELL_KEYS)['donation_amount'].agg(['mean', 'std'])
+    np.testing.assert_allclose(cells.describe('donation_amount', ('mean', 'std')), expected)
+    np.testing.assert_allclose(cells.correlations(), df[aggregate.CORRELATION_VARS].corr())
+    female_human = df[(df['gender'] == 'Female') & (df['content_source'] == 'Human')]
+    np.testing.assert_allclose(cells.covariance(aggregate.PERSUASIVENESS_ITEMS)[0],
+                               female_human[aggregate.PERSUASIVENESS_ITEMS].cov())
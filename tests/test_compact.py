@@ -0,0 +1,15 @@
+import pandas as pd
+
+import compact
+
+
+def test_integer_columns_keep_their_values():
+    df = pd.DataFrame({'persuasiveness_1': [1, 7, 4], 'ideology': [1, 300, -200], 'age': [18, 90, 40]})
+    compacted = compact.compact_frame(df)
+    assert str(compacted['persuasiveness_1'].dtype) == 'int8'
+    pd.testing.assert_frame_equal(compacted.astype('int64'), df)
+
+
+def test_cent_amounts_stay_float64():
+    amounts = pd.Series([0.0, 0.01, 0.05], name='donation_amount')
+    assert compact.compact_column(amounts).dtype == 'float64'
@@ -0,0 +1,17 @@
+import os
+
+import analysis
+
+# Slack over IMPORT_BUDGETS for slow or shared CI machines; IMPORT_BUDGET_SCALE overrides it
+SCALE = float(os.environ.get('IMPORT_BUDGET_SCALE', 3.0))
+
+
+def test_import_times_within_budget():
+    for command, (seconds, deferred) in analysis.import_times().items():
+        assert seconds <= analysis.IMPORT_BUDGETS[command] * SCALE, f"{command} imports in {seconds:.2f} s"
+        assert deferred == [], f"{command} imports {', '.join(deferred)}"
+
+
+def test_no_plotting_or_stats_modules_after_running():
+    loaded = analysis.deferred_after_run(['describe', 'summary', 'plot'])
+    assert loaded == {'describe': [], 'summary': [], 'plot': []}
@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+import multiverse
+import results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_hurdle_zero_part_uses_the_random_effects():
+    specs = [spec for spec in multiverse.enumerate_specs(['donation'])
+             if spec['model'] == 'hurdle' and spec['transform'] == 'raw' and spec['covariates'] == ''
+             and spec['terms'] == 'main' and spec['reference'] == 'Male/Human']
+    table = multiverse.run_multiverse(specs, source=os.path.join(ROOT, 'Data_LongFormat.csv'), workers=1)
+    zero = table[(table['part'] == 'zero') & (table['term'] == 'genderFemale')].set_index('random_effects')
+    assert zero['p_value'].nunique() == 3
+    # The crossed specification is the hurdle model of the thesis
+    store = results.ResultsStore.load(os.path.join(ROOT, results.RESULTS_DIR))
+    row = store.get('phase2/donation', 'genderFemale', 'zero')
+    assert zero.loc['crossed', 'estimate'] == pytest.approx(row['estimate'], rel=1e-3)
+    assert zero.loc['crossed', 'p_value'] == pytest.approx(row['p_value'], abs=1e-3)
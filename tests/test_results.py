@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+import results
+
+STORE = results.ResultsStore.load(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                               results.RESULTS_DIR))
+
+
+@pytest.mark.parametrize('key', sorted(results.R_REFERENCE))
+def test_store_matches_r_output(key):
+    model, part, term = key
+    row = STORE.get(model, term, part)
+    assert row is not None
+    estimate, statistic = results.R_REFERENCE[key]
+    assert row['estimate'] == pytest.approx(estimate, rel=0.02)
+    assert row['statistic'] == pytest.approx(statistic, abs=0.05)
+    assert row['p_value'] == pytest.approx(results.reference_p(key), abs=0.005)
+
+
+def test_no_reported_term_contradicts_the_thesis():
+    assert results.reference_conflicts(STORE) == []
+
+
+def test_deck_refuses_a_contradicting_store():
+    create_pptx = pytest.importorskip('create_pptx')
+    table = STORE.table.copy()
+    zero_gender = (table['model'] == 'phase2/donation') & (table['part'] == 'zero') & \
+        (table['term'] == 'genderFemale')
+    table.loc[zero_gender, 'p_value'] = 0.009
+    with pytest.raises(ValueError, match='genderFemale'):
+        create_pptx.thesis_slides(results.ResultsStore(table))
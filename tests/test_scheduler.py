@@ -0,0 +1,9 @@
+import scheduler
+
+# Written by the R scripts and tracked in git
+R_OUTPUTS = {'phase2_results.txt', 'phase3_results.txt', 'phase3_donation_fix.txt'}
+
+
+def test_python_reports_do_not_overwrite_the_r_outputs():
+    filenames = {filename for filename, _, _ in scheduler.REPORTS}
+    assert not filenames & R_OUTPUTS
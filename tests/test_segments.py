@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+import aggregate
+import segments
+
+
+def small_cells_frame(n_posts=40, seed=0):
+    """Rows where every post_id x gender x content_source cell holds one to three rows"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for post in range(n_posts):
+        for gender in ['Female', 'Male']:
+            for source in ['Human', 'LLM']:
+                for _ in range(rng.integers(1, 4)):
+                    item = rng.integers(1, 8)
+                    rows.append({'post_id': post, 'gender': gender, 'content_source': source,
+                                 'rating': rng.choice(aggregate.ENGAGEMENT_LEVELS),
+                                 # Constant items in most cells
+                                 'persuasiveness_1': item, 'persuasiveness_2': item,
+                                 'persuasiveness_3': rng.integers(1, 8),
+                                 'donation_amount': rng.choice([0.0, 0.01, 0.05])})
+    return pd.DataFrame(rows)
+
+
+def test_tiny_cells_do_not_fail(tmp_path):
+    cells = aggregate.CellStats.from_frame(small_cells_frame(), ['post_id'] + aggregate.CELL_KEYS)
+    index = segments.write_segment_reports(cells, ['post_id'], str(tmp_path), figures=False, workers=1)
+    text = open(index).read()
+    assert 'failed' not in text
+    assert len(list(tmp_path.glob('post_id/*/analysis_summary.md'))) == 40
+
+
+def test_reliability_is_nan_below_items_plus_one_rows():
+    cells = aggregate.CellStats.from_frame(small_cells_frame(), ['post_id'] + aggregate.CELL_KEYS)
+    table = cells.reliability()
+    small = cells.count().to_numpy() < len(aggregate.PERSUASIVENESS_ITEMS) + 1
+    assert table['cronbach_alpha'][small].isna().all()
+    assert table['mcdonald_omega'][small].isna().all()
+
+
+def test_one_failing_segment_does_not_stop_the_batch(tmp_path, monkeypatch):
+    import analysis
+    write_summary = analysis.write_summary
+
+    def flaky(cell_stats, path):
+        if 'post_id/3/' in path.replace('\\', '/'):
+            raise ValueError("boom")
+        write_summary(cell_stats, path)
+
+    monkeypatch.setattr(analysis, 'write_summary', flaky)
+    cells = aggregate.CellStats.from_frame(small_cells_frame(), ['post_id'] + aggregate.CELL_KEYS)
+    index = segments.write_segment_reports(cells, ['post_id'], str(tmp_path), figures=False, workers=1)
+    text = open(index).read()
+    assert '3 (failed: ValueError: boom)' in text
+    assert len(list(tmp_path.glob('post_id/*/analysis_summary.md'))) == 39
+
+
+def test_values_with_the_same_slug_get_separate_reports(tmp_path):
+    df = small_cells_frame(n_posts=4)
+    df['charity_id'] = df['post_id'].map({0: 'Save the Children', 1: 'save the children', 2: 'Save-the Children',
+                                          3: 'Cancer Research'})
+    cells = aggregate.CellStats.from_frame(df, ['charity_id'] + aggregate.CELL_KEYS)
+    index = segments.write_segment_reports(cells, ['charity_id'], str(tmp_path), figures=False, workers=1)
+    dirs = sorted(p.name.lower() for p in tmp_path.glob('charity_id/*'))
+    assert len(dirs) == len(set(dirs)) == 4
+    assert 'cancer_research' in dirs
+    assert 'failed' not in open(index).read()
@@ -0,0 +1,22 @@
+import pandas as pd
+
+import text_features
+
+
+def test_cache_round_trip_without_pickle(tmp_path):
+    posts = pd.DataFrame({'post_id': [2, 1, 3],
+                          'post_text': ["Hope saves lives! #cure", "Cancer is a deadly disease.", "Give hope, give help."]})
+    result = text_features.compute_post_features(posts, min_df=1)
+    text_features.write_cache(result, str(tmp_path))
+    assert not list(tmp_path.glob('*.pkl'))
+    cached = text_features.read_cache(result.digest, str(tmp_path))
+    pd.testing.assert_frame_equal(cached.features, result.features)
+    assert (cached.tfidf != result.tfidf).nnz == 0
+    assert cached.vocabulary == result.vocabulary
+    assert text_features.read_cache('0' * 64, str(tmp_path)) is None
+
+
+def test_sentiment_counts_per_text():
+    features = text_features._text_features(pd.Series(['', 'hope hope cancer', 'hope'], index=[5, 5, 1]))
+    assert features['positive_rate'].tolist() == [0.0, 2 / 3, 1.0]
+    assert features['negative_rate'].tolist() == [0.0, 1 / 3, 0.0]
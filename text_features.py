@@ -0,0 +1,205 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import data_cache
+from data_cache import CACHE_DIR
+
+FEATURE_VERSION = 1
+# Bumped when the on-disk layout of the cache changes
+CACHE_FORMAT = 2
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+# Terms in fewer posts than this are left out of the TF-IDF vocabulary
+DEFAULT_MIN_DF = 2
+
+# Literal characters rather than \U escapes, which the pyarrow (RE2) string kernels reject
+EMOJI = ("[\U0001F1E6-\U0001F1FF\U0001F300-\U0001F5FF\U0001F600-\U0001F64F\U0001F680-\U0001F6FF"
+         "\U0001F900-\U0001F9FF\U0001FA70-\U0001FAFF\u2600-\u27BF]")
+# Small appeal-oriented sentiment lexicon; scores are per-word rates, so only relative values matter
+POSITIVE_WORDS = frozenset('''
+    hope hopeful love loving loved care caring help helps helping support supporting save saves saving
+    cure cures heal healing healthy life lives thrive brighter better best bright future together
+    kind kindness generous generosity gift gifts give giving grateful thank thanks joy happy smile
+    strong strength brave courage survive survivor survivors victory win progress breakthrough
+    breakthroughs possible change difference inspire inspiring compassion comfort community
+    families family protect safe bless blessed peace wonderful amazing incredible powerful
+'''.split())
+NEGATIVE_WORDS = frozenset('''
+    cancer die dies dying death deaths deadly disease diseases suffer suffering suffers pain painful
+    fear afraid scary struggle struggling struggles devastating devastated evil enemy enemies fight
+    loss lose losing lost tragic tragedy sad grief hurt hurting sick illness tumor tumors worst
+    crisis threat threatens alone lonely desperate hopeless harm dangerous deadliest killing kills
+    terrible horrible cruel broken heartbreaking heartbroken victims victim
+'''.split())
+FEATURE_COLUMNS = ['n_chars', 'n_words', 'n_sentences', 'n_hashtags', 'n_mentions', 'n_emoji', 'n_links',
+                   'n_exclamations', 'words_per_sentence', 'syllables_per_word', 'flesch_reading_ease',
+                   'flesch_kincaid_grade', 'positive_rate', 'negative_rate', 'sentiment']
+
+
+def _text_features(texts):
+    # Surface, readability and lexicon features of a Series of texts, computed with vectorized str methods
+    lower = texts.str.lower()
+    words = lower.str.findall(r"[a-z]+(?:'[a-z]+)?")
+    n_words = words.str.len().clip(lower=1)
+    n_sentences = texts.str.count(r"[.!?]+(?:\s|$)").clip(lower=1)
+    # Syllables: vowel groups, less a silent final e, at least one per word
+    syllables = np.maximum(lower.str.count(r"[aeiouy]+") - lower.str.count(r"[^aeiouy\W]e\b"), n_words)
+    # Lexicon hits over all words at once, summed back to their texts by position
+    flat = pd.Series(list(itertools.chain.from_iterable(words)), dtype=object)
+    owner = np.repeat(np.arange(len(words)), words.str.len().to_numpy())
+    positive = np.bincount(owner, weights=flat.isin(POSITIVE_WORDS).to_numpy(), minlength=len(words))
+    negative = np.bincount(owner, weights=flat.isin(NEGATIVE_WORDS).to_numpy(), minlength=len(words))
+    features = pd.DataFrame({
+        'n_chars': texts.str.len(),
+        'n_words': n_words,
+        'n_sentences': n_sentences,
+        'n_hashtags': texts.str.count(r"#\w+"),
+        'n_mentions': texts.str.count(r"@\w+"),
+        'n_emoji': texts.str.count(EMOJI),
+        'n_links': texts.str.count(r"\[link\]|https?://\S+"),
+        'n_exclamations': texts.str.count('!'),
+        'words_per_sentence': n_words / n_sentences,
+        'syllables_per_word': syllables / n_words,
+        'positive_rate': positive / n_words,
+        'negative_rate': negative / n_words,
+    }, index=texts.index)
+    features['flesch_reading_ease'] = (206.835 - 1.015 * features['words_per_sentence']
+                                       - 84.6 * features['syllables_per_word'])
+    features['flesch_kincaid_grade'] = (0.39 * features['words_per_sentence']
+                                        + 11.8 * features['syllables_per_word'] - 15.59)
+    features['sentiment'] = features['positive_rate'] - features['negative_rate']
+    return features[FEATURE_COLUMNS].astype(float)
+
+
+def text_features(texts, workers=1, chunk=5000):
+    """Surface, readability and sentiment features of a Series of texts; large inputs can use a process pool"""
+    if workers == 1 or len(texts) <= chunk:
+        return _text_features(texts)
+    parts = [texts.iloc[start:start + chunk] for start in range(0, len(texts), chunk)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return pd.concat(pool.map(_text_features, parts))
+
+
+def tfidf(texts, min_df=DEFAULT_MIN_DF):
+    """(matrix, vocabulary): L2-normalized TF-IDF rows with smoothed idf, as sklearn's TfidfVectorizer"""
+    tokens = [TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    vocabulary, columns = {}, []
+    for doc in tokens:
+        columns.append([vocabulary.setdefault(token, len(vocabulary)) for token in doc])
+    rows = np.repeat(np.arange(len(tokens)), [len(c) for c in columns])
+    counts = sp.csr_matrix((np.ones(len(rows)), (rows, np.concatenate(columns or [[]]).astype(np.int64))),
+                           shape=(len(tokens), len(vocabulary)))
+    counts.sum_duplicates()
+
+    # Keep terms in at least min_df documents, in alphabetical order
+    df = np.bincount(counts.indices, minlength=len(vocabulary))
+    terms = sorted(term for term, j in vocabulary.items() if df[j] >= min_df)
+    keep = np.array([vocabulary[term] for term in terms], dtype=np.int64)
+    counts = counts[:, keep]
+    idf = np.log((1 + len(tokens)) / (1 + df[keep])) + 1
+    matrix = counts @ sp.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = sp.diags(1 / np.where(norms > 0, norms, 1)) @ matrix
+    return matrix.tocsr(), terms
+
+
+class PostFeatures:
+    """Per-post text features and TF-IDF vectors, indexed by post_id"""
+
+    def __init__(self, features, tfidf_matrix, vocabulary, digest):
+        self.features = features
+        self.tfidf = tfidf_matrix
+        self.vocabulary = vocabulary
+        self.digest = digest
+
+    @property
+    def post_ids(self):
+        return self.features.index
+
+    def join(self, df, columns=FEATURE_COLUMNS, standardize=False):
+        """df with the post features as covariate columns; standardize z-scores them across posts"""
+        features = self.features[list(columns)]
+        if standardize:
+            features = (features - features.mean()) / features.std()
+        return df.join(features, on='post_id', validate='many_to_one')
+
+
+def content_digest(posts, min_df=DEFAULT_MIN_DF):
+    """Hash of the post texts and feature settings; any edit to a text gives a new cache entry"""
+    digest = hashlib.sha256(f"{FEATURE_VERSION}:{min_df}".encode())
+    digest.update(pd.util.hash_pandas_object(posts[['post_id', 'post_text']], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cache_paths(digest, cache_dir=CACHE_DIR):
+    """(features parquet, TF-IDF npz, vocabulary json); plain tables and arrays, no pickled classes"""
+    prefix = os.path.join(cache_dir, f"text_features-{CACHE_FORMAT}-{digest[:16]}")
+    return prefix + '.features.parquet', prefix + '.tfidf.npz', prefix + '.vocabulary.json'
+
+
+def write_cache(result, cache_dir=CACHE_DIR):
+    """Write result to its cache files, replacing those of any other digest"""
+    paths = cache_paths(result.digest, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name.startswith('text_features-') and os.path.join(cache_dir, name) not in paths:
+            os.remove(os.path.join(cache_dir, name))
+    features_path, tfidf_path, vocabulary_path = paths
+    result.features.to_parquet(features_path + '.tmp')
+    sp.save_npz(tfidf_path + '.tmp.npz', result.tfidf)
+    with open(vocabulary_path + '.tmp', 'w') as f:
+        json.dump({'digest': result.digest, 'vocabulary': result.vocabulary}, f)
+    os.replace(features_path + '.tmp', features_path)
+    os.replace(tfidf_path + '.tmp.npz', tfidf_path)
+    # Written last: its presence marks a complete entry
+    os.replace(vocabulary_path + '.tmp', vocabulary_path)
+
+
+def read_cache(digest, cache_dir=CACHE_DIR):
+    """PostFeatures from the cache files of digest, or None if there are none"""
+    features_path, tfidf_path, vocabulary_path = cache_paths(digest, cache_dir)
+    if not all(os.path.exists(path) for path in (features_path, tfidf_path, vocabulary_path)):
+        return None
+    with open(vocabulary_path) as f:
+        meta = json.load(f)
+    return PostFeatures(pd.read_parquet(features_path), sp.load_npz(tfidf_path).tocsr(), meta['vocabulary'],
+                        meta['digest'])
+
+
+def compute_post_features(posts, min_df=DEFAULT_MIN_DF, workers=1):
+    """PostFeatures for a post table with one row per post_id"""
+    posts = posts.drop_duplicates('post_id').sort_values('post_id').reset_index(drop=True)
+    texts = posts['post_text'].fillna('').astype(str)
+    features = text_features(texts, workers=workers)
+    features.index = pd.Index(posts['post_id'], name='post_id')
+    matrix, vocabulary = tfidf(texts, min_df)
+    return PostFeatures(features, matrix, vocabulary, content_digest(posts, min_df))
+
+
+def post_features(filepath='Data_LongFormat.csv', cache_dir=CACHE_DIR, min_df=DEFAULT_MIN_DF, workers=1,
+                  use_cache=True):
+    """PostFeatures of the distinct posts of filepath, cached on disk by content hash"""
+    posts = data_cache.load_posts(filepath, cache_dir)
+    digest = content_digest(posts, min_df)
+    cached = read_cache(digest, cache_dir) if use_cache else None
+    if cached is not None:
+        return cached
+
+    print(f"Computing text features for {len(posts)} posts...")
+    result = compute_post_features(posts, min_df, workers)
+    if use_cache:
+        write_cache(result, cache_dir)
+    return result
+
+
+if __name__ == "__main__":
+    result = post_features()
+    print(f"{len(result.features)} posts, {len(result.vocabulary)} TF-IDF terms")
+    print(result.features.describe().T.to_string(float_format='{:.3f}'.format))